@@ -0,0 +1,62 @@
+"""Shared fixtures: small synthetic F24 games written to a temporary folder."""
+
+import pytest
+
+
+POSITIONS = ",".join(['1'] + ['2'] * 4 + ['3'] * 3 + ['4'] * 3 + ['5'] * 7)
+
+
+def _event(game_id, event_id, type_id, period_id, minute, team_id, player_id=None, x=50.0, y=50.0,
+           outcome=1, qualifiers=(), sec=0):
+    attrs = (f'id="{game_id}{event_id:04d}" event_id="{event_id}" type_id="{type_id}" '
+             f'period_id="{period_id}" min="{minute}" sec="{sec}" team_id="{team_id}" '
+             f'outcome="{outcome}" x="{x}" y="{y}"')
+    if player_id is not None:
+        attrs += f' player_id="{player_id}"'
+    qs = "".join(f'<Q id="{game_id}{event_id}{qid}" qualifier_id="{qid}" value="{value}"/>'
+                 for qid, value in qualifiers)
+    return f'<Event {attrs}>{qs}</Event>'
+
+
+def f24_game_xml(game_id, home, away, sub_off=None, extra_events=()):
+    """
+    One F24 game: both lineups, a pass/tackle/interception per starter in each
+    half, and one substitution per team at minute 60 (player 5 off, 12 on).
+
+    sub_off overrides the home team's outgoing player; extra_events are
+    (type_id, period_id, min, sec, team_id, player_id) tuples appended as-is.
+    """
+    events = []
+    for team in (home, away):
+        players = ",".join(str(team * 100 + i) for i in range(18))
+        events.append((34, 1, 0, 0, team, None, [(30, players), (44, POSITIONS)]))
+    for period_id, minute in ((1, 10), (2, 50)):
+        for team in (home, away):
+            for i in range(11):
+                player = team * 100 + i
+                events.append((1, period_id, minute, i, team, player, [(140, 70.0), (141, 30.0)]))
+                events.append((7, period_id, minute + 5, i, team, player, []))
+                events.append((8, period_id, minute + 10, i, team, player, []))
+    for team in (home, away):
+        off = sub_off if (team == home and sub_off is not None) else team * 100 + 5
+        events.append((18, 2, 60, 0, team, off, []))
+        events.append((19, 2, 60, 0, team, team * 100 + 12, [(44, 'Midfielder')]))
+    events.extend((t, p, m, s, team, player, []) for t, p, m, s, team, player in extra_events)
+
+    rows = [_event(game_id, n + 1, t, p, m, team, player, x=10.0 + n % 80, y=20.0 + n % 60,
+                   qualifiers=q, sec=s)
+            for n, (t, p, m, s, team, player, q) in enumerate(events)]
+    return ('<?xml version="1.0" encoding="utf-8"?>\n<Games timestamp="x">\n'
+            f'<Game id="{game_id}" home_team_id="{home}" home_team_name="H{home}" '
+            f'away_team_id="{away}" away_team_name="A{away}" competition_id="8" '
+            'competition_name="Liga" season_id="2024">\n'
+            + "\n".join(rows) + '\n</Game>\n</Games>\n')
+
+
+@pytest.fixture
+def f24_folder(tmp_path):
+    """Folder with four games; game 1003 substitutes off a player who never played."""
+    games = [(1000, 10, 20, None), (1001, 30, 40, None), (1002, 20, 30, None), (1003, 40, 10, 4017)]
+    for game_id, home, away, sub_off in games:
+        (tmp_path / f"f24-{game_id}.xml").write_text(f24_game_xml(game_id, home, away, sub_off=sub_off))
+    return tmp_path
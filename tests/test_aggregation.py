@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from tvi_footballindex.tvi.aggregation import add_opponent, calculate_tvi_levels
+from tvi_footballindex.tvi.calculator import calculate_tvi
+
+
+def _frames():
+    # Team 10 plays two games against 20; only player 1 acts in game 2
+    events = pd.DataFrame({
+        'game_id': [1, 1, 1, 1, 1, 2, 2],
+        'team_id': [10] * 7,
+        'player_id': [1, 1, 1, 2, 2, 1, 1],
+        'event_name': ['Pass', 'Pass', 'Tackle', 'Pass', 'Aerial', 'Pass', 'Tackle'],
+        'x': [10, 90, 50, 10, 50, 10, 90],
+        'y': [50, 50, 50, 50, 50, 50, 50],
+    })
+    playtime = pd.DataFrame({
+        'game_id': [1, 1, 1, 1, 2, 2, 2, 2],
+        'team_id': [10, 10, 20, 20, 10, 10, 20, 20],
+        'player_id': [1, 2, 3, 4, 1, 2, 3, 4],
+        'position': ['Midfielder', 'Defender'] * 4,
+        'play_time': [90, 90, 90, 90, 90, 60, 90, 90],
+    })
+    return events, playtime
+
+
+def test_team_game_is_on_the_player_scale():
+    events, playtime = _frames()
+    players = calculate_tvi(events, playtime).set_index(['game_id', 'player_id'])
+    levels = calculate_tvi_levels(events, add_opponent(playtime))
+
+    team = levels['team_game'].set_index(['game_id', 'team_id'])
+    assert team.loc[(1, 10), 'play_time'] == 90
+    assert team.loc[(1, 10), 'action_diversity'] == 4
+    assert team.loc[(1, 10), 'TVI'] == pytest.approx(90 / 44 * 4 / 90)
+    # Only player 1 acted in game 2, so the team-game scores exactly like him
+    assert team.loc[(2, 10), 'TVI'] == pytest.approx(players.loc[(2, 1), 'TVI'])
+    assert team.loc[(2, 10), 'TVI_entropy'] == pytest.approx(players.loc[(2, 1), 'TVI_entropy'])
+
+    unit = levels['unit_game'].set_index(['game_id', 'team_id', 'position'])
+    assert unit.loc[(1, 10, 'Defender'), 'TVI'] == pytest.approx(players.loc[(1, 2), 'TVI'])
+
+    # Levels spanning several games add up the match minutes of each game
+    opponent = levels['team_vs_opponent'].set_index(['team_id', 'opponent_id'])
+    assert opponent.loc[(10, 20), 'play_time'] == 180
@@ -0,0 +1,19 @@
+from tvi_footballindex.parsing.f24_parser import calculate_player_playtime, get_metric_events, parsef24_folder
+from tvi_footballindex.tvi.cache import TVICache, cached_aggregate_tvi_by_player, cached_calculate_tvi, default_cache
+
+
+def test_explicit_empty_cache_is_used(f24_folder, tmp_path):
+    events = parsef24_folder(str(f24_folder), show_progress=False)
+    metric_events, playtime = get_metric_events(events), calculate_player_playtime(events)
+    default_stats = dict(default_cache().stats)
+
+    cache = TVICache(disk_dir=str(tmp_path / "cache"))
+    assert len(cache) == 0
+    tvi = cached_calculate_tvi(metric_events, playtime, cache=cache)
+    cached_calculate_tvi(metric_events, playtime, cache=cache)
+    cached_aggregate_tvi_by_player(tvi, cache=cache)
+
+    assert cache.stats['misses'] == 2 and cache.stats['hits'] == 1
+    assert len(cache) == 2
+    assert any((tmp_path / "cache").iterdir())
+    assert default_cache().stats == default_stats
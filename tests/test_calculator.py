@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+
+from tvi_footballindex.tvi.calculator import calculate_tvi
+
+
+EVENTS = pd.DataFrame({
+    'player_id': [1, 1, 2], 'event_name': ['Pass', 'Tackle', 'Pass'],
+    'x': [30, 70, 20], 'y': [50, 60, 40], 'game_id': [1, 1, 1], 'team_id': [10, 10, 20],
+})
+PLAYTIME = pd.DataFrame({'player_id': [1, 2], 'play_time': [90, 75], 'game_id': [1, 1], 'team_id': [10, 20]})
+
+
+@pytest.mark.parametrize('low_memory', [False, True])
+def test_unknown_backend_is_rejected(low_memory):
+    with pytest.raises(ValueError, match='Unknown backend'):
+        calculate_tvi(EVENTS, PLAYTIME, backend='nonexistent', low_memory=low_memory)
+
+
+def test_low_memory_needs_pandas_backend():
+    pytest.importorskip('polars')
+    with pytest.raises(ValueError, match='low_memory'):
+        calculate_tvi(EVENTS, PLAYTIME, backend='polars', low_memory=True)
+    assert len(calculate_tvi(EVENTS, PLAYTIME, backend='pandas', low_memory=True)) == 2
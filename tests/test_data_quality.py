@@ -0,0 +1,23 @@
+from tvi_footballindex.parsing.f24_parser import get_data_quality_report, parsef24_folder
+from tvi_footballindex.utils.interning import IDInterner
+
+import pandas as pd
+import pytest
+
+
+def test_interned_report_matches_plain(f24_folder):
+    plain = get_data_quality_report(parsef24_folder(str(f24_folder), show_progress=False))
+    interner = IDInterner()
+    coded = parsef24_folder(str(f24_folder), show_progress=False, interner=interner)
+    report = get_data_quality_report(coded, interner=interner)
+
+    pd.testing.assert_frame_equal(report, plain)
+    assert report['game_id'].tolist() == ['1000', '1001', '1002', '1003']
+    assert report['passed'].tolist() == [True, True, True, False]
+    assert report.loc[3, 'sub_off_not_on_pitch'] == 1
+
+
+def test_interned_report_needs_interner(f24_folder):
+    coded = parsef24_folder(str(f24_folder), show_progress=False, interner=IDInterner())
+    with pytest.raises(ValueError):
+        get_data_quality_report(coded)
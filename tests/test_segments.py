@@ -0,0 +1,33 @@
+from tvi_footballindex.parsing.f24_parser import get_metric_events, parsef24_folder
+from tvi_footballindex.parsing.intervals import OnPitchIndex, event_minutes
+from tvi_footballindex.tvi.segments import calculate_segment_tvi, goal_timeline, label_game_state
+
+from conftest import f24_game_xml
+
+
+def _stoppage_game(tmp_path):
+    # Home goal at 45+1 and last first-half event at 45+2, then a home tackle at 45:30 of period 2
+    extra = [(16, 1, 46, 0, 10, 1009), (7, 1, 47, 0, 20, 2003), (7, 2, 45, 30, 10, 1003)]
+    (tmp_path / "f24-1000.xml").write_text(f24_game_xml(1000, 10, 20, extra_events=extra))
+    return parsef24_folder(str(tmp_path), show_progress=False)
+
+
+def test_first_half_stoppage_goal_counts_in_second_half(tmp_path):
+    events = _stoppage_game(tmp_path)
+    metric_events = get_metric_events(events, extra_columns=['min', 'sec', 'period_id'])
+    index = OnPitchIndex.from_events(events)
+    minutes = event_minutes(metric_events, index.offsets)
+
+    states = label_game_state(metric_events, goal_timeline(events), minutes=minutes)
+    tackle = ((metric_events['period_id'] == 2) & (metric_events['min'] == 45)).to_numpy()
+    assert minutes[tackle].tolist() == [47.5]
+    assert states[tackle].tolist() == ['leading']
+
+
+def test_stoppage_time_stays_in_its_half(tmp_path):
+    seg = calculate_segment_tvi(_stoppage_game(tmp_path), by=('block', 'half'))
+    starter = seg[seg['player_id'] == '1003'].set_index(['segment_type', 'segment'])['play_time']
+
+    assert starter[('block', '30-45')] == 17
+    assert starter[('block', '45-60')] == 15
+    assert starter[('half', 'first_half')] == 47
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from tvi_footballindex.tvi.service import TVIIndex
+
+
+def _index():
+    # A missing competition turns the column into floats (8.0), and player IDs too
+    return TVIIndex(pd.DataFrame({
+        'player_id': [123.0, 124.0, 125.0, 126.0],
+        'competition_id': [8, 8, np.nan, 9],
+        'position': ['D', 'D', 'D', np.nan],
+        'play_time': [900, 800, 700, 600],
+        'TVI': [0.5, 0.4, 0.9, 0.3],
+        'TVI_entropy': [1.0, 2.0, 3.0, 4.0],
+    }))
+
+
+def test_keys_ignore_float_ids():
+    index = _index()
+    assert [row['player_id'] for row in index.top_k(competition='8')] == [123, 124]
+    assert [row['player_id'] for row in index.top_k(competition=8)] == [123, 124]
+    assert len(index.player('123')) == 1
+    assert index.percentile('124')[0]['group_size'] == 3
+
+
+def test_missing_values_form_their_own_group():
+    index = _index()
+    [row] = index.percentile('125', by=('competition', 'position'))
+    assert row['group_size'] == 1
+    assert [row['player_id'] for row in index.top_k(competition='missing')] == [125]
+    assert [row['player_id'] for row in index.top_k(position='missing')] == [126]
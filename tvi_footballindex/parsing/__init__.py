@@ -7,11 +7,14 @@ starting with F24 XML files.
 
 from .f24_parser import (
     parsef24_folder,
+    parsef24_file,
+    parsef24_archive,
     explode_event,
     get_event_types,
     get_qualifiers,
     filter_events_by_type,
     get_game_summary,
+    get_data_quality_report,
     calculate_player_playtime,
     get_interceptions,
     get_tackles,
@@ -21,17 +24,51 @@ from .f24_parser import (
     get_key_passes,
     get_deep_completions,
     get_progressive_passes,
+    explode_passes,
+    get_metric_events,
     TYPES_DICT,
-    QUALIFIERS_DICT
+    QUALIFIERS_DICT,
+    POSITIONS_DICT,
+    TEAM_EVENT_IDS
+)
+from .live import (
+    LiveTVI,
+    metric_actions,
+    replay_snapshots
+)
+from .intervals import (
+    OnPitchIndex,
+    event_minutes,
+    period_offsets
+)
+from .event_store import (
+    EventStore,
+    EventRecord
+)
+from .possessions import (
+    assign_possessions,
+    get_possession_counts
+)
+from .prefetch import (
+    PrefetchReader,
+    ThrottledReader
+)
+from .watcher import (
+    F24FolderWatcher,
+    process_f24_file,
+    watch_f24_folder
 )
 
 __all__ = [
     'parsef24_folder',
+    'parsef24_file',
+    'parsef24_archive',
     'explode_event',
     'get_event_types',
     'get_qualifiers',
     'filter_events_by_type',
     'get_game_summary',
+    'get_data_quality_report',
     'calculate_player_playtime',
     'get_interceptions',
     'get_tackles',
@@ -41,6 +78,25 @@ __all__ = [
     'get_key_passes',
     'get_deep_completions',
     'get_progressive_passes',
+    'explode_passes',
+    'get_metric_events',
     'TYPES_DICT',
-    'QUALIFIERS_DICT'
+    'QUALIFIERS_DICT',
+    'POSITIONS_DICT',
+    'TEAM_EVENT_IDS',
+    'LiveTVI',
+    'metric_actions',
+    'replay_snapshots',
+    'OnPitchIndex',
+    'event_minutes',
+    'period_offsets',
+    'EventStore',
+    'EventRecord',
+    'assign_possessions',
+    'get_possession_counts',
+    'PrefetchReader',
+    'ThrottledReader',
+    'F24FolderWatcher',
+    'process_f24_file',
+    'watch_f24_folder'
 ]
@@ -0,0 +1,494 @@
+"""
+Array-backed event store
+
+Holds parsed F24 events as typed NumPy columns (integer ID codes, int16 type
+IDs, float32 coordinates, ...) sorted by game and match time, with
+lightweight __slots__ record views for code that has to walk events in order.
+"Next event of the same team/player" lookups and sequence patterns (e.g. a
+tackle followed by a pass from the same player within 5 seconds) are answered
+with searchsorted over the whole store, so new extractors can be written
+without per-row pandas overhead.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+import pandas as pd
+
+from tvi_footballindex.parsing.f24_parser import TYPES_DICT
+
+
+_TYPE_IDS_BY_NAME = {name: type_id for type_id, name in TYPES_DICT.items()}
+_GROUPINGS = (None, 'team', 'player')
+
+
+def _field(name, doc):
+    def getter(self):
+        return self._store.columns[name][self._i]
+    return property(getter, doc=doc)
+
+
+def _id_field(kind, doc):
+    def getter(self):
+        code = self._store.columns[f"{kind}_code"][self._i]
+        return self._store.ids[kind][code] if code >= 0 else None
+    return property(getter, doc=doc)
+
+
+class EventRecord:
+    """
+    View of one event in an EventStore.
+
+    Holds only the store and a position, so creating records is cheap; every
+    attribute is read from the store's columns on access.
+    """
+
+    __slots__ = ('_store', '_i')
+
+    def __init__(self, store, i):
+        self._store = store
+        self._i = i
+
+    index = property(lambda self: self._i, doc="Position of the event in the store")
+    row = _field('row', "Row of the event in the source DataFrame")
+    event_id = _field('event_id', "F24 event ID within the game")
+    type_id = _field('type_id', "F24 event type ID")
+    outcome = _field('outcome', "1 if successful, 0 otherwise")
+    period_id = _field('period_id', "Match period")
+    min = _field('min', "Match minute")
+    sec = _field('sec', "Second within the minute")
+    time = _field('time', "Match time in seconds (min * 60 + sec)")
+    x = _field('x', "x-coordinate (0-100)")
+    y = _field('y', "y-coordinate (0-100)")
+    game_id = _id_field('game', "Game ID")
+    team_id = _id_field('team', "Team ID")
+    player_id = _id_field('player', "Player ID, None for team events")
+
+    @property
+    def event_name(self):
+        """Event type name from TYPES_DICT."""
+        return TYPES_DICT.get(int(self.type_id))
+
+    @property
+    def qualifiers(self):
+        """Qualifier dicts of the event (only if the store keeps qualifiers)."""
+        if self._store.qualifiers is None:
+            raise AttributeError("The store was built with include_qualifiers=False")
+        return self._store.qualifiers[self._i]
+
+    def next(self, by=None, types=None, within=None):
+        """
+        Next event of the same game (and team/player), as a record, or None.
+
+        Convenience for interactive use: it runs the store-wide lookup, so loops
+        should call EventStore.next_event once instead.
+        """
+        i = self._store.next_event(by=by, types=types, within=within)[self._i]
+        return EventRecord(self._store, i) if i >= 0 else None
+
+    def __repr__(self):
+        return (f"EventRecord(game_id={self.game_id!r}, {self.min}:{self.sec:02d}, "
+                f"type={self.event_name!r}, team_id={self.team_id!r}, player_id={self.player_id!r})")
+
+
+class EventStore:
+    """
+    Typed, column-oriented store of match events.
+
+    Events are sorted by game, period and match time (ties keep their original
+    order). Game, team and player IDs are kept as int32 codes into `ids`.
+
+    Parameters:
+    -----------
+    columns : dict
+        Column name -> NumPy array, all of the same length; usually built with from_events
+    ids : dict
+        'game', 'team', 'player' -> array of the IDs behind the codes
+    qualifiers : numpy.ndarray, optional
+        Qualifier lists per event (object array)
+
+    Example:
+    --------
+    >>> store = EventStore.from_events(events_df)
+    >>> first, then = store.followed_by('Tackle', 'Pass', by='player', within=5)
+    >>> actions = store.to_actions(first, 'tackle_then_pass')
+    >>> for event in store.game(store.ids['game'][0]):
+    ...     if event.type_id == 16:
+    ...         print(event)
+    """
+
+    def __init__(self, columns, ids, qualifiers=None):
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"All columns must have the same length, got {sorted(lengths)}")
+        self.columns = columns
+        self.ids = ids
+        self.qualifiers = qualifiers
+        self._size = lengths.pop() if lengths else 0
+        games = columns['game_code']
+        self._game_starts = np.searchsorted(games, np.arange(len(ids['game']) + 1), side='left')
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return f"EventStore({len(self)} events, {len(self.ids['game'])} games)"
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("EventStore index out of range")
+        return EventRecord(self, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield EventRecord(self, i)
+
+    def __getattr__(self, name):
+        # Columns as attributes: store.type_id, store.x, ...
+        columns = self.__dict__.get('columns', {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @classmethod
+    def from_events(cls, match_events, include_qualifiers=True):
+        """
+        Build a store from parsed F24 events.
+
+        Parameters:
+        -----------
+        match_events : pandas.DataFrame
+            DataFrame containing match events, as returned by parsef24_folder
+            (plain or interned IDs)
+        include_qualifiers : bool, optional
+            Keep the qualifier lists for qualifier() and EventRecord.qualifiers (default: True)
+
+        Returns:
+        --------
+        EventStore
+        """
+        required = ['game_id', 'team_id', 'type_id', 'min', 'sec']
+        missing = [col for col in required if col not in match_events.columns]
+        if missing:
+            raise KeyError(f"Missing columns in match_events: {missing}")
+
+        n = len(match_events)
+        game_codes, games = pd.factorize(match_events['game_id'], sort=True)
+        team_codes, teams = pd.factorize(match_events['team_id'])
+        if 'player_id' in match_events.columns:
+            player_codes, players = pd.factorize(match_events['player_id'])
+        else:
+            player_codes, players = np.full(n, -1), pd.Index([])
+
+        def column(name, dtype, default=0):
+            if name not in match_events.columns:
+                return np.full(n, default, dtype=dtype)
+            return pd.to_numeric(match_events[name], errors='coerce').fillna(default).to_numpy(dtype=dtype)
+
+        period = column('period_id', np.int8)
+        minute = column('min', np.int16)
+        second = column('sec', np.int16)
+        time = minute.astype(np.float32) * 60 + second
+
+        # Game, period, time; ties keep their source order
+        order = np.lexsort((np.arange(n), time, period, game_codes))
+        columns = {
+            'row': np.arange(n, dtype=np.int64)[order],
+            'game_code': game_codes.astype(np.int32)[order],
+            'team_code': team_codes.astype(np.int32)[order],
+            'player_code': player_codes.astype(np.int32)[order],
+            'event_id': column('event_id', np.int32)[order],
+            'type_id': column('type_id', np.int16)[order],
+            'outcome': column('outcome', np.int8)[order],
+            'period_id': period[order],
+            'min': minute[order],
+            'sec': second[order],
+            'time': time[order],
+            'x': column('x', np.float32, np.nan)[order],
+            'y': column('y', np.float32, np.nan)[order],
+        }
+        ids = {
+            'game': np.asarray(games, dtype=object),
+            'team': np.asarray(teams, dtype=object),
+            'player': np.asarray(players, dtype=object),
+        }
+        qualifiers = None
+        if include_qualifiers and 'qualifiers' in match_events.columns:
+            qualifiers = match_events['qualifiers'].to_numpy(dtype=object)[order]
+        return cls(columns, ids, qualifiers)
+
+    # Selections -----------------------------------------------------------------------------
+
+    def game(self, game_id):
+        """Records of one game, in match order."""
+        code = np.flatnonzero(self.ids['game'] == game_id)
+        if not len(code):
+            raise KeyError(f"Game {game_id!r} not in the store")
+        start, stop = self._game_starts[code[0]], self._game_starts[code[0] + 1]
+        return [EventRecord(self, i) for i in range(start, stop)]
+
+    def type_ids_of(self, types):
+        """Resolve event types given as IDs, names (TYPES_DICT) or a list of them."""
+        if isinstance(types, (str, int, np.integer)):
+            types = [types]
+        resolved = []
+        for value in types:
+            if isinstance(value, str):
+                if value not in _TYPE_IDS_BY_NAME:
+                    raise ValueError(f"Unknown event type '{value}'")
+                value = _TYPE_IDS_BY_NAME[value]
+            resolved.append(int(value))
+        return resolved
+
+    def mask(self, types=None, outcome=None, players_only=False):
+        """
+        Boolean mask of events by type and outcome.
+
+        Parameters:
+        -----------
+        types : int, str or list, optional
+            Event type IDs or names (default: all types)
+        outcome : int, optional
+            Only events with this outcome (default: any)
+        players_only : bool, optional
+            Only events with a player (default: False)
+
+        Returns:
+        --------
+        numpy.ndarray
+            Boolean mask over the store
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if types is not None:
+            mask &= np.isin(self.columns['type_id'], self.type_ids_of(types))
+        if outcome is not None:
+            mask &= self.columns['outcome'] == outcome
+        if players_only:
+            mask &= self.columns['player_code'] >= 0
+        return mask
+
+    def qualifier(self, qualifier_id, dtype=float):
+        """
+        Typed column with the value of one qualifier for every event.
+
+        Parameters:
+        -----------
+        qualifier_id : int or str
+            Qualifier ID, e.g. 140 for PassEndX
+        dtype : type, optional
+            float (NaN where missing, default), bool (present or not) or object (raw values)
+
+        Returns:
+        --------
+        numpy.ndarray
+        """
+        if self.qualifiers is None:
+            raise ValueError("The store was built with include_qualifiers=False")
+        key = f"q{qualifier_id}_{np.dtype(dtype).name}"
+        if key not in self.columns:
+            wanted = str(qualifier_id)
+            values = np.empty(len(self), dtype=object)
+            for i, qualifiers in enumerate(self.qualifiers):
+                for q in qualifiers:
+                    if str(q.get('qualifier_id')) == wanted:
+                        values[i] = q.get('value', '')
+                        break
+            if dtype is bool:
+                values = np.array([value is not None for value in values], dtype=bool)
+            elif dtype is not object:
+                values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=dtype)
+            self.columns[key] = values
+        return self.columns[key]
+
+    # Lookups --------------------------------------------------------------------------------
+
+    def _group_keys(self, by):
+        """Integer group per event for next/previous lookups, -1 where the event has no group."""
+        if by not in _GROUPINGS:
+            raise ValueError(f"Unknown grouping '{by}'. Available: {list(_GROUPINGS)}")
+        games = self.columns['game_code'].astype(np.int64)
+        if by is None:
+            return games
+        codes = self.columns[f"{by}_code"].astype(np.int64)
+        return np.where(codes >= 0, games * (codes.max(initial=0) + 1) + codes, -1)
+
+    def _neighbour(self, direction, by, types, mask, within, same_period):
+        n = len(self)
+        keys = self._group_keys(by)
+        candidates = keys >= 0
+        if types is not None:
+            candidates &= self.mask(types)
+        if mask is not None:
+            candidates &= mask
+        positions = np.arange(n, dtype=np.int64)
+
+        # (group, position) pairs of candidates, searched for every event at once
+        candidate_keys = np.sort(keys[candidates] * n + positions[candidates])
+        queries = keys * n + positions
+        if direction > 0:
+            found = np.searchsorted(candidate_keys, queries, side='right')
+            valid = found < len(candidate_keys)
+        else:
+            found = np.searchsorted(candidate_keys, queries, side='left') - 1
+            valid = found >= 0
+        hit = candidate_keys[np.clip(found, 0, max(len(candidate_keys) - 1, 0))] if len(candidate_keys) \
+            else np.zeros(n, dtype=np.int64)
+        valid &= (keys >= 0) & (hit // n == keys)
+        result = np.where(valid, hit % n, -1)
+
+        if within is not None or same_period:
+            matched = result >= 0
+            other = np.where(matched, result, 0)
+            if within is not None:
+                gap = np.abs(self.columns['time'][other] - self.columns['time'])
+                matched &= gap <= within
+            if same_period:
+                matched &= self.columns['period_id'][other] == self.columns['period_id']
+            result = np.where(matched, result, -1)
+        return result
+
+    def next_event(self, by=None, types=None, mask=None, within=None, same_period=True):
+        """
+        Position of the next matching event for every event.
+
+        Parameters:
+        -----------
+        by : str, optional
+            None (same game), 'team' or 'player' (same game and team/player)
+        types : int, str or list, optional
+            Only consider events of these types
+        mask : numpy.ndarray, optional
+            Only consider events where the mask is True
+        within : float, optional
+            Only if it happens at most this many seconds later
+        same_period : bool, optional
+            Only within the same period (default: True)
+
+        Returns:
+        --------
+        numpy.ndarray
+            Store positions, -1 where there is no such event
+        """
+        return self._neighbour(1, by, types, mask, within, same_period)
+
+    def previous_event(self, by=None, types=None, mask=None, within=None, same_period=True):
+        """Position of the previous matching event for every event; see next_event."""
+        return self._neighbour(-1, by, types, mask, within, same_period)
+
+    # Patterns -------------------------------------------------------------------------------
+
+    def followed_by(self, first, then, by='player', within=None, immediate=False,
+                    first_outcome=None, then_outcome=None):
+        """
+        Events of type `first` followed by an event of type `then`.
+
+        Parameters:
+        -----------
+        first, then : int, str or list
+            Event types (IDs or names)
+        by : str, optional
+            None, 'team' or 'player': the follow-up must be by the same team/player (default: 'player')
+        within : float, optional
+            Maximum gap in seconds
+        immediate : bool, optional
+            If True, the very next event of the team/player must be of type `then`;
+            otherwise the next event of type `then` counts, whatever happened between
+            (default: False)
+        first_outcome, then_outcome : int, optional
+            Required outcomes
+
+        Returns:
+        --------
+        tuple
+            (first positions, follow-up positions) as aligned arrays
+        """
+        starts = self.mask(first, outcome=first_outcome)
+        then_mask = self.mask(then, outcome=then_outcome)
+        if immediate:
+            following = self.next_event(by=by, within=within)
+            ok = following >= 0
+            ok[ok] = then_mask[following[ok]]
+            following = np.where(ok, following, -1)
+        else:
+            following = self.next_event(by=by, mask=then_mask, within=within)
+        hits = np.flatnonzero(starts & (following >= 0))
+        return hits, following[hits]
+
+    def sequence(self, steps, by='team', within=None, immediate=True):
+        """
+        Chains of events matching a list of types in order.
+
+        Parameters:
+        -----------
+        steps : list
+            Event types per step, e.g. ['Interception', 'Pass', 'Pass']; each item is
+            an ID, a name or a list of them
+        by : str, optional
+            None, 'team' or 'player' (default: 'team')
+        within : float, optional
+            Maximum gap in seconds between consecutive steps
+        immediate : bool, optional
+            Each step must be the very next event of the team/player (default: True)
+
+        Returns:
+        --------
+        numpy.ndarray
+            Positions with shape (n_matches, len(steps))
+        """
+        if len(steps) < 1:
+            raise ValueError("steps cannot be empty")
+        chains = np.flatnonzero(self.mask(steps[0]))[:, None]
+        following = self.next_event(by=by, within=within) if immediate else None
+        for step in steps[1:]:
+            step_mask = self.mask(step)
+            last = chains[:, -1]
+            if immediate:
+                nxt = following[last]
+                ok = nxt >= 0
+                ok[ok] = step_mask[nxt[ok]]
+            else:
+                nxt = self.next_event(by=by, mask=step_mask, within=within)[last]
+                ok = nxt >= 0
+            chains = np.column_stack([chains[ok], nxt[ok]])
+        return chains
+
+    # Output ---------------------------------------------------------------------------------
+
+    def to_actions(self, positions, event_name, include_coordinates=True):
+        """
+        Turn store positions into an actions DataFrame like the get_* extractors return.
+
+        Parameters:
+        -----------
+        positions : array-like
+            Store positions, e.g. the first array of followed_by()
+        event_name : str
+            Value of the event_name column
+        include_coordinates : bool, optional
+            Include 'x' and 'y' (default: True)
+
+        Returns:
+        --------
+        pandas.DataFrame
+            Columns game_id, team_id, player_id, event_name (and x, y)
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        cols = self.columns
+
+        def decode(kind):
+            codes = cols[f"{kind}_code"][positions]
+            ids = np.append(self.ids[kind], None)
+            return ids[np.where(codes >= 0, codes, len(ids) - 1)]
+
+        actions = pd.DataFrame({
+            'game_id': decode('game'),
+            'team_id': decode('team'),
+            'player_id': decode('player'),
+            'event_name': event_name,
+        })
+        if include_coordinates:
+            actions['x'] = cols['x'][positions].astype(float)
+            actions['y'] = cols['y'][positions].astype(float)
+        return actions
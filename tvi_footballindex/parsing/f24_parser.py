@@ -12,10 +12,16 @@ import pandas as pd
 from pandas import json_normalize
 import pandas as pd
 import os
+import io
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 import json
 
-from tvi_footballindex.utils.helpers import pass_length
+from tvi_footballindex.utils.helpers import pass_length_array
+from tvi_footballindex.utils.interning import interned_columns, mark_interned
+from tvi_footballindex.parsing.prefetch import PrefetchReader
 
 # Configure pandas display options
 pd.set_option('display.max_columns', None)
@@ -108,6 +114,9 @@ QUALIFIERS_DICT = {
     232: "Unchallenged"
 }
 
+# Lineup position codes (PlayerPosition qualifier of FormationSet events)
+POSITIONS_DICT = {"1": "Goalkeeper", "2": "Defender", "3": "Midfielder", "4": "Forward"}
+
 # Create DataFrames for lookups
 types = pd.DataFrame.from_dict(TYPES_DICT, orient='index').reset_index()
 types.columns = ["type_id", "event_name"]
@@ -119,60 +128,68 @@ qualifiers.columns = ["qualifier_id", "description"]
 qualifiers_dict2 = {str(key): str(value) for key, value in QUALIFIERS_DICT.items()}
 
 
-def parsef24_folder(F24folder, show_progress=True):
+def _parse_f24_tree(source):
     """
-    Parse F24 XML files from a folder and return game and event data.
-    
+    Parse one F24 XML document into game metadata and raw event dicts.
+
     Parameters:
     -----------
-    F24folder : str
-        Path to the folder containing F24 XML files
-    show_progress : bool, default True
-        Whether to show progress bar   
+    source : str or file-like
+        Path of an F24 XML file, or a binary file-like object
 
     Returns:
     --------
-    pandas.DataFrame
-        DataFrame containing all match events with game metadata
+    tuple
+        (game metadata dict, list of event dicts)
     """
-    games_list = []
+    tree = et.ElementTree(file=source)
+    games = tree.getroot()
+    gameinfo = games.findall('Game')[0]  # Assuming there's always one 'Game' element
+
+    # Cache game metadata
+    game_id = gameinfo.get('id')
+    game_meta = {
+        "game_id": game_id,
+        "home_team_id": gameinfo.get('home_team_id'),
+        "home_team_name": gameinfo.get('home_team_name'),
+        "away_team_id": gameinfo.get('away_team_id'),
+        "away_team_name": gameinfo.get('away_team_name'),
+        "competition_id": gameinfo.get('competition_id'),
+        "competition_name": gameinfo.get('competition_name'),
+        "season_id": gameinfo.get('season_id'),
+    }
+
     events_list = []
+    for game in games:
+        for event in game:
+            # Build a dictionary for the event data
+            event_data = event.attrib.copy()
+            # Use list comprehension to extract qualifiers
+            event_data["qualifiers"] = [q.attrib for q in event]
+            event_data["game_id"] = game_id  # Attach game metadata to event
+            events_list.append(event_data)
+
+    return game_meta, events_list
+
+
+def _build_events_frame(games_list, events_list, interner=None):
+    """
+    Build the match events DataFrame from parsed game metadata and event dicts.
 
-    files = [f for f in os.listdir(F24folder) if f.endswith(".xml")]
-    iterator = tqdm(files) if show_progress else files
-
-    for file in iterator:
-        if file.endswith(".xml"):
-            file_path = os.path.join(F24folder, file)
-            
-            tree = et.ElementTree(file=file_path)
-            games = tree.getroot()
-            gameinfo = games.findall('Game')[0]  # Assuming there's always one 'Game' element
-
-            # Cache game metadata
-            game_id = gameinfo.get('id')
-            game_meta = {
-                "game_id": game_id,
-                "home_team_id": gameinfo.get('home_team_id'),
-                "home_team_name": gameinfo.get('home_team_name'),
-                "away_team_id": gameinfo.get('away_team_id'),
-                "away_team_name": gameinfo.get('away_team_name'),
-                "competition_id": gameinfo.get('competition_id'),
-                "competition_name": gameinfo.get('competition_name'),
-                "season_id": gameinfo.get('season_id'),
-            }
-            games_list.append(game_meta)
-
-            for game in games:
-                for event in game:
-                    # Build a dictionary for the event data
-                    event_data = event.attrib.copy()
-                    # Use list comprehension to extract qualifiers
-                    event_data["qualifiers"] = [q.attrib for q in event]
-                    event_data["game_id"] = game_id  # Attach game metadata to event
-                    # Build a DataFrame for this event and append it to the list
-                    events_list.append(event_data)
+    Parameters:
+    -----------
+    games_list : list
+        Game metadata dicts, one per file
+    events_list : list
+        Event dicts from all files
+    interner : IDInterner, optional
+        If given, game, team and player ID columns are replaced by their int32 codes
 
+    Returns:
+    --------
+    pandas.DataFrame
+        DataFrame containing all match events with game metadata
+    """
     # Concatenate all parsed events into a single DataFrame
     game_df = pd.DataFrame(games_list)
     match_events = pd.DataFrame(events_list)
@@ -195,8 +212,180 @@ def parsef24_folder(F24folder, show_progress=True):
 
     match_events['outcome'] = match_events['outcome'].astype(int)
 
+    if interner is not None:
+        match_events = interner.encode_frame(match_events)
+
     return match_events
 
+
+def parsef24_folder(F24folder, show_progress=True, prefetch=0, queue_depth=None, read_file=None,
+                    interner=None):
+    """
+    Parse F24 XML files from a folder and return game and event data.
+    
+    Parameters:
+    -----------
+    F24folder : str or file-like
+        Path to the folder containing F24 XML files. A zip or tar archive (path
+        or binary file-like object) is read with parsef24_archive instead.
+    show_progress : bool, default True
+        Whether to show progress bar   
+    prefetch : int, default 0
+        Number of reader threads that read upcoming files while the current one
+        is parsed (see PrefetchReader). 0 reads each file just before parsing it.
+        Useful on high-latency storage such as network mounts.
+    queue_depth : int, optional
+        Maximum number of files read ahead when prefetching (default: 2 * prefetch)
+    read_file : callable, optional
+        Function path -> bytes used to read files when prefetching
+        (default: a plain file read)
+    interner : IDInterner, optional
+        Replace game_id, team_id, player_id (and home/away team IDs) with dense
+        int32 codes from this interner; restore them with interner.decode_frame
+
+    Returns:
+    --------
+    pandas.DataFrame
+        DataFrame containing all match events with game metadata
+    """
+    if hasattr(F24folder, "read") or os.path.isfile(F24folder):
+        return parsef24_archive(F24folder, show_progress=show_progress, interner=interner)
+
+    games_list = []
+    events_list = []
+
+    files = [os.path.join(F24folder, f) for f in os.listdir(F24folder) if f.endswith(".xml")]
+    if prefetch:
+        sources = ((path, io.BytesIO(data)) for path, data in
+                   PrefetchReader(files, readers=prefetch, queue_depth=queue_depth, read_file=read_file))
+    else:
+        sources = ((path, path) for path in files)
+    iterator = tqdm(sources, total=len(files)) if show_progress else sources
+
+    for file_path, source in iterator:
+        game_meta, game_events = _parse_f24_tree(source)
+        games_list.append(game_meta)
+        events_list.extend(game_events)
+
+    return _build_events_frame(games_list, events_list, interner=interner)
+
+
+def parsef24_file(F24file, interner=None):
+    """
+    Parse a single F24 XML file.
+
+    Parameters:
+    -----------
+    F24file : str or file-like
+        Path of the F24 XML file, or a binary file-like object
+    interner : IDInterner, optional
+        Replace ID columns with int32 codes, as in parsef24_folder
+
+    Returns:
+    --------
+    pandas.DataFrame
+        DataFrame containing the match events with game metadata, in the same
+        format as parsef24_folder
+    """
+    game_meta, events_list = _parse_f24_tree(F24file)
+    return _build_events_frame([game_meta], events_list, interner=interner)
+
+
+def _is_f24_member(name):
+    # Skip folders and resource-fork entries that macOS adds to archives
+    base = os.path.basename(name)
+    return name.endswith(".xml") and not base.startswith("._") and "__MACOSX" not in name
+
+
+def _parse_f24_bytes(data):
+    return _parse_f24_tree(io.BytesIO(data))
+
+
+def _parse_zip_member(path, name):
+    # Each worker opens its own handle, so members are inflated and parsed in parallel
+    with zipfile.ZipFile(path) as archive:
+        return _parse_f24_bytes(archive.read(name))
+
+
+def _iter_archive_members(archive):
+    """
+    Yield (name, bytes) for the F24 XML members of a zip or tar archive, in order.
+    """
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and _is_f24_member(info.filename):
+                    yield info.filename, zf.read(info)
+        return
+    if hasattr(archive, "seek"):
+        archive.seek(0)
+    # Streaming mode: a .tar.gz is decompressed once, front to back
+    opener = {"fileobj": archive} if hasattr(archive, "read") else {"name": archive}
+    with tarfile.open(mode="r|*", **opener) as tf:
+        for member in tf:
+            if member.isfile() and _is_f24_member(member.name):
+                yield member.name, tf.extractfile(member).read()
+
+
+def parsef24_archive(F24archive, show_progress=True, max_workers=None, interner=None):
+    """
+    Parse the F24 XML files inside a zip or tar (.tar, .tar.gz, .tar.bz2, .tar.xz) archive.
+
+    Members are streamed straight into the XML parser, without extracting the
+    archive to disk. Zip members can be inflated independently, so with a path
+    each worker process opens the archive and decompresses and parses its own
+    members. Tar archives are a single compressed stream: they are decompressed
+    sequentially while the members already read are parsed in the worker pool.
+
+    Parameters:
+    -----------
+    F24archive : str or file-like
+        Path of the archive, or a binary file-like object containing it
+    show_progress : bool, default True
+        Whether to show progress bar
+    max_workers : int, optional
+        Number of worker processes; 1 parses in the calling process
+        (default: number of CPUs)
+    interner : IDInterner, optional
+        Replace ID columns with int32 codes, as in parsef24_folder
+
+    Returns:
+    --------
+    pandas.DataFrame
+        DataFrame containing all match events with game metadata, in the same
+        format as parsef24_folder
+    """
+    is_path = isinstance(F24archive, (str, os.PathLike))
+    if is_path and not os.path.isfile(F24archive):
+        raise ValueError(f"Archive not found: {F24archive}")
+    if not is_path and not hasattr(F24archive, "read"):
+        raise ValueError("F24archive must be a path or a binary file-like object")
+    if is_path and not (zipfile.is_zipfile(F24archive) or tarfile.is_tarfile(F24archive)):
+        raise ValueError(f"Not a zip or tar archive: {F24archive}")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        parsed = (_parse_f24_bytes(data) for _, data in _iter_archive_members(F24archive))
+        results = list(tqdm(parsed) if show_progress else parsed)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            if is_path and zipfile.is_zipfile(F24archive):
+                with zipfile.ZipFile(F24archive) as zf:
+                    names = [info.filename for info in zf.infolist()
+                             if not info.is_dir() and _is_f24_member(info.filename)]
+                futures = [executor.submit(_parse_zip_member, F24archive, name) for name in names]
+            else:
+                futures = [executor.submit(_parse_f24_bytes, data)
+                           for _, data in _iter_archive_members(F24archive)]
+            iterator = tqdm(futures) if show_progress else futures
+            results = [future.result() for future in iterator]
+
+    if not results:
+        raise ValueError("No F24 XML files found in the archive")
+    games_list = [game_meta for game_meta, _ in results]
+    events_list = [event for _, game_events in results for event in game_events]
+    return _build_events_frame(games_list, events_list, interner=interner)
+
 def parsef24_csv(F24file):
     """
     Parse a single already processed CSV file.
@@ -360,20 +549,139 @@ def get_game_summary(df):
     Returns:
     --------
     pandas.DataFrame
-        Summary statistics by game
+        One row per game with game_id, home_team, away_team, total_events,
+        unique_event_types and one count column per event name; games with
+        missing team names are kept, with NaN names
     """
-    summary = df.groupby(['game_id', 'home_team_name', 'away_team_name']).agg({
-        'id': 'count',
-        'type_id': 'nunique',
-        'event_name': lambda x: x.value_counts().to_dict()
-    }).reset_index()
-    
-    summary.columns = ['game_id', 'home_team', 'away_team', 'total_events', 'unique_event_types', 'event_breakdown']
-    
-    return summary
+    games = (df[['game_id', 'home_team_name', 'away_team_name']]
+             .drop_duplicates('game_id')
+             .rename(columns={'home_team_name': 'home_team', 'away_team_name': 'away_team'})
+             .set_index('game_id')
+             .sort_index())
+
+    # Game x event-type counts in one grouped count
+    breakdown = df.groupby(['game_id', 'event_name']).size().unstack(fill_value=0)
+    breakdown.columns.name = None
+
+    summary = games.join(breakdown, how='inner')
+    summary.insert(2, 'total_events', breakdown.sum(axis=1).reindex(summary.index))
+    summary.insert(3, 'unique_event_types', df.groupby('game_id')['type_id'].nunique().reindex(summary.index))
+
+    return summary.reset_index()
+
+
+# Event types that describe the team or the match rather than a player
+TEAM_EVENT_IDS = {24, 25, 27, 28, 30, 32, 34, 37, 40}
+
 
+def _lineup_players(qualifiers, lineup_size=11):
+    """Starting players of a team set up (type 34) event, from its Involved qualifier."""
+    for qualifier in qualifiers:
+        if str(qualifier.get('qualifier_id')) == '30':
+            players = [p.strip() for p in str(qualifier.get('value') or '').split(',') if p.strip()]
+            return players[:lineup_size]
+    return []
 
-def calculate_player_playtime(match_events, min_playtime=30, clip_to_90=True, from_processed=False):
+
+def get_data_quality_report(df, lineup_size=11, raise_on_error=False, interner=None):
+    """
+    Check parsed F24 events for problems that would distort TVI results.
+
+    All per-event checks are computed as flag columns and summed in a single
+    grouped pass per game; lineup and substitution consistency is checked on the
+    (few) team set up and substitution events.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        DataFrame containing match events, as returned by parsef24_folder
+    lineup_size : int, optional
+        Number of starting players expected per team (default: 11)
+    raise_on_error : bool, optional
+        Raise a ValueError naming the failing games instead of returning (default: False)
+    interner : IDInterner, optional
+        The interner df was encoded with (e.g. parsef24_folder(..., interner=...)).
+        Lineup player IDs are interned with it so they compare with the coded
+        substitutions, and the report's game_id holds the original IDs
+
+    Returns:
+    --------
+    pandas.DataFrame
+        One row per game with the counts:
+        - total_events
+        - missing_coordinates: events with a missing x or y
+        - events_without_player: player events (not in TEAM_EVENT_IDS) with no player_id
+        - unknown_type_ids: events whose type_id is not in TYPES_DICT
+        - lineups: team set up events (2 expected)
+        - short_lineups: lineups with fewer than lineup_size players
+        - sub_ons, sub_offs: substitution events
+        - unbalanced_substitutions: per team, |sub_ons - sub_offs| summed
+        - sub_on_already_on_pitch: players coming on who started the game
+        - sub_off_not_on_pitch: players going off who neither started nor came on before
+        - issues: sum of the problem counts, and passed: issues == 0
+    """
+    if interner is None and 'player_id' in interned_columns(df):
+        raise ValueError("df holds interned player IDs; pass the interner it was encoded with")
+
+    type_ids = df['type_id']
+    flags = pd.DataFrame({
+        'game_id': df['game_id'],
+        'total_events': 1,
+        'missing_coordinates': df['x'].isna() | df['y'].isna(),
+        'events_without_player': df['player_id'].isna() & ~type_ids.isin(TEAM_EVENT_IDS),
+        'unknown_type_ids': ~type_ids.isin(TYPES_DICT.keys()),
+        'lineups': type_ids == 34,
+        'sub_ons': type_ids == 19,
+        'sub_offs': type_ids == 18,
+    })
+    report = flags.groupby('game_id').sum().astype(int)
+
+    # Lineup / substitution consistency
+    structural = df.loc[type_ids.isin([34, 19, 18]), ['game_id', 'team_id', 'type_id', 'player_id', 'min', 'qualifiers']]
+    consistency = {}
+    for (game_id, team_id), team_events in structural.groupby(['game_id', 'team_id'], sort=False):
+        counts = consistency.setdefault(game_id, {'short_lineups': 0, 'unbalanced_substitutions': 0,
+                                                  'sub_on_already_on_pitch': 0, 'sub_off_not_on_pitch': 0})
+        starters = set()
+        for qualifiers in team_events.loc[team_events['type_id'] == 34, 'qualifiers']:
+            players = _lineup_players(qualifiers, lineup_size)
+            counts['short_lineups'] += len(players) < lineup_size
+            if interner is not None:
+                # Lineups list players inside a qualifier, so they are interned here
+                players = interner.encode(players, 'player').tolist()
+            starters.update(players)
+        ons = team_events[team_events['type_id'] == 19]
+        offs = team_events[team_events['type_id'] == 18]
+        counts['unbalanced_substitutions'] += abs(len(ons) - len(offs))
+        counts['sub_on_already_on_pitch'] += int(ons['player_id'].isin(starters).sum())
+        for player_id, minute in zip(offs['player_id'], offs['min']):
+            came_on = ((ons['player_id'] == player_id) & (ons['min'] <= minute)).any()
+            counts['sub_off_not_on_pitch'] += player_id not in starters and not came_on
+
+    consistency_cols = ['short_lineups', 'unbalanced_substitutions', 'sub_on_already_on_pitch', 'sub_off_not_on_pitch']
+    consistency = pd.DataFrame.from_dict(consistency, orient='index', columns=consistency_cols)
+    report = report.join(consistency).fillna({col: 0 for col in consistency_cols})
+    report[consistency_cols] = report[consistency_cols].astype(int)
+
+    problem_cols = ['missing_coordinates', 'events_without_player', 'unknown_type_ids', 'short_lineups',
+                    'unbalanced_substitutions', 'sub_on_already_on_pitch', 'sub_off_not_on_pitch']
+    report['issues'] = report[problem_cols].sum(axis=1) + (report['lineups'] != 2)
+    report['passed'] = report['issues'] == 0
+    report = report[['total_events'] + problem_cols[:3] + ['lineups', 'short_lineups', 'sub_ons', 'sub_offs']
+                    + problem_cols[4:] + ['issues', 'passed']].reset_index()
+    if interner is not None:
+        report['game_id'] = interner.decode(report['game_id'].to_numpy(), 'game')
+        report = report.sort_values('game_id', ignore_index=True)
+
+    if raise_on_error and not report['passed'].all():
+        failing = report.loc[~report['passed'], 'game_id'].tolist()
+        raise ValueError(f"Data quality check failed for {len(failing)} games: {failing}")
+
+    return report
+
+
+def calculate_player_playtime(match_events, min_playtime=30, clip_to_90=True, from_processed=False,
+                              interner=None):
     """
     Calculate playtime for each player in each game.
     
@@ -388,6 +696,10 @@ def calculate_player_playtime(match_events, min_playtime=30, clip_to_90=True, fr
         Minimum playtime threshold in minutes (default: 30)
         Players with less playtime will be filtered out
         Set to 0 to include all players
+    interner : IDInterner, optional
+        The interner match_events was encoded with (e.g. parsef24_folder(..., interner=...)).
+        Lineup player IDs are interned with it so they join the coded events;
+        the output then holds int32 codes too
         
     Returns:
     --------
@@ -401,24 +713,18 @@ def calculate_player_playtime(match_events, min_playtime=30, clip_to_90=True, fr
     player_off_id = 18       # Player off (substitution out)
     
     # Get starting eleven players
-    starting_eleven = explode_event(match_events, starting_eleven_id, 0, from_processed=from_processed)[['game_id', 'team_id', 'InvolvedPlayers', 'PlayerPosition']]
-    
-    if starting_eleven.empty:
+    if from_processed:
+        has_lineups = (match_events['event_name'] == TYPES_DICT.get(starting_eleven_id)).any()
+    else:
+        has_lineups = (match_events['type_id'] == starting_eleven_id).any()
+
+    if not has_lineups:
         # If no starting eleven data, return empty DataFrame
         return pd.DataFrame(columns=['game_id', 'team_id', 'player_id', 'play_time'])
+    starting_eleven = explode_event(match_events, starting_eleven_id, 0, from_processed=from_processed)[['game_id', 'team_id', 'InvolvedPlayers', 'PlayerPosition']]
     
     def get_player_position(position_key: str):
-        match position_key:
-            case "1":
-                return "Goalkeeper"
-            case "2":
-                return "Defender"
-            case "3":
-                return "Midfielder"
-            case "4":
-                return "Forward"
-            case _:
-                return None
+        return POSITIONS_DICT.get(position_key)
 
     # Get only first 11 players involved and clean the data
     starting_eleven['InvolvedPlayers'] = starting_eleven['InvolvedPlayers'].str.split(',').str[:11]\
@@ -430,6 +736,9 @@ def calculate_player_playtime(match_events, min_playtime=30, clip_to_90=True, fr
     starting_eleven = starting_eleven.explode(["InvolvedPlayers", "PlayerPosition"])
     starting_eleven = starting_eleven.reset_index(drop=True)\
       .rename(columns={'InvolvedPlayers': 'player_id', "PlayerPosition": "position"})
+    if interner is not None:
+        # Lineups list players inside a qualifier, so they are interned here
+        starting_eleven['player_id'] = interner.encode(starting_eleven['player_id'], 'player')
     starting_eleven['start_time'] = 0
     
     # Get substitution events
@@ -437,10 +746,11 @@ def calculate_player_playtime(match_events, min_playtime=30, clip_to_90=True, fr
         # If already processed, use 'event_name' for substitutions
         sub_ons = match_events[match_events['event_name'] == 'SubstitutionOn']\
           .rename(columns={'minute': 'start_time'}).reset_index(drop=True)
-        sub_ons['player_id'] = sub_ons['player_id'].astype(int).astype(str)
         sub_offs = match_events[match_events['event_name'] == 'SubstitutionOff'][['game_id', 'team_id', 'player_id', 'minute']]\
           .rename(columns={'minute': 'end_time'}).reset_index(drop=True)
-        sub_offs['player_id'] = sub_offs['player_id'].astype(int).astype(str)
+        if interner is None:
+            sub_ons['player_id'] = sub_ons['player_id'].astype(int).astype(str)
+            sub_offs['player_id'] = sub_offs['player_id'].astype(int).astype(str)
     else:
         # If not processed, use type_id for substitutions
         sub_ons = match_events[match_events['type_id'] == player_on_id]\
@@ -448,12 +758,16 @@ def calculate_player_playtime(match_events, min_playtime=30, clip_to_90=True, fr
         sub_offs = match_events[match_events['type_id'] == player_off_id][['game_id', 'team_id', 'player_id', 'min']]\
         .rename(columns={'min': 'end_time'}).reset_index(drop=True)
     
-    # get player position from substitution events
-    sub_ons = explode_event(sub_ons, player_on_id, 0, from_processed=from_processed)[['game_id', 'team_id', 'player_id', 'start_time', 'PlayerPosition']]\
-        .rename(columns={'PlayerPosition': 'position'})
-    
-    # Combine starting eleven and substitutions
-    play_time = pd.concat([starting_eleven, sub_ons], axis=0)
+    # get player position from substitution events (a game without substitutions
+    # only has its starters)
+    if sub_ons.empty:
+        play_time = starting_eleven
+    else:
+        sub_ons = explode_event(sub_ons, player_on_id, 0, from_processed=from_processed)[['game_id', 'team_id', 'player_id', 'start_time', 'PlayerPosition']]\
+            .rename(columns={'PlayerPosition': 'position'})
+
+        # Combine starting eleven and substitutions
+        play_time = pd.concat([starting_eleven, sub_ons], axis=0)
     play_time = pd.merge(play_time, sub_offs, on=['game_id', 'team_id', 'player_id'], how='left')
     
     # Fill missing end times with 90 minutes (full game)
@@ -472,11 +786,30 @@ def calculate_player_playtime(match_events, min_playtime=30, clip_to_90=True, fr
     # Filter by minimum playtime threshold
     if min_playtime > 0:
         play_time = play_time[play_time['play_time'] >= min_playtime]
-    
-    return play_time.reset_index(drop=True)
 
+    play_time = play_time.reset_index(drop=True)
+    if interner is not None:
+        mark_interned(play_time, ['game_id', 'team_id', 'player_id'])
+    return play_time
 
-def get_interceptions(match_events, successful_only=True, include_coordinates=True, from_processed=False):
+
+def _action_columns(include_coordinates=True, extra_columns=None):
+    """Columns returned by the get_* extractors."""
+    columns = ['game_id', 'team_id', 'player_id', 'event_name']
+    if include_coordinates:
+        columns.extend(['x', 'y'])
+    if extra_columns:
+        columns.extend(col for col in extra_columns if col not in columns)
+    return columns
+
+
+def _empty_actions(include_coordinates=True, extra_columns=None):
+    """Empty action DataFrame with the columns every get_* extractor returns."""
+    return pd.DataFrame(columns=_action_columns(include_coordinates, extra_columns))
+
+
+def get_interceptions(match_events, successful_only=True, include_coordinates=True, from_processed=False,
+                      extra_columns=None):
     """
     Get interception actions for all players.
     
@@ -488,6 +821,8 @@ def get_interceptions(match_events, successful_only=True, include_coordinates=Tr
         Whether to include only successful interceptions (default: True)
     include_coordinates : bool, optional
         Whether to include x,y coordinates (default: True)
+    extra_columns : list, optional
+        Further columns of match_events to keep, e.g. ['min', 'sec'] (default: None)
         
     Returns:
     --------
@@ -503,9 +838,7 @@ def get_interceptions(match_events, successful_only=True, include_coordinates=Tr
         interceptions = match_events[match_events['type_id'] == interception_id]
     
     if interceptions.empty:
-        columns = ['game_id', 'team_id', 'player_id', 'event_name']
-        if include_coordinates:
-            columns.extend(['x', 'y'])
+        columns = _action_columns(include_coordinates, extra_columns)
         return pd.DataFrame(columns=columns)
     
     # Filter for successful actions if requested
@@ -516,14 +849,13 @@ def get_interceptions(match_events, successful_only=True, include_coordinates=Tr
             interceptions = interceptions[interceptions['outcome'] == 1]
     
     # Select relevant columns
-    columns = ['game_id', 'team_id', 'player_id', 'event_name']
-    if include_coordinates:
-        columns.extend(['x', 'y'])
+    columns = _action_columns(include_coordinates, extra_columns)
     
     return interceptions[columns].reset_index(drop=True)
 
 
-def get_tackles(match_events, successful_only=True, include_coordinates=True, from_processed=False):
+def get_tackles(match_events, successful_only=True, include_coordinates=True, from_processed=False,
+                extra_columns=None):
     """
     Get tackle actions for all players.
     
@@ -535,6 +867,8 @@ def get_tackles(match_events, successful_only=True, include_coordinates=True, fr
         Whether to include only successful tackles (default: True)
     include_coordinates : bool, optional
         Whether to include x,y coordinates (default: True)
+    extra_columns : list, optional
+        Further columns of match_events to keep, e.g. ['min', 'sec'] (default: None)
         
     Returns:
     --------
@@ -552,9 +886,7 @@ def get_tackles(match_events, successful_only=True, include_coordinates=True, fr
         tackles = match_events[match_events['type_id'] == tackle_id]
     
     if tackles.empty:
-        columns = ['game_id', 'team_id', 'player_id', 'event_name']
-        if include_coordinates:
-            columns.extend(['x', 'y'])
+        columns = _action_columns(include_coordinates, extra_columns)
         return pd.DataFrame(columns=columns)
     
     # Filter for successful actions if requested
@@ -565,14 +897,13 @@ def get_tackles(match_events, successful_only=True, include_coordinates=True, fr
             tackles = tackles[tackles['outcome'] == 1]
     
     # Select relevant columns
-    columns = ['game_id', 'team_id', 'player_id', 'event_name']
-    if include_coordinates:
-        columns.extend(['x', 'y'])
+    columns = _action_columns(include_coordinates, extra_columns)
     
     return tackles[columns].reset_index(drop=True)
 
 
-def get_aerials(match_events, successful_only=True, include_coordinates=True, from_processed=False):
+def get_aerials(match_events, successful_only=True, include_coordinates=True, from_processed=False,
+                extra_columns=None):
     """
     Get aerial duel actions for all players.
     
@@ -584,6 +915,8 @@ def get_aerials(match_events, successful_only=True, include_coordinates=True, fr
         Whether to include only successful aerials (default: True)
     include_coordinates : bool, optional
         Whether to include x,y coordinates (default: True)
+    extra_columns : list, optional
+        Further columns of match_events to keep, e.g. ['min', 'sec'] (default: None)
         
     Returns:
     --------
@@ -599,9 +932,7 @@ def get_aerials(match_events, successful_only=True, include_coordinates=True, fr
         aerials = match_events[match_events['type_id'] == aerial_id]
     
     if aerials.empty:
-        columns = ['game_id', 'team_id', 'player_id', 'event_name']
-        if include_coordinates:
-            columns.extend(['x', 'y'])
+        columns = _action_columns(include_coordinates, extra_columns)
         return pd.DataFrame(columns=columns)
     
     # Filter for successful actions if requested
@@ -612,13 +943,12 @@ def get_aerials(match_events, successful_only=True, include_coordinates=True, fr
             aerials = aerials[aerials['outcome'] == 1]
     
     # Select relevant columns
-    columns = ['game_id', 'team_id', 'player_id', 'event_name']
-    if include_coordinates:
-        columns.extend(['x', 'y'])
+    columns = _action_columns(include_coordinates, extra_columns)
     
     return aerials[columns].reset_index(drop=True)
 
-def get_dribbles(match_events, successful_only=True, include_coordinates=True, from_processed=False):
+def get_dribbles(match_events, successful_only=True, include_coordinates=True, from_processed=False,
+                 extra_columns=None):
     """
     Get dribble (take on) actions for all players.
 
@@ -630,6 +960,8 @@ def get_dribbles(match_events, successful_only=True, include_coordinates=True, f
         Whether to include only successful dribbles (default: True).
     include_coordinates : bool, optional
         Whether to include x, y coordinates (default: True).
+    extra_columns : list, optional
+        Further columns of match_events to keep, e.g. ['min', 'sec'] (default: None)
 
     Returns
     -------
@@ -654,12 +986,11 @@ def get_dribbles(match_events, successful_only=True, include_coordinates=True, f
             dribbles = dribbles[dribbles['outcome'] == 1]
     dribbles = dribbles.copy()
     dribbles['event_name'] = 'dribble'
-    columns = ['game_id', 'team_id', 'player_id', 'event_name']
-    if include_coordinates:
-        columns.extend(['x', 'y'])
+    columns = _action_columns(include_coordinates, extra_columns)
     return dribbles[columns].reset_index(drop=True)
 
-def get_shots_on_target(match_events, include_coordinates=True, from_processed=False):
+def get_shots_on_target(match_events, include_coordinates=True, from_processed=False,
+                        extra_columns=None):
     """
     Extracts shots on target from a DataFrame of match events.
 
@@ -671,6 +1002,8 @@ def get_shots_on_target(match_events, include_coordinates=True, from_processed=F
         DataFrame containing match event data.
     include_coordinates : bool, optional
         If True, includes the shot coordinates ('x', 'y') in the output. Default is True.
+    extra_columns : list, optional
+        Further columns of match_events to keep, e.g. ['min', 'sec'] (default: None)
 
     Returns
     -------
@@ -691,18 +1024,23 @@ def get_shots_on_target(match_events, include_coordinates=True, from_processed=F
     else:
         shots_saved = match_events[match_events['type_id'] == shots_saved_id]
         goals = match_events[match_events['type_id'] == goals_id]
-    shots_saved = explode_event(shots_saved, shots_saved_id, 0, from_processed=from_processed)
-    shots_saved = shots_saved[shots_saved['Blocked'] != 'yes']
+    if not shots_saved.empty:
+        shots_saved = explode_event(shots_saved, shots_saved_id, 0, from_processed=from_processed)
+        if 'Blocked' in shots_saved.columns:
+            shots_saved = shots_saved[shots_saved['Blocked'] != 'yes']
+    columns = ['game_id', 'team_id', 'player_id', 'x', 'y'] + \
+        [col for col in (extra_columns or []) if col not in ('game_id', 'team_id', 'player_id', 'x', 'y')]
     shots_on_target = pd.concat([
-        shots_saved[['game_id', 'team_id', 'player_id', 'x', 'y']],
-        goals[['game_id', 'team_id', 'player_id', 'x', 'y']]
+        shots_saved[columns],
+        goals[columns]
     ])
     shots_on_target['event_name'] = 'shots_on_target'
     if not include_coordinates:
         shots_on_target = shots_on_target.drop(columns=['x', 'y'])
     return shots_on_target.reset_index(drop=True)
 
-def get_key_passes(match_events, successful_only=True, include_coordinates=True, from_processed=False):
+def get_key_passes(match_events, successful_only=True, include_coordinates=True, from_processed=False,
+                   extra_columns=None):
     """
     Extracts key passes from a DataFrame of match events.
 
@@ -716,6 +1054,8 @@ def get_key_passes(match_events, successful_only=True, include_coordinates=True,
         If True, only considers successful passes. Default is True.
     include_coordinates : bool, optional
         If True, includes the starting coordinates ('x', 'y') of the pass in the output. Default is True.
+    extra_columns : list, optional
+        Further columns of match_events to keep, e.g. ['min', 'sec'] (default: None)
 
     Returns
     -------
@@ -736,23 +1076,77 @@ def get_key_passes(match_events, successful_only=True, include_coordinates=True,
     if successful_only:
         if from_processed:
             passes_df = passes_df[passes_df['outcome_type'] == 'Successful']
-            key_passes = explode_event(passes_df, pass_id, 0, from_processed=from_processed)
-            key_passes = key_passes[key_passes['KeyPass'] == 'yes']
         else:
             passes_df = passes_df[passes_df['outcome'] == 1]
-            key_passes = passes_df[~passes_df['keypass'].isna()]
+    if from_processed:
+        if passes_df.empty:
+            return _empty_actions(include_coordinates, extra_columns)
+        key_passes = explode_event(passes_df, pass_id, 0, from_processed=from_processed)
+        key_passes = key_passes[key_passes['KeyPass'] == 'yes'] if 'KeyPass' in key_passes.columns \
+            else key_passes.iloc[0:0]
+    elif 'keypass' in passes_df.columns:
+        key_passes = passes_df[~passes_df['keypass'].isna()]
+    else:
+        # No pass in the data carries the keypass attribute
+        return _empty_actions(include_coordinates, extra_columns)
+    key_passes = key_passes.copy()
     key_passes['event_name'] = 'key_pass'
-    columns = ['game_id', 'team_id', 'player_id', 'event_name']
-    if include_coordinates:
-        columns.extend(['x', 'y'])
+    columns = _action_columns(include_coordinates, extra_columns)
     return key_passes[columns].reset_index(drop=True)
 
+def explode_passes(match_events, successful_only=True, from_processed=False):
+    """
+    Explode pass qualifiers and add the pass geometry used by the pass extractors.
+
+    get_deep_completions and get_progressive_passes both start from this table;
+    computing it once and passing it as `passes_exploded` lets them share it.
+
+    Parameters:
+    -----------
+    match_events : pandas.DataFrame
+        DataFrame containing match events
+    successful_only : bool, optional
+        Only keep successful passes (default: True)
+    from_processed : bool, optional
+        Whether the DataFrame is already processed (default: False)
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Exploded passes with pass_end_x, pass_end_y, pass_progression, end_dist,
+        start_half and end_half columns (empty if there are no passes)
+    """
+    pass_id = 1
+    if from_processed:
+        passes_df = match_events[match_events['event_name'] == 'Pass']
+    else:
+        passes_df = match_events[(match_events['type_id'] == pass_id)]
+    if successful_only:
+        if from_processed:
+            passes_df = passes_df[passes_df['outcome_type'] == 'Successful']
+        else:
+            passes_df = passes_df[passes_df['outcome'] == 1]
+    if passes_df.empty:
+        return passes_df.iloc[0:0]
+    passes_exploded = explode_event(passes_df, pass_id, 0.15, from_processed=from_processed)
+    passes_exploded['pass_end_x'] = passes_exploded['PassEndX'].astype('float')
+    passes_exploded['pass_end_y'] = passes_exploded['PassEndY'].astype('float')
+    progression, end_dist, start_half, end_half = pass_length_array(
+        passes_exploded['x'], passes_exploded['y'], passes_exploded['pass_end_x'], passes_exploded['pass_end_y'])
+    passes_exploded['pass_progression'] = progression
+    passes_exploded['end_dist'] = end_dist
+    passes_exploded['start_half'] = start_half
+    passes_exploded['end_half'] = end_half
+    return passes_exploded
+
 def get_deep_completions(
     match_events,
     successful_only=True,
     length_deep_completion=20,
     include_coordinates=True,
-    from_processed=False
+    from_processed=False,
+    extra_columns=None,
+    passes_exploded=None
 ):
     """
     Extracts deep completions from a DataFrame of match events.
@@ -770,6 +1164,11 @@ def get_deep_completions(
         Maximum distance from goal for a pass to be considered a deep completion. Default is 20.
     include_coordinates : bool, optional
         If True, includes the starting coordinates ('x', 'y') of the pass in the output. Default is True.
+    extra_columns : list, optional
+        Further columns of match_events to keep, e.g. ['min', 'sec'] (default: None)
+    passes_exploded : pd.DataFrame, optional
+        Output of explode_passes() for the same events and successful_only, to reuse
+        it instead of exploding the passes again (default: None)
 
     Returns
     -------
@@ -782,29 +1181,17 @@ def get_deep_completions(
             - 'x', 'y' (if include_coordinates is True)
         The DataFrame is indexed from 0.
     """
-    pass_id = 1
-    if from_processed:
-        passes_df = match_events[match_events['event_name'] == 'Pass']
-    else:
-        passes_df = match_events[(match_events['type_id'] == pass_id)]
-    if successful_only:
-        if from_processed:
-            passes_df = passes_df[passes_df['outcome_type'] == 'Successful']
-        else:
-            passes_df = passes_df[passes_df['outcome'] == 1]
-    passes_exploded = explode_event(passes_df, pass_id, 0.15, from_processed=from_processed)
-    passes_exploded['pass_end_x'] = passes_exploded['PassEndX'].astype('float')
-    passes_exploded['pass_end_y'] = passes_exploded['PassEndY'].astype('float')
-    passes_exploded[['pass_progression', 'end_dist', 'start_half', 'end_half']] = passes_exploded.apply(
-        lambda row: pd.Series(pass_length(row['x'], row['y'], row['pass_end_x'], row['pass_end_y'])), axis=1)
-    deep_completion = passes_exploded[passes_exploded['end_dist'] < length_deep_completion]
+    if passes_exploded is None:
+        passes_exploded = explode_passes(match_events, successful_only, from_processed)
+    if passes_exploded.empty:
+        return _empty_actions(include_coordinates, extra_columns)
+    deep_completion = passes_exploded[passes_exploded['end_dist'] < length_deep_completion].copy()
     deep_completion['event_name'] = 'deep_completion'
-    columns = ['game_id', 'team_id', 'player_id', 'event_name']
-    if include_coordinates:
-        columns.extend(['x', 'y'])
+    columns = _action_columns(include_coordinates, extra_columns)
     return deep_completion[columns].reset_index(drop=True)
 
-def get_progressive_passes(match_events, successful_only=True, length_threshold=[30, 15, 10], include_coordinates=True, from_processed=False):
+def get_progressive_passes(match_events, successful_only=True, length_threshold=[30, 15, 10], include_coordinates=True, from_processed=False,
+                           extra_columns=None, passes_exploded=None):
     """
     Extracts progressive passes from a DataFrame of match events.
 
@@ -820,6 +1207,9 @@ def get_progressive_passes(match_events, successful_only=True, length_threshold=
             - [2]: Attacking half to attacking half
             Defaults to [30, 15, 10].
         include_coordinates (bool, optional): If True, includes the starting coordinates ('x', 'y') of the pass in the output. Defaults to True.
+        extra_columns (list, optional): Further columns of match_events to keep, e.g. ['min', 'sec']. Defaults to None.
+        passes_exploded (pd.DataFrame, optional): Output of explode_passes() for the same events and successful_only,
+            reused instead of exploding the passes again. Defaults to None.
 
     Returns:
         pd.DataFrame: DataFrame containing progressive passes with columns:
@@ -831,32 +1221,61 @@ def get_progressive_passes(match_events, successful_only=True, length_threshold=
         The DataFrame is indexed from 0.
 
     Notes:
-        - Relies on helper functions `explode_event` and `pass_length` to process and calculate pass progression.
+        - Relies on `explode_passes` (`explode_event` and `pass_length_array`) to process and calculate pass progression.
         - Assumes the input DataFrame contains columns: 'type_id', 'outcome', 'Pass End X', 'Pass End Y', 'x', 'y', 'game_id', 'team_id', 'player_id'.
         - The function filters passes based on their progression distance and the halves of the pitch they start and end in.
     """
-    # function implementation...
-    pass_id = 1
-    if from_processed:
-        passes_df = match_events[match_events['event_name'] == 'Pass']
-    else:
-        passes_df = match_events[(match_events['type_id'] == pass_id)]
-    if successful_only:
-        if from_processed:
-            passes_df = passes_df[passes_df['outcome_type'] == 'Successful']
-        else:
-            passes_df = passes_df[passes_df['outcome'] == 1]
-    passes_exploded = explode_event(passes_df, pass_id, 0.15, from_processed=from_processed)
-    passes_exploded['pass_end_x'] = passes_exploded['PassEndX'].astype('float')
-    passes_exploded['pass_end_y'] = passes_exploded['PassEndY'].astype('float')
-    passes_exploded[['pass_progression', 'end_dist', 'start_half', 'end_half']] = passes_exploded.apply(
-        lambda row: pd.Series(pass_length(row['x'], row['y'], row['pass_end_x'], row['pass_end_y'])), axis=1)
+    if passes_exploded is None:
+        passes_exploded = explode_passes(match_events, successful_only, from_processed)
+    if passes_exploded.empty:
+        return _empty_actions(include_coordinates, extra_columns)
     progressive_passes = passes_exploded[
         ((passes_exploded['start_half'] == 'defensive half') & (passes_exploded['end_half'] == 'defensive half') & (passes_exploded['pass_progression'] > length_threshold[0])) |
         ((passes_exploded['start_half'] == 'defensive half') & (passes_exploded['end_half'] == 'attacking half') & (passes_exploded['pass_progression'] > length_threshold[1])) |
-        ((passes_exploded['start_half'] == 'attacking half') & (passes_exploded['end_half'] == 'attacking half') & (passes_exploded['pass_progression'] > length_threshold[2]))]
+        ((passes_exploded['start_half'] == 'attacking half') & (passes_exploded['end_half'] == 'attacking half') & (passes_exploded['pass_progression'] > length_threshold[2]))].copy()
     progressive_passes['event_name'] = 'progressive_pass'
-    columns = ['game_id', 'team_id', 'player_id', 'event_name']
-    if include_coordinates:
-        columns.extend(['x', 'y'])
-    return progressive_passes[columns].reset_index(drop=True)
\ No newline at end of file
+    columns = _action_columns(include_coordinates, extra_columns)
+    return progressive_passes[columns].reset_index(drop=True)
+
+def get_metric_events(match_events, from_processed=False, extra_columns=None):
+    """
+    Extract every action used by the TVI metric and combine them.
+
+    Runs the eight extractors with their default settings, as the examples do:
+    interceptions, tackles, aerials, progressive passes, dribbles, key passes,
+    deep completions and shots on target.
+
+    Parameters:
+    -----------
+    match_events : pandas.DataFrame
+        DataFrame containing match events
+    from_processed : bool, optional
+        Whether the DataFrame is already processed (default: False)
+    extra_columns : list, optional
+        Further columns of match_events to keep, e.g. ['min', 'sec'] (default: None)
+
+    Returns:
+    --------
+    pandas.DataFrame
+        DataFrame with columns game_id, team_id, player_id, event_name, x, y
+        (and extra_columns)
+    """
+    extractors = [
+        get_interceptions, get_tackles, get_aerials,
+        get_progressive_passes, get_dribbles,
+        get_key_passes, get_deep_completions, get_shots_on_target,
+    ]
+    # Progressive passes and deep completions share one exploded pass table
+    passes_exploded = explode_passes(match_events, from_processed=from_processed)
+    actions = []
+    for extractor in extractors:
+        kwargs = {'passes_exploded': passes_exploded} \
+            if extractor in (get_progressive_passes, get_deep_completions) else {}
+        actions.append(extractor(match_events, from_processed=from_processed, extra_columns=extra_columns, **kwargs))
+    actions = [df for df in actions if not df.empty]
+    if not actions:
+        return _empty_actions(extra_columns=extra_columns)
+    actions = pd.concat(actions, ignore_index=True)
+    # Interned ID columns stay codes
+    marked = [col for col in interned_columns(match_events) if col in actions.columns]
+    return mark_interned(actions, marked) if marked else actions
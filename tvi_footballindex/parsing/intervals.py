@@ -0,0 +1,379 @@
+"""
+On-pitch interval index
+
+Builds one [start, end) minute interval per player appearance from team set up
+(type 34), substitution (18/19) and card (17) events, and answers interval
+questions with array operations: which events happened while a player was on
+the pitch, how many minutes every pair of teammates shared, and how many
+minutes each player spent in each segment of a game.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+import pandas as pd
+
+from tvi_footballindex.parsing.f24_parser import POSITIONS_DICT
+
+
+_LINEUP_ID = 34
+_PLAYER_ON_ID = 19
+_PLAYER_OFF_ID = 18
+_CARD_ID = 17
+_SENDING_OFF_QUALIFIERS = ('32', '33')  # Second yellow, Red card
+_PERIOD_ENDS = np.array([45, 90, 105, 120], dtype=float)  # Nominal ends of periods 1-4
+_PRE_MATCH_PERIOD = 16
+
+
+def _clock_minutes(match_events):
+    minutes = match_events['min'].to_numpy(dtype=float)
+    if 'sec' in match_events.columns:
+        minutes = minutes + match_events['sec'].to_numpy(dtype=float) / 60
+    return minutes
+
+
+def period_offsets(match_events):
+    """
+    Minutes to add to each period's clock so that periods follow each other.
+
+    F24 restarts every period at its nominal start (45, 90, 105), so stoppage
+    time at the end of one period shares its minutes with the start of the next
+    (45+2 in period 1 and 47:00 in period 2 are both min=47). Each period is
+    shifted by the stoppage time played in the periods before it.
+
+    Parameters:
+    -----------
+    match_events : pandas.DataFrame
+        DataFrame with game_id, period_id, 'min' and, optionally, 'sec' columns
+
+    Returns:
+    --------
+    pandas.DataFrame
+        One row per game_id, one column per period 1-5 (5 also covers the other
+        periods after period 4, e.g. post-match)
+    """
+    minutes = _clock_minutes(match_events)
+    periods = match_events['period_id'].to_numpy()
+    in_play = np.isin(periods, (1, 2, 3, 4))
+    last = (pd.Series(minutes[in_play])
+            .groupby([match_events['game_id'].to_numpy()[in_play], periods[in_play]]).max()
+            .unstack()
+            .reindex(columns=[1, 2, 3, 4]))
+    stoppage = np.nan_to_num(np.clip(last.to_numpy(dtype=float) - _PERIOD_ENDS, 0, None))
+    offsets = np.hstack([np.zeros((len(last), 1)), np.cumsum(stoppage, axis=1)])
+    return pd.DataFrame(offsets, index=last.index, columns=[1, 2, 3, 4, 5])
+
+
+def event_minutes(match_events, offsets=None):
+    """
+    Match time of every event in minutes, including seconds (e.g. 45:30 -> 45.5).
+
+    With a 'period_id' column the clock is period-aware: every period is shifted
+    by the stoppage time before it (see period_offsets), so first-half stoppage
+    time comes before the second half and the clock increases through the match.
+
+    Parameters:
+    -----------
+    match_events : pandas.DataFrame
+        DataFrame with a 'min' column and, optionally, 'sec' and 'period_id' columns
+    offsets : pandas.DataFrame, optional
+        Output of period_offsets (default: period_offsets(match_events)); pass the
+        offsets of the full events when match_events is a subset, e.g. metric events
+
+    Returns:
+    --------
+    numpy.ndarray
+        Float minutes
+    """
+    minutes = _clock_minutes(match_events)
+    if 'period_id' not in match_events.columns:
+        return minutes
+    if offsets is None:
+        offsets = period_offsets(match_events)
+    if offsets.empty:
+        return minutes
+
+    periods = match_events['period_id'].to_numpy()
+    columns = np.where(np.isin(periods, (1, 2, 3, 4, 5)), periods,
+                       np.where((periods > 4) & (periods != _PRE_MATCH_PERIOD), 5, 1))
+    rows = offsets.index.get_indexer(match_events['game_id'])
+    shift = offsets.to_numpy()[np.clip(rows, 0, None), columns.astype(np.int64) - 1]
+    return minutes + np.where(rows >= 0, shift, 0.0)
+
+
+def _qualifier_values(qualifiers):
+    return {str(q.get('qualifier_id')): q.get('value') for q in qualifiers}
+
+
+class OnPitchIndex:
+    """
+    Interval index of player appearances.
+
+    Each row of `intervals` is one appearance: game_id, team_id, player_id,
+    position, start and end (minutes on the event_minutes clock, end exclusive).
+    Starters start at 0; a player ends at his substitution or sending-off,
+    otherwise at the end of the game (the last event of the game, or
+    `end_minute` if given).
+
+    Parameters:
+    -----------
+    intervals : pandas.DataFrame
+        Appearance intervals with the columns above; usually built with from_events
+    offsets : pandas.DataFrame, optional
+        period_offsets of the events the intervals were built from; event
+        queries put their events on the same match clock (see event_minutes)
+
+    Example:
+    --------
+    >>> index = OnPitchIndex.from_events(events_df)
+    >>> events_df['on_pitch'] = index.contains(events_df)
+    >>> shared = index.teammate_overlap()
+    >>> per_block = index.segment_minutes(np.arange(0, 91, 15))
+    """
+
+    def __init__(self, intervals, offsets=None):
+        missing = [col for col in ['game_id', 'team_id', 'player_id', 'start', 'end'] if col not in intervals.columns]
+        if missing:
+            raise KeyError(f"Missing columns in intervals: {missing}")
+        self.intervals = intervals.sort_values(['game_id', 'team_id', 'player_id', 'start']).reset_index(drop=True)
+
+        # Integer key per (game, team, player), intervals sorted by key then start
+        self._key_index = pd.MultiIndex.from_frame(self.intervals[['game_id', 'team_id', 'player_id']]).unique()
+        self._keys = self._key_index.get_indexer(
+            pd.MultiIndex.from_frame(self.intervals[['game_id', 'team_id', 'player_id']])
+        ).astype(np.int64)
+        self._starts = self.intervals['start'].to_numpy(dtype=float)
+        self._ends = self.intervals['end'].to_numpy(dtype=float)
+        self._span = float(max(self._ends.max(initial=0), self._starts.max(initial=0))) + 1
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __repr__(self):
+        return f"OnPitchIndex({len(self)} intervals, {self.intervals['game_id'].nunique()} games)"
+
+    @classmethod
+    def from_events(cls, match_events, end_minute=None, interner=None):
+        """
+        Build the index from parsed F24 events.
+
+        Parameters:
+        -----------
+        match_events : pandas.DataFrame
+            DataFrame containing match events, as returned by parsef24_folder
+        end_minute : float, optional
+            Minute at which every game ends (default: each game's last event)
+        interner : IDInterner, optional
+            The interner match_events was encoded with, if any; lineup player IDs
+            are interned with it
+
+        Returns:
+        --------
+        OnPitchIndex
+        """
+        offsets = period_offsets(match_events) if 'period_id' in match_events.columns else None
+        minutes = event_minutes(match_events, offsets)
+        games = match_events['game_id'].to_numpy()
+        if end_minute is None:
+            game_end = pd.Series(minutes).groupby(games).max()
+        else:
+            game_end = pd.Series(float(end_minute), index=pd.unique(games))
+
+        type_ids = match_events['type_id'].to_numpy()
+        rows = []
+
+        # Starters (a handful of lineup events per game, so a plain loop is cheap)
+        lineups = match_events.loc[type_ids == _LINEUP_ID, ['game_id', 'team_id', 'qualifiers']]
+        for game_id, team_id, qualifiers in lineups.itertuples(index=False):
+            values = _qualifier_values(qualifiers)
+            players = [p.strip() for p in str(values.get('30') or '').split(',') if p.strip()][:11]
+            positions = [POSITIONS_DICT.get(p.strip()) for p in str(values.get('44') or '').split(',')][:11]
+            positions += [None] * (len(players) - len(positions))
+            rows.extend((game_id, team_id, player_id, position, 0.0)
+                        for player_id, position in zip(players, positions))
+        starters = pd.DataFrame(rows, columns=['game_id', 'team_id', 'player_id', 'position', 'start'])
+        if interner is not None and not starters.empty:
+            starters['player_id'] = interner.encode(starters['player_id'], 'player')
+
+        # Substitutes
+        on_mask = type_ids == _PLAYER_ON_ID
+        subs = match_events.loc[on_mask, ['game_id', 'team_id', 'player_id']].copy()
+        subs['position'] = [_qualifier_values(q).get('44') for q in match_events.loc[on_mask, 'qualifiers']]
+        subs['start'] = minutes[on_mask]
+
+        appearances = pd.concat([starters, subs], ignore_index=True)
+        if not starters.empty and not subs.empty:
+            appearances['player_id'] = appearances['player_id'].astype(subs['player_id'].dtype)
+
+        # Exits: substitutions off and sending-offs
+        off_mask = type_ids == _PLAYER_OFF_ID
+        card_mask = type_ids == _CARD_ID
+        if card_mask.any():
+            card_qualifiers = match_events.loc[card_mask, 'qualifiers']
+            sent_off = np.array([any(k in _SENDING_OFF_QUALIFIERS for k in _qualifier_values(q))
+                                 for q in card_qualifiers], dtype=bool)
+            card_mask[np.flatnonzero(card_mask)[~sent_off]] = False
+        exit_mask = off_mask | card_mask
+        exits = match_events.loc[exit_mask, ['game_id', 'team_id', 'player_id']].copy()
+        exits['exit'] = minutes[exit_mask]
+
+        # Each appearance ends at the first exit at or after its start
+        appearances = appearances.reset_index(drop=True)
+        appearances['end'] = appearances['game_id'].map(game_end).to_numpy(dtype=float)
+        if not exits.empty:
+            merged = appearances.reset_index().merge(exits, on=['game_id', 'team_id', 'player_id'], how='inner')
+            merged = merged[merged['exit'] >= merged['start']]
+            first_exit = merged.groupby('index')['exit'].min()
+            appearances.loc[first_exit.index, 'end'] = first_exit.to_numpy()
+        appearances['end'] = np.maximum(appearances['end'], appearances['start'])
+
+        return cls(appearances[['game_id', 'team_id', 'player_id', 'position', 'start', 'end']], offsets=offsets)
+
+    # Queries --------------------------------------------------------------------------------
+
+    def _lookup(self, keys, minutes):
+        """Index of the interval of (key, minute), or -1 when none contains it."""
+        sort_values = self._keys * self._span + self._starts
+        order = np.argsort(sort_values, kind='stable')
+        positions = np.searchsorted(sort_values[order], keys * self._span + minutes, side='right') - 1
+        candidate = order[np.clip(positions, 0, None)]
+        hit = ((positions >= 0) & (keys >= 0) & (self._keys[candidate] == keys)
+               & (minutes >= self._starts[candidate]) & (minutes < self._ends[candidate]))
+        # An event in the very last minute of a game still belongs to the player on the pitch
+        at_end = ((positions >= 0) & (keys >= 0) & (self._keys[candidate] == keys)
+                  & (minutes == self._ends[candidate]))
+        return np.where(hit | at_end, candidate, -1)
+
+    def contains(self, events_df, game_id_col='game_id', team_id_col='team_id', player_id_col='player_id',
+                 minutes=None):
+        """
+        Point-in-interval test: was each event's player on the pitch at its minute?
+
+        Parameters:
+        -----------
+        events_df : pandas.DataFrame
+            Events with game, team and player columns and 'min' (and 'sec')
+        minutes : array-like, optional
+            Event minutes to use instead of event_minutes(events_df)
+
+        Returns:
+        --------
+        numpy.ndarray
+            Boolean per event; False for events without a player
+        """
+        keys = self._key_index.get_indexer(
+            pd.MultiIndex.from_frame(events_df[[game_id_col, team_id_col, player_id_col]])
+        ).astype(np.int64)
+        minutes = event_minutes(events_df, self.offsets) if minutes is None else np.asarray(minutes, dtype=float)
+        return self._lookup(keys, minutes) >= 0
+
+    def players_on_pitch(self, game_id, minute):
+        """
+        Intervals of the players on the pitch in a game at a given minute.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            Rows of `intervals`
+        """
+        games = self.intervals['game_id'].to_numpy()
+        mask = (games == game_id) & (self._starts <= minute) & (minute < self._ends)
+        return self.intervals[mask]
+
+    def events_during(self, events_df, player_id, game_id_col='game_id', player_id_col='player_id'):
+        """
+        All events (of either team) that happened while a player was on the pitch.
+
+        Parameters:
+        -----------
+        events_df : pandas.DataFrame
+            Events with a game column and 'min' (and 'sec')
+        player_id : scalar
+            Player whose time on the pitch is used
+
+        Returns:
+        --------
+        pandas.DataFrame
+            Subset of events_df
+        """
+        own = self.intervals[self.intervals['player_id'] == player_id]
+        if own.empty:
+            return events_df.iloc[:0]
+        # Players have at most a few appearances, so intervals x events is a small broadcast per game
+        game_codes = pd.Index(own['game_id'].unique())
+        event_games = game_codes.get_indexer(events_df[game_id_col])
+        interval_games = game_codes.get_indexer(own['game_id'])
+        minutes = event_minutes(events_df, self.offsets)
+        inside = ((event_games[:, None] == interval_games[None, :])
+                  & (minutes[:, None] >= own['start'].to_numpy()[None, :])
+                  & (minutes[:, None] <= own['end'].to_numpy()[None, :]))
+        return events_df[inside.any(axis=1)]
+
+    def teammate_overlap(self, min_minutes=0):
+        """
+        Minutes every pair of teammates spent on the pitch together, per game.
+
+        Parameters:
+        -----------
+        min_minutes : float, optional
+            Leave out pairs that shared fewer minutes (default: 0 keeps all pairs)
+
+        Returns:
+        --------
+        pandas.DataFrame
+            Columns: game_id, team_id, player_a, player_b, shared_minutes
+            (each unordered pair once)
+        """
+        left = self.intervals[['game_id', 'team_id', 'player_id', 'start', 'end']].copy()
+        left['code'] = self._keys
+        pairs = left.merge(left, on=['game_id', 'team_id'], suffixes=('_a', '_b'))
+        pairs = pairs[pairs['code_a'] < pairs['code_b']]
+        shared = (np.minimum(pairs['end_a'], pairs['end_b']) - np.maximum(pairs['start_a'], pairs['start_b']))
+        pairs = pairs.assign(shared_minutes=np.clip(shared.to_numpy(), 0, None))
+        result = (pairs.groupby(['game_id', 'team_id', 'player_id_a', 'player_id_b'], sort=False)['shared_minutes']
+                  .sum().reset_index()
+                  .rename(columns={'player_id_a': 'player_a', 'player_id_b': 'player_b'}))
+        return result[result['shared_minutes'] >= min_minutes].reset_index(drop=True) if min_minutes else result
+
+    def segment_minutes(self, bounds, labels=None):
+        """
+        Minutes each appearance spent in each game segment.
+
+        Parameters:
+        -----------
+        bounds : array-like
+            Segment edges in minutes, e.g. [0, 15, 30, 45, 60, 75, 90]; the last
+            segment also collects stoppage time beyond the last edge
+        labels : list, optional
+            Segment names (default: '0-15', '15-30', ...)
+
+        Returns:
+        --------
+        pandas.DataFrame
+            Long table with game_id, team_id, player_id, position, segment, minutes
+            (segments a player didn't play in are left out)
+        """
+        bounds = np.asarray(bounds, dtype=float)
+        if bounds.ndim != 1 or len(bounds) < 2 or np.any(np.diff(bounds) <= 0):
+            raise ValueError("bounds must be an increasing sequence of at least two minutes")
+        if labels is None:
+            labels = [f"{int(a)}-{int(b)}" for a, b in zip(bounds[:-1], bounds[1:])]
+        if len(labels) != len(bounds) - 1:
+            raise ValueError(f"Expected {len(bounds) - 1} labels, got {len(labels)}")
+
+        seg_start = bounds[:-1].copy()
+        seg_end = bounds[1:].copy()
+        seg_end[-1] = np.inf
+        # (intervals x segments) overlap in one broadcast
+        overlap = (np.minimum(self._ends[:, None], seg_end[None, :])
+                   - np.maximum(self._starts[:, None], seg_start[None, :]))
+        overlap = np.clip(overlap, 0, None)
+        rows, segments = np.nonzero(overlap > 0)
+
+        result = self.intervals.iloc[rows][['game_id', 'team_id', 'player_id', 'position']].reset_index(drop=True)
+        result['segment'] = np.asarray(labels, dtype=object)[segments]
+        result['minutes'] = overlap[rows, segments]
+        return (result.groupby(['game_id', 'team_id', 'player_id', 'segment'], sort=False, dropna=False)
+                .agg(position=('position', 'first'), minutes=('minutes', 'sum'))
+                .reset_index())
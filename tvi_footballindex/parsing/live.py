@@ -0,0 +1,330 @@
+"""
+Live F24 TVI
+
+Keeps per-player event-zone counts and on-pitch minutes for a match in progress
+and updates them incrementally from growing F24 XML snapshots. Each snapshot is
+split into raw <Event> segments which are compared with the previous snapshot by
+event `id`; only new, edited or removed events are parsed and applied, and
+events turned into "Deleted event" (type 43) are retracted.
+
+Part of the tvi_footballindex library.
+"""
+
+import os
+import re
+import time
+import xml.etree.ElementTree as et
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from tvi_footballindex.parsing.f24_parser import POSITIONS_DICT
+from tvi_footballindex.utils.helpers import assign_zones, pass_length
+
+
+_ID_RE = re.compile(rb'\bid="([^"]*)"')
+_GAME_RE = re.compile(rb'<Game\b([^>]*)>')
+_ATTR_RE = re.compile(rb'(\w+)="([^"]*)"')
+
+_DELETED_EVENT_ID = 43
+_LINEUP_ID = 34
+_PLAYER_ON_ID = 19
+_PLAYER_OFF_ID = 18
+
+
+def metric_actions(event, qualifiers, length_deep_completion=20, length_threshold=(30, 15, 10)):
+    """
+    Metric actions produced by one raw F24 event.
+
+    Mirrors, for a single event, the rules of the get_* extractors in f24_parser
+    with their default arguments (successful actions only), so live counts match
+    what the batch pipeline produces.
+
+    Parameters:
+    -----------
+    event : dict
+        Event attributes as strings (type_id, outcome, x, y, keypass, ...)
+    qualifiers : dict
+        Qualifier ID (int) -> value (str)
+    length_deep_completion : float, optional
+        Same as get_deep_completions (default: 20)
+    length_threshold : tuple, optional
+        Same as get_progressive_passes (default: (30, 15, 10))
+
+    Returns:
+    --------
+    list
+        Metric event names, e.g. ['key_pass', 'progressive_pass']
+    """
+    type_id = int(event.get('type_id', -1))
+    successful = event.get('outcome') == '1'
+
+    if type_id == 8:
+        return ['Interception'] if successful else []
+    if type_id == 7:
+        return ['Tackle'] if successful else []
+    if type_id == 44:
+        return ['Aerial'] if successful else []
+    if type_id == 3:
+        return ['dribble'] if successful else []
+    if type_id == 16:
+        return ['shots_on_target']
+    if type_id == 15:
+        # Value-less qualifiers are read as 'yes' by explode_event
+        blocked = 82 in qualifiers and qualifiers[82] in (None, 'yes')
+        return [] if blocked else ['shots_on_target']
+    if type_id != 1 or not successful:
+        return []
+
+    actions = []
+    if event.get('keypass') is not None:
+        actions.append('key_pass')
+    if 140 in qualifiers and 141 in qualifiers:
+        progression, end_dist, start_half, end_half = pass_length(
+            float(event['x']), float(event['y']), float(qualifiers[140]), float(qualifiers[141])
+        )
+        if ((start_half == 'defensive half' and end_half == 'defensive half' and progression > length_threshold[0]) or
+                (start_half == 'defensive half' and end_half == 'attacking half' and progression > length_threshold[1]) or
+                (start_half == 'attacking half' and end_half == 'attacking half' and progression > length_threshold[2])):
+            actions.append('progressive_pass')
+        if end_dist < length_deep_completion:
+            actions.append('deep_completion')
+    return actions
+
+
+class LiveTVI:
+    """
+    Incremental TVI for one match fed with successive F24 XML snapshots.
+
+    Parameters:
+    -----------
+    zone_map : list or ZoneMap, optional
+        2D list defining pitch zones, or a ZoneMap (default: 3x3 grid as in calculate_tvi)
+    C : float, optional
+        Scaling constant, as in calculate_tvi (default: 90/44)
+    min_playtime : float, optional
+        Players with fewer minutes on the pitch so far are left out (default: 0)
+    on_update : callable, optional
+        Called as on_update(tvi_df, diff) after every snapshot that changed something
+
+    Example:
+    --------
+    >>> live = LiveTVI(on_update=lambda tvi, diff: print(tvi.nlargest(5, 'TVI')))
+    >>> for path in sorted(os.listdir("snapshots")):
+    ...     live.update(os.path.join("snapshots", path))
+    """
+
+    def __init__(self, zone_map=None, C=90/44, min_playtime=0, on_update=None):
+        self.zone_map = zone_map or [[2, 4, 6], [1, 3, 5], [2, 4, 6]]
+        self.C = C
+        self.min_playtime = min_playtime
+        self.on_update = on_update
+        self.game = {}
+        self._segments = {}      # event id -> raw XML bytes of the last snapshot
+        self._contrib = {}       # event id -> [(team_id, player_id, event_zone), ...]
+        self._structural = {}    # event id -> lineup / substitution info
+        self._minutes = {}       # event id -> match minute
+        self._counts = {}        # (team_id, player_id) -> Counter of event zones
+        self.last_update_seconds = None
+
+    # Parsing -------------------------------------------------------------------------------
+
+    def _parse_event(self, segment):
+        element = et.fromstring(segment)
+        event = dict(element.attrib)
+        qualifiers = {}
+        for q in element:
+            try:
+                qualifiers[int(q.get('qualifier_id'))] = q.get('value')
+            except (TypeError, ValueError):
+                continue
+        return event, qualifiers
+
+    def _apply(self, event_id, sign):
+        for team_id, player_id, event_zone in self._contrib.get(event_id, ()):
+            counter = self._counts.setdefault((team_id, player_id), Counter())
+            counter[event_zone] += sign
+            if counter[event_zone] <= 0:
+                del counter[event_zone]
+
+    def _retract(self, event_id):
+        self._apply(event_id, -1)
+        self._contrib.pop(event_id, None)
+        self._structural.pop(event_id, None)
+        self._minutes.pop(event_id, None)
+
+    def _ingest(self, event_id, event, qualifiers):
+        type_id = int(event.get('type_id', -1))
+        if type_id == _DELETED_EVENT_ID:
+            return
+        self._minutes[event_id] = int(event.get('min', 0))
+        team_id = event.get('team_id')
+
+        if type_id == _LINEUP_ID:
+            players = [p.strip() for p in (qualifiers.get(30) or '').split(',') if p.strip()][:11]
+            positions = [POSITIONS_DICT.get(p.strip()) for p in (qualifiers.get(44) or '').split(',')][:11]
+            positions += [None] * (len(players) - len(positions))
+            self._structural[event_id] = ('lineup', team_id, list(zip(players, positions)), 0)
+            return
+        if type_id in (_PLAYER_ON_ID, _PLAYER_OFF_ID):
+            kind = 'on' if type_id == _PLAYER_ON_ID else 'off'
+            position = qualifiers.get(44)
+            self._structural[event_id] = (kind, team_id, [(event.get('player_id'), position)],
+                                          int(event.get('min', 0)))
+            return
+
+        player_id = event.get('player_id')
+        if player_id is None:
+            return
+        actions = metric_actions(event, qualifiers)
+        if actions:
+            zone = assign_zones(float(event['x']), float(event['y']), zone_map=self.zone_map)
+            self._contrib[event_id] = [(team_id, player_id, f"{name}_{zone}") for name in actions]
+            self._apply(event_id, 1)
+
+    def update(self, snapshot):
+        """
+        Apply a new snapshot of the match feed.
+
+        Parameters:
+        -----------
+        snapshot : str or bytes
+            Path of an F24 XML file, or its raw bytes
+
+        Returns:
+        --------
+        dict
+            Event ids that were 'added', 'edited' and 'removed' in this snapshot
+        """
+        started = time.perf_counter()
+        if isinstance(snapshot, (bytes, bytearray)):
+            data = bytes(snapshot)
+        else:
+            with open(snapshot, 'rb') as f:
+                data = f.read()
+
+        game_match = _GAME_RE.search(data)
+        if game_match:
+            self.game = {k.decode(): v.decode() for k, v in _ATTR_RE.findall(game_match.group(1))}
+
+        # Split on the event start tags (a C-level bytes split, no regex scan of the file)
+        segments = {}
+        for part in data.split(b'<Event ')[1:]:
+            head_end = part.find(b'>') + 1
+            close = part.find(b'</Event>')
+            segment = b'<Event ' + (part[:close + 8] if close >= 0 else part[:head_end])
+            id_match = _ID_RE.search(part, 0, head_end)
+            if id_match:
+                segments[id_match.group(1).decode()] = segment
+
+        diff = {'added': [], 'edited': [], 'removed': []}
+        for event_id in self._segments.keys() - segments.keys():
+            self._retract(event_id)
+            diff['removed'].append(event_id)
+        for event_id, segment in segments.items():
+            previous = self._segments.get(event_id)
+            if previous == segment:
+                continue
+            event, qualifiers = self._parse_event(segment)
+            if previous is not None:
+                self._retract(event_id)
+                # An event replaced by a "Deleted event" counts as removed
+                diff['removed' if int(event.get('type_id', -1)) == _DELETED_EVENT_ID else 'edited'].append(event_id)
+            else:
+                diff['added'].append(event_id)
+            self._ingest(event_id, event, qualifiers)
+        self._segments = segments
+
+        self.last_update_seconds = time.perf_counter() - started
+        if self.on_update is not None and any(diff.values()):
+            self.on_update(self.tvi(), diff)
+        return diff
+
+    # Results -------------------------------------------------------------------------------
+
+    def current_minute(self):
+        """Latest match minute seen in the feed."""
+        return max(self._minutes.values(), default=0)
+
+    def playtime(self):
+        """
+        On-pitch minutes so far for every player in the lineups or substitutions.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            Columns: game_id, team_id, player_id, position, play_time
+        """
+        now = self.current_minute()
+        starts, ends, positions = {}, {}, {}
+        for kind, team_id, players, minute in self._structural.values():
+            for player_id, position in players:
+                key = (team_id, player_id)
+                if kind == 'off':
+                    ends[key] = minute
+                    continue
+                starts[key] = minute
+                positions[key] = position
+        rows = []
+        for key, start in starts.items():
+            play_time = max(0, ends.get(key, now) - start)
+            if play_time >= self.min_playtime:
+                rows.append((self.game.get('id'), key[0], key[1], positions.get(key), play_time))
+        return pd.DataFrame(rows, columns=['game_id', 'team_id', 'player_id', 'position', 'play_time'])
+
+    def tvi(self):
+        """
+        Current TVI for every player on the lineup sheets.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            The playtime columns plus action_diversity, shannon_entropy, TVI_entropy
+            and TVI, computed as in calculate_tvi
+        """
+        tvi = self.playtime()
+        diversity = np.zeros(len(tvi))
+        entropy = np.zeros(len(tvi))
+        for i, key in enumerate(zip(tvi['team_id'], tvi['player_id'])):
+            counter = self._counts.get(key)
+            if counter:
+                counts = np.fromiter(counter.values(), dtype=float)
+                diversity[i] = len(counts)
+                p = counts / counts.sum()
+                entropy[i] = float(-(p * np.log2(p)).sum())
+        tvi['action_diversity'] = diversity
+        tvi['shannon_entropy'] = entropy
+        minutes = tvi['play_time'].to_numpy(dtype=float)
+        valid = minutes > 0
+        safe = np.where(valid, minutes, 1.0)
+        tvi['TVI_entropy'] = np.minimum(np.where(valid, entropy / safe, 0.0), 1)
+        tvi['TVI'] = np.minimum(np.where(valid, self.C * diversity / safe, 0.0), 1)
+        return tvi
+
+
+def replay_snapshots(folder, live=None, interval=0.0, **kwargs):
+    """
+    Feed a folder of snapshot files to a LiveTVI in name order (a local feed stand-in).
+
+    Parameters:
+    -----------
+    folder : str
+        Folder containing successive F24 XML snapshots of one match
+    live : LiveTVI, optional
+        Instance to update; a new one is created from kwargs if None
+    interval : float, optional
+        Seconds to wait between snapshots (default: 0)
+
+    Yields:
+    -------
+    tuple
+        (snapshot file name, diff, tvi DataFrame) after every snapshot
+    """
+    live = live or LiveTVI(**kwargs)
+    files = sorted(f for f in os.listdir(folder) if f.endswith(".xml"))
+    for i, file in enumerate(files):
+        if i and interval:
+            time.sleep(interval)
+        diff = live.update(os.path.join(folder, file))
+        yield file, diff, live.tvi()
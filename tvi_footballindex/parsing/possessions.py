@@ -0,0 +1,122 @@
+"""
+Possession chains
+
+Splits the event stream of every game into possessions with vectorised
+shift/cumsum logic. Events are ordered by period, minute, second and event ID;
+a new possession starts at a new game or period, when the team in control of
+the ball changes, and at the first event after a stoppage (ball out, foul,
+goal, offside, ...). Duel-type events that are recorded for both teams (fouls,
+aerials, challenges, ...) don't change the team in control.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Administrative events that are not part of play
+NON_PLAY_TYPES = (17, 18, 19, 20, 21, 22, 23, 24, 25, 27, 28, 30, 32, 34, 35, 36, 37,
+                  38, 39, 40, 43, 47, 63, 64, 65)
+# Play stops after these: Offside Pass, Foul, Out, Corner Awarded, Goal, Offside provoked
+STOPPAGE_TYPES = (2, 4, 5, 6, 16, 55)
+# Recorded for both sides, so they don't say who controls the ball: Foul, Out, Corner
+# Awarded, Aerial, Challenge, Offside provoked, 50/50, Blocked pass
+NEUTRAL_TYPES = (4, 5, 6, 44, 45, 55, 67, 74)
+
+
+def assign_possessions(match_events, stoppage_types=STOPPAGE_TYPES, neutral_types=NEUTRAL_TYPES):
+    """
+    Assign a possession ID and the team in possession to every event.
+
+    Parameters:
+    -----------
+    match_events : pandas.DataFrame
+        DataFrame containing match events with game_id, team_id, type_id, period_id,
+        min and sec (event_id is used to order events within the same second)
+    stoppage_types : tuple, optional
+        Event types after which a new possession starts (default: STOPPAGE_TYPES)
+    neutral_types : tuple, optional
+        Event types that don't change the team in control (default: NEUTRAL_TYPES)
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Copy of match_events (same row order) with 'possession_id' (int, unique across
+        games; -1 for non-play events) and 'possession_team_id' (None for non-play events)
+    """
+    required = ['game_id', 'team_id', 'type_id', 'period_id', 'min', 'sec']
+    missing = [col for col in required if col not in match_events.columns]
+    if missing:
+        raise KeyError(f"Missing columns in match_events: {missing}")
+
+    n = len(match_events)
+    result = match_events.copy()
+    result['possession_id'] = np.full(n, -1, dtype=np.int64)
+    result['possession_team_id'] = pd.Series([None] * n, index=result.index, dtype=object)
+    type_ids = match_events['type_id'].to_numpy()
+    in_play = ~np.isin(type_ids, NON_PLAY_TYPES)
+    if not in_play.any():
+        return result
+
+    # Sorted stream of in-play events
+    game_codes = pd.factorize(match_events['game_id'], sort=True)[0]
+    event_ids = (match_events['event_id'].to_numpy() if 'event_id' in match_events.columns
+                 else np.arange(n))
+    order = np.lexsort((np.arange(n), event_ids, match_events['sec'].to_numpy(),
+                        match_events['min'].to_numpy(), match_events['period_id'].to_numpy(), game_codes))
+    order = order[in_play[order]]
+
+    games = game_codes[order]
+    periods = match_events['period_id'].to_numpy()[order]
+    types = type_ids[order]
+    team_codes, teams = pd.factorize(match_events['team_id'].to_numpy()[order])
+    segment = pd.Series(games.astype(np.int64) * 100 + periods)
+
+    # Team in control: the team of the event, carried over neutral events
+    control = pd.Series(np.where(np.isin(types, neutral_types) | (team_codes < 0), np.nan, team_codes))
+    control = control.groupby(segment).ffill()
+    control = control.fillna(control.groupby(segment).bfill()).to_numpy()
+
+    boundary = segment.ne(segment.shift()).to_numpy()
+    stopped = np.isin(types, stoppage_types)
+    after_stoppage = np.r_[False, stopped[:-1] & ~stopped[1:]]
+    control_change = np.r_[True, control[1:] != control[:-1]] & ~np.isnan(control)
+    new_possession = boundary | after_stoppage | control_change
+
+    result.iloc[order, result.columns.get_loc('possession_id')] = np.cumsum(new_possession) - 1
+    team_values = np.append(np.asarray(teams, dtype=object), None)
+    control_codes = np.where(np.isnan(control), len(teams), np.nan_to_num(control)).astype(np.int64)
+    result.iloc[order, result.columns.get_loc('possession_team_id')] = team_values[control_codes]
+    return result
+
+
+def get_possession_counts(match_events, game_id_col='game_id', team_id_col='team_id'):
+    """
+    Count possessions and their events per team and game.
+
+    Parameters:
+    -----------
+    match_events : pandas.DataFrame
+        DataFrame containing match events; possessions are assigned with
+        assign_possessions unless it already has 'possession_id' and 'possession_team_id'
+    game_id_col : str, optional
+        Column name for game IDs (default: 'game_id')
+    team_id_col : str, optional
+        Name of the team column in the output (default: 'team_id')
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Columns game_id, team_id, possessions, events and events_per_possession,
+        one row per team and game
+    """
+    if 'possession_id' not in match_events.columns or 'possession_team_id' not in match_events.columns:
+        match_events = assign_possessions(match_events)
+    in_play = match_events[match_events['possession_id'] >= 0]
+    counts = (in_play.groupby([game_id_col, 'possession_team_id'])
+              .agg(possessions=('possession_id', 'nunique'), events=('possession_id', 'size'))
+              .reset_index()
+              .rename(columns={'possession_team_id': team_id_col}))
+    counts['events_per_possession'] = counts['events'] / counts['possessions']
+    return counts
@@ -0,0 +1,130 @@
+"""
+Prefetching file reader
+
+Reads upcoming files on a bounded pool of reader threads while the caller
+parses the current one, so read latency (e.g. network-mounted storage) overlaps
+with parsing instead of adding to it. Also contains a throttled file reader that
+simulates high-latency storage on a local disk.
+
+Part of the tvi_footballindex library.
+"""
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def read_bytes(path):
+    """Read a whole file as bytes."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class PrefetchReader:
+    """
+    Iterate over (path, bytes) for a list of files, reading ahead in the background.
+
+    At most `queue_depth` files are read or waiting to be consumed at any time;
+    when the queue is full no further reads are started until the consumer takes
+    the next file (backpressure), which bounds memory to about `queue_depth` files.
+    Files are yielded in the order of `paths`.
+
+    Parameters:
+    -----------
+    paths : list
+        Files to read
+    readers : int, optional
+        Number of reader threads (default: 4)
+    queue_depth : int, optional
+        Maximum number of files read ahead of the consumer (default: 2 * readers)
+    read_file : callable, optional
+        Function path -> bytes used to read a file (default: read_bytes)
+
+    Attributes:
+    -----------
+    stats : dict
+        'files' and 'bytes' read, 'wait_seconds' the consumer spent blocked on
+        reads, and 'max_in_flight' the highest number of queued files
+
+    Example:
+    --------
+    >>> reader = PrefetchReader(paths, readers=8, queue_depth=16)
+    >>> for path, data in reader:
+    ...     parse(data)
+    >>> reader.stats['wait_seconds']
+    """
+
+    def __init__(self, paths, readers=4, queue_depth=None, read_file=None):
+        if readers < 1:
+            raise ValueError(f"readers must be at least 1, got {readers}")
+        self.paths = list(paths)
+        self.readers = readers
+        self.queue_depth = queue_depth or 2 * readers
+        if self.queue_depth < 1:
+            raise ValueError(f"queue_depth must be at least 1, got {self.queue_depth}")
+        self.read_file = read_file or read_bytes
+        self.stats = {'files': 0, 'bytes': 0, 'wait_seconds': 0.0, 'max_in_flight': 0}
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        pending = deque()
+        remaining = iter(self.paths)
+        with ThreadPoolExecutor(max_workers=self.readers) as executor:
+            def fill():
+                while len(pending) < self.queue_depth:
+                    path = next(remaining, None)
+                    if path is None:
+                        return
+                    pending.append((path, executor.submit(self.read_file, path)))
+
+            try:
+                fill()
+                while pending:
+                    self.stats['max_in_flight'] = max(self.stats['max_in_flight'], len(pending))
+                    path, future = pending.popleft()
+                    started = time.perf_counter()
+                    data = future.result()
+                    self.stats['wait_seconds'] += time.perf_counter() - started
+                    self.stats['files'] += 1
+                    self.stats['bytes'] += len(data)
+                    # Start the next read before handing this file to the consumer
+                    fill()
+                    yield path, data
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+
+class ThrottledReader:
+    """
+    File reader that simulates slow storage: each read waits `latency` seconds
+    plus the file size divided by `bandwidth`, like a network mount would.
+
+    Waiting is done with time.sleep, which releases the GIL the same way a
+    blocking read does, so it can stand in for real storage when testing
+    PrefetchReader.
+
+    Parameters:
+    -----------
+    latency : float, optional
+        Seconds added to every read (default: 0.05)
+    bandwidth : float, optional
+        Bytes per second; None for unlimited (default: None)
+
+    Example:
+    --------
+    >>> slow = ThrottledReader(latency=0.1, bandwidth=50e6)
+    >>> events = parsef24_folder("f24/", prefetch=8, read_file=slow)
+    """
+
+    def __init__(self, latency=0.05, bandwidth=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def __call__(self, path):
+        data = read_bytes(path)
+        delay = self.latency + (len(data) / self.bandwidth if self.bandwidth else 0)
+        time.sleep(delay)
+        return data
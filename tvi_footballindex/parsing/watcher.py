@@ -0,0 +1,268 @@
+"""
+F24 folder watcher
+
+Asyncio daemon that watches an F24 drop folder, parses new or modified XML files
+in a worker pool once they stop changing, and keeps the season's events,
+playtime and TVI tables up to date one game at a time.
+
+Part of the tvi_footballindex library.
+"""
+
+import asyncio
+import os
+import time
+import xml.etree.ElementTree as et
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from tvi_footballindex.parsing.f24_parser import (
+    parsef24_file,
+    calculate_player_playtime,
+    get_metric_events,
+)
+from tvi_footballindex.tvi.calculator import calculate_tvi, aggregate_tvi_by_player
+
+
+def process_f24_file(path, min_playtime=30, **tvi_kwargs):
+    """
+    Run the full per-game pipeline on one F24 file.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the F24 XML file
+    min_playtime : int, optional
+        Minimum playtime threshold in minutes (default: 30)
+    **tvi_kwargs
+        Extra arguments for calculate_tvi (C, zone_map, ...)
+
+    Returns:
+    --------
+    tuple
+        (events, playtime, tvi) DataFrames for the game
+    """
+    events = parsef24_file(path)
+    playtime = calculate_player_playtime(events, min_playtime=min_playtime)
+    actions = get_metric_events(events)
+    if actions.empty or playtime.empty:
+        tvi = pd.DataFrame(columns=list(playtime.columns) + ['action_diversity', 'shannon_entropy',
+                                                             'TVI_entropy', 'TVI'])
+    else:
+        tvi = calculate_tvi(actions, playtime, **tvi_kwargs)
+    return events, playtime, tvi
+
+
+class F24FolderWatcher:
+    """
+    Watch a folder of F24 XML files and keep season tables updated incrementally.
+
+    A file is processed once its size and modification time have not changed for
+    `debounce` seconds, so bursts of writes to the same file trigger a single
+    parse. Each file is parsed and scored on its own, so a new game only costs its
+    own parse and TVI computation; modified files replace their game and removed
+    files drop it.
+
+    Parameters:
+    -----------
+    folder : str
+        Folder to watch
+    min_playtime : int, optional
+        Minimum playtime threshold in minutes (default: 30)
+    debounce : float, optional
+        Seconds a file must stay unchanged before it is processed (default: 2.0)
+    poll_interval : float, optional
+        Seconds between folder scans (default: 1.0)
+    max_workers : int, optional
+        Size of the worker pool (default: executor default)
+    use_processes : bool, optional
+        Parse in a process pool (True) or a thread pool (False) (default: True)
+    on_game : callable, optional
+        Called as on_game(path, tvi_df) after each game is (re)processed
+    **tvi_kwargs
+        Extra arguments for calculate_tvi (C, zone_map, ...)
+
+    Example:
+    --------
+    >>> watcher = F24FolderWatcher("drop/f24", debounce=5)
+    >>> asyncio.run(watcher.run())        # runs until watcher.stop()
+    >>> watcher.tvi                       # season TVI rows so far
+    """
+
+    def __init__(self, folder, min_playtime=30, debounce=2.0, poll_interval=1.0,
+                 max_workers=None, use_processes=True, on_game=None, **tvi_kwargs):
+        self.folder = folder
+        self.min_playtime = min_playtime
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.on_game = on_game
+        self.tvi_kwargs = tvi_kwargs
+        self.errors = {}
+        self._games = {}        # path -> (events, playtime, tvi)
+        self._processed = {}    # path -> file signature that was processed
+        self._pending = {}      # path -> (signature, time first seen with that signature)
+        self._tables = {}
+        self._executor = None
+        self._futures = []      # futures of the scan in progress, cancelled by close()
+        self._running = False
+
+    # Season tables --------------------------------------------------------------------------
+
+    def _table(self, index):
+        if index not in self._tables:
+            frames = [game[index] for game in self._games.values() if not game[index].empty]
+            self._tables[index] = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            if index == 2 and frames:
+                # Event-zone columns only exist for games where they occurred
+                self._tables[index] = self._tables[index].fillna(0)
+        return self._tables[index]
+
+    @property
+    def events(self):
+        """All parsed events of the season so far."""
+        return self._table(0)
+
+    @property
+    def playtime(self):
+        """Player playtime of the season so far."""
+        return self._table(1)
+
+    @property
+    def tvi(self):
+        """Game-level TVI rows of the season so far."""
+        return self._table(2)
+
+    def player_tvi(self, **kwargs):
+        """Season TVI per player, via aggregate_tvi_by_player."""
+        return aggregate_tvi_by_player(self.tvi, **kwargs)
+
+    # Scanning -------------------------------------------------------------------------------
+
+    def _ready_files(self):
+        now = time.monotonic()
+        ready = []
+        seen = set()
+        for entry in os.scandir(self.folder):
+            if not entry.name.endswith(".xml") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            path = entry.path
+            seen.add(path)
+            if self._processed.get(path) == signature:
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != signature:
+                self._pending[path] = (signature, now)
+            elif now - pending[1] >= self.debounce:
+                ready.append((path, signature))
+
+        removed = [path for path in self._games if path not in seen]
+        for path in removed:
+            del self._games[path]
+            self._processed.pop(path, None)
+        if removed:
+            self._tables = {}
+        return ready
+
+    async def scan(self):
+        """
+        Scan the folder once and process every file that is ready.
+
+        Returns:
+        --------
+        list
+            Paths that were (re)processed in this scan
+        """
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.max_workers)
+        loop = asyncio.get_running_loop()
+        ready = await loop.run_in_executor(None, self._ready_files)
+        if not ready:
+            return []
+
+        futures = [
+            loop.run_in_executor(self._executor, _process_path,
+                                 path, self.min_playtime, self.tvi_kwargs)
+            for path, _ in ready
+        ]
+        self._futures = futures
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        self._futures = []
+
+        done = []
+        for (path, signature), result in zip(ready, results):
+            self._pending.pop(path, None)
+            self._processed[path] = signature
+            if isinstance(result, Exception):
+                # Left for the next write to the file to fix (e.g. truncated XML)
+                self.errors[path] = result
+                continue
+            self.errors.pop(path, None)
+            self._games[path] = result
+            done.append(path)
+        if done:
+            self._tables = {}
+            if self.on_game is not None:
+                for path in done:
+                    self.on_game(path, self._games[path][2])
+        return done
+
+    async def run(self):
+        """Scan the folder every poll_interval seconds until stop() is called."""
+        self._running = True
+        try:
+            while self._running:
+                await self.scan()
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self.close()
+
+    def stop(self):
+        """Ask run() to return after the current scan."""
+        self._running = False
+
+    def close(self):
+        """Shut down the worker pool."""
+        if self._executor is not None:
+            # Executor.shutdown(cancel_futures=True) needs Python 3.9
+            for future in self._futures:
+                future.cancel()
+            self._futures = []
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _process_path(path, min_playtime, tvi_kwargs):
+    # Module-level so it can be sent to a process pool
+    try:
+        return process_f24_file(path, min_playtime=min_playtime, **tvi_kwargs)
+    except et.ParseError as e:
+        raise ValueError(f"Could not parse {path}: {e}") from None
+
+
+def watch_f24_folder(folder, **kwargs):
+    """
+    Run an F24FolderWatcher until interrupted and return it.
+
+    Parameters:
+    -----------
+    folder : str
+        Folder to watch
+    **kwargs
+        Arguments for F24FolderWatcher
+
+    Returns:
+    --------
+    F24FolderWatcher
+        The watcher with the season tables built so far
+    """
+    watcher = F24FolderWatcher(folder, **kwargs)
+    try:
+        asyncio.run(watcher.run())
+    except KeyboardInterrupt:
+        pass
+    return watcher
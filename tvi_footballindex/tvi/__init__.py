@@ -8,11 +8,129 @@ which measures a player's or team's tactical adaptability and flexibility.
 from .calculator import (
     calculate_tvi,
     aggregate_tvi_by_player, 
+    count_event_zones,
     validate_data_format
 )
+from .validation import (
+    validate_inputs,
+    ValidationToken
+)
+from .aggregation import (
+    aggregate_tvi_levels,
+    calculate_tvi_levels,
+    add_opponent,
+    opponent_adjust
+)
+from .bootstrap import bootstrap_tvi
+from .reliability import (
+    split_half_reliability,
+    stability_curve,
+    stabilization_minutes
+)
+from .ranking import (
+    rank_tvi,
+    add_player_names,
+    attach_game_metadata
+)
+from .service import (
+    TVIIndex,
+    TVIQueryService,
+    load_tvi_table,
+    serve_tvi
+)
+from .cache import (
+    TVICache,
+    cached_calculate_tvi,
+    cached_aggregate_tvi_by_player,
+    hash_frame
+)
+from .backends import (
+    TVIBackend,
+    PandasBackend,
+    PolarsBackend,
+    get_backend,
+    register_backend
+)
+from .segments import (
+    calculate_segment_tvi,
+    goal_timeline,
+    label_game_state,
+    game_state_minutes,
+    half_minutes,
+    time_block_minutes
+)
+from .similarity import (
+    SimilarityIndex,
+    event_zone_profiles
+)
+from .xt import (
+    XTGrid,
+    pass_end_coordinates
+)
+from .network import (
+    PassingNetworks,
+    infer_receivers
+)
+from .heatmaps import (
+    HeatmapStore,
+    export_heatmaps,
+    heatmap_tensor
+)
+from .pipeline import (
+    Pipeline,
+    PipelineRun,
+    build_tvi_pipeline,
+    run_tvi_pipeline
+)
 
 __all__ = [
     'calculate_tvi',
     'aggregate_tvi_by_player', 
-    'validate_data_format'
+    'count_event_zones',
+    'validate_data_format',
+    'validate_inputs',
+    'ValidationToken',
+    'aggregate_tvi_levels',
+    'calculate_tvi_levels',
+    'add_opponent',
+    'opponent_adjust',
+    'bootstrap_tvi',
+    'split_half_reliability',
+    'stability_curve',
+    'stabilization_minutes',
+    'rank_tvi',
+    'add_player_names',
+    'attach_game_metadata',
+    'TVIIndex',
+    'TVIQueryService',
+    'load_tvi_table',
+    'serve_tvi',
+    'TVICache',
+    'cached_calculate_tvi',
+    'cached_aggregate_tvi_by_player',
+    'hash_frame',
+    'TVIBackend',
+    'PandasBackend',
+    'PolarsBackend',
+    'get_backend',
+    'register_backend',
+    'calculate_segment_tvi',
+    'goal_timeline',
+    'label_game_state',
+    'game_state_minutes',
+    'half_minutes',
+    'time_block_minutes',
+    'SimilarityIndex',
+    'event_zone_profiles',
+    'XTGrid',
+    'pass_end_coordinates',
+    'PassingNetworks',
+    'infer_receivers',
+    'HeatmapStore',
+    'export_heatmaps',
+    'heatmap_tensor',
+    'Pipeline',
+    'PipelineRun',
+    'build_tvi_pipeline',
+    'run_tvi_pipeline'
 ]
@@ -0,0 +1,231 @@
+"""
+Multi-level TVI aggregation
+
+Rolls the long event-zone count table (see count_event_zones) up to arbitrary
+key levels - team-game, lineup unit, opponent, ... - and computes action
+diversity, Shannon entropy and both TVI variants the same way at every level.
+Level minutes default to match minutes, so a team-game is scored over its 90
+minutes like a player who played the whole game.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+
+from tvi_footballindex.tvi.calculator import count_event_zones
+
+
+# Levels used when none are given; 'position' comes from calculate_player_playtime and
+# 'opponent_id' from add_opponent()
+DEFAULT_LEVELS = {
+    'team_game': ['game_id', 'team_id'],
+    'unit_game': ['game_id', 'team_id', 'position'],
+    'team_vs_opponent': ['team_id', 'opponent_id'],
+}
+
+
+def add_opponent(df, game_id_col='game_id', team_id_col='team_id', opponent_col='opponent_id'):
+    """
+    Add the opposing team of every row, assuming two teams per game.
+
+    Args:
+        df (pd.DataFrame): Any table with game and team columns (e.g. playtime or TVI rows).
+        game_id_col (str, optional): Column name for game IDs. Defaults to 'game_id'.
+        team_id_col (str, optional): Column name for team IDs. Defaults to 'team_id'.
+        opponent_col (str, optional): Name of the new column. Defaults to 'opponent_id'.
+
+    Returns:
+        pd.DataFrame: df with opponent_col added.
+    """
+    teams = df[[game_id_col, team_id_col]].drop_duplicates()
+    pairs = teams.merge(teams.rename(columns={team_id_col: opponent_col}), on=game_id_col)
+    pairs = pairs[pairs[team_id_col] != pairs[opponent_col]]
+    pairs = pairs.drop_duplicates(subset=[game_id_col, team_id_col])
+    return df.merge(pairs, on=[game_id_col, team_id_col], how='left')
+
+
+def _level_metrics(counts, level_keys, count_col, event_zone_col):
+    """Action diversity and Shannon entropy (bits) per level group from long counts."""
+    rolled = counts.groupby(level_keys + [event_zone_col], sort=False, dropna=False)[count_col].sum()
+    rolled = rolled[rolled > 0].reset_index()
+    c = rolled[count_col].to_numpy(dtype=float)
+    # H = log2(T) - sum(c * log2 c) / T, evaluated per group from two grouped sums
+    grouped = rolled.assign(_clogc=c * np.log2(c)).groupby(level_keys, sort=False, dropna=False)
+    metrics = grouped.agg(action_diversity=(event_zone_col, 'size'),
+                          total_events=(count_col, 'sum'),
+                          _clogc=('_clogc', 'sum'))
+    total = metrics['total_events'].to_numpy(dtype=float)
+    metrics['shannon_entropy'] = np.log2(total) - metrics['_clogc'].to_numpy() / total
+    metrics['shannon_entropy'] = metrics['shannon_entropy'].clip(lower=0)
+    return metrics.drop(columns=['_clogc'])
+
+
+def opponent_adjust(level_df, opponent_col='opponent_id', score_cols=('TVI', 'TVI_entropy')):
+    """
+    Adjust scores for opponent strength.
+
+    Each score becomes score - (mean score achieved against that opponent) + (overall
+    mean score), so facing an opponent that concedes unusually diverse play is not
+    rewarded.
+
+    Args:
+        level_df (pd.DataFrame): Level output from aggregate_tvi_levels() containing opponent_col.
+        opponent_col (str, optional): Column name for opponent IDs. Defaults to 'opponent_id'.
+        score_cols (tuple, optional): Score columns to adjust. Defaults to ('TVI', 'TVI_entropy').
+
+    Returns:
+        pd.DataFrame: level_df with '<score>_opp_adj' columns added.
+
+    Raises:
+        KeyError: If opponent_col is missing.
+    """
+    if opponent_col not in level_df.columns:
+        raise KeyError(f"Column '{opponent_col}' not found in level_df")
+    result = level_df.copy()
+    conceded = result.groupby(opponent_col, dropna=False)[list(score_cols)].transform('mean')
+    for col in score_cols:
+        result[f'{col}_opp_adj'] = result[col] - conceded[col] + result[col].mean()
+    return result
+
+
+def aggregate_tvi_levels(
+    counts_df,
+    playtime_df,
+    levels=None,
+    player_id_col='player_id',
+    game_id_col='game_id',
+    team_id_col='team_id',
+    playtime_col='play_time',
+    count_col='count',
+    event_zone_col='event_zone',
+    playtime_agg='match',
+    C=90/44,
+    opponent_col='opponent_id'
+):
+    """
+    Compute TVI at several aggregation levels from event-zone counts in one pass.
+
+    The counts are joined once with the playtime attributes (position, opponent, any
+    custom unit label), reduced to the finest grain that contains every requested
+    key, and each level is then rolled up from that small table. Diversity and
+    entropy are always computed from the summed event-zone counts of the level, so
+    a team-game's diversity is the number of distinct action-zones any of its
+    players covered.
+
+    Args:
+        counts_df (pd.DataFrame): Output from count_event_zones().
+        playtime_df (pd.DataFrame): Playtime per player-game; extra columns such as
+            'position', 'opponent_id' or a custom 'unit' can be used as level keys.
+        levels (dict, optional): Level name -> list of key columns. Defaults to
+            DEFAULT_LEVELS, restricted to levels whose keys exist.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        game_id_col (str, optional): Column name for game IDs. Defaults to 'game_id'.
+        team_id_col (str, optional): Column name for team IDs. Defaults to 'team_id'.
+        playtime_col (str, optional): Column name for playing time. Defaults to 'play_time'.
+        count_col (str, optional): Column name for counts. Defaults to 'count'.
+        event_zone_col (str, optional): Column name for action-zone labels. Defaults to 'event_zone'.
+        playtime_agg (str, optional): How player minutes combine into level minutes:
+            'match' (match minutes: the longest appearance in each game, summed over the
+            level's games), 'sum' (player-minutes), 'max' or 'mean'. With 'match' scores
+            are on the player scale, e.g. a team-game that covers the same action-zones
+            as one of its 90-minute players gets that player's TVI; 'sum' divides by
+            ~990 player-minutes per team-game. Defaults to 'match'.
+        C (float, optional): Scaling constant, as in calculate_tvi. Defaults to 90/44.
+        opponent_col (str, optional): Levels containing this column also get
+            opponent-adjusted scores. Defaults to 'opponent_id'.
+
+    Returns:
+        dict: Level name -> DataFrame with the level keys, action_diversity,
+            total_events, shannon_entropy, play_time, TVI and TVI_entropy
+            (plus *_opp_adj columns for opponent levels).
+
+    Raises:
+        KeyError: If a level uses a column that is not in playtime_df.
+        ValueError: If playtime_agg is not supported.
+
+    Example:
+        >>> counts = count_event_zones(all_metric_events)
+        >>> playtime = add_opponent(play_time)
+        >>> levels = aggregate_tvi_levels(counts, playtime)
+        >>> levels['unit_game'].query("position == 'Defender'").head()
+    """
+    if playtime_agg not in ('match', 'sum', 'max', 'mean'):
+        raise ValueError("playtime_agg must be one of 'match', 'sum', 'max' or 'mean'")
+
+    player_keys = [game_id_col, team_id_col, player_id_col]
+    available = set(playtime_df.columns)
+    if levels is None:
+        levels = {name: keys for name, keys in DEFAULT_LEVELS.items()
+                  if all(key in available for key in keys)}
+    for name, keys in levels.items():
+        missing = [key for key in keys if key not in available]
+        if missing:
+            raise KeyError(f"Level '{name}' uses columns not found in playtime_df: {missing}")
+
+    all_keys = list(dict.fromkeys(key for keys in levels.values() for key in keys))
+    attr_cols = [key for key in all_keys if key not in player_keys]
+
+    # Join attributes once; events of players without playtime are dropped (as in calculate_tvi)
+    playtime = playtime_df[list(dict.fromkeys(player_keys + attr_cols + [playtime_col]))]
+    counts = counts_df[player_keys + [event_zone_col, count_col]].merge(playtime[player_keys + attr_cols].drop_duplicates(subset=player_keys),
+                             on=player_keys, how='inner')
+
+    # Finest grain shared by all levels, so each level rolls up from a small table
+    finest = counts.groupby(all_keys + [event_zone_col], sort=False, dropna=False)[count_col] \
+        .sum().reset_index()
+
+    results = {}
+    for name, keys in levels.items():
+        keys = list(keys)
+        metrics = _level_metrics(finest, keys, count_col, event_zone_col)
+        if playtime_agg == 'match':
+            game_keys = keys if game_id_col in keys else keys + [game_id_col]
+            minutes = (playtime.groupby(game_keys, sort=False, dropna=False)[playtime_col].max()
+                       .groupby(level=list(range(len(keys))), sort=False, dropna=False).sum())
+        else:
+            minutes = playtime.groupby(keys, sort=False, dropna=False)[playtime_col].agg(playtime_agg)
+        level = minutes.to_frame().join(metrics, how='left').reset_index()
+        level[['action_diversity', 'total_events', 'shannon_entropy']] = \
+            level[['action_diversity', 'total_events', 'shannon_entropy']].fillna(0)
+
+        valid_playtime = level[playtime_col] > 0
+        level['TVI_entropy'] = 0.0
+        level.loc[valid_playtime, 'TVI_entropy'] = (
+            level.loc[valid_playtime, 'shannon_entropy'] / level.loc[valid_playtime, playtime_col]
+        )
+        level['TVI_entropy'] = level['TVI_entropy'].clip(upper=1)
+        level['TVI'] = 0.0
+        level.loc[valid_playtime, 'TVI'] = (
+            C * level.loc[valid_playtime, 'action_diversity'] / level.loc[valid_playtime, playtime_col]
+        )
+        level['TVI'] = level['TVI'].clip(upper=1)
+
+        if opponent_col in keys and len(keys) > 1:
+            level = opponent_adjust(level, opponent_col=opponent_col)
+        results[name] = level
+
+    return results
+
+
+def calculate_tvi_levels(events_df, playtime_df, levels=None, zone_map=None, **kwargs):
+    """
+    Convenience wrapper: count event-zones and aggregate them to several levels.
+
+    Args:
+        events_df (pd.DataFrame): DataFrame containing player actions with coordinates.
+        playtime_df (pd.DataFrame): Playtime per player-game (with any level attributes).
+        levels (dict, optional): Level name -> list of key columns. Defaults to DEFAULT_LEVELS.
+        zone_map (list or ZoneMap, optional): 2D list defining pitch zones, or a ZoneMap of polygon
+            and rectangle zones. Defaults to the 3x3 grid.
+        **kwargs: Column names and options passed to count_event_zones and aggregate_tvi_levels.
+
+    Returns:
+        dict: Level name -> DataFrame, as in aggregate_tvi_levels().
+    """
+    count_kwargs = {key: kwargs.pop(key) for key in
+                    ('event_name_col', 'x_col', 'y_col') if key in kwargs}
+    for key in ('player_id_col', 'game_id_col', 'team_id_col'):
+        if key in kwargs:
+            count_kwargs[key] = kwargs[key]
+    counts = count_event_zones(events_df, zone_map=zone_map, **count_kwargs)
+    return aggregate_tvi_levels(counts, playtime_df, levels=levels, **kwargs)
@@ -0,0 +1,260 @@
+"""
+Dataframe backends for the TVI core
+
+calculate_tvi and aggregate_tvi_by_player delegate their core computation to a
+backend. The pandas backend is the reference implementation; the Polars backend
+runs the grouping work as multi-threaded lazy queries and returns the same pandas
+DataFrames (same columns, dtypes, row order and values), so callers don't change.
+
+Part of the tvi_footballindex library.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from tvi_footballindex.utils import helpers
+
+
+class TVIBackend(ABC):
+    """
+    Interface for TVI computation engines.
+
+    Subclasses implement calculate_tvi and aggregate_tvi_by_player on inputs that
+    calculate_tvi / aggregate_tvi_by_player have already validated, and return
+    pandas DataFrames with the reference (pandas backend) schema. A subclass that
+    misses either method cannot be instantiated.
+    """
+
+    name = None
+
+    @abstractmethod
+    def calculate_tvi(self, events_df, playtime_df, player_id_col, event_name_col, x_col, y_col,
+                      game_id_col, team_id_col, playtime_col, C, zone_map):
+        """Per player-game TVI table, in playtime_df row order."""
+
+    @abstractmethod
+    def aggregate_tvi_by_player(self, tvi_df, keys, playtime_col, position_col):
+        """Playtime-weighted per-player TVI table, sorted by TVI descending."""
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class PandasBackend(TVIBackend):
+    """Reference single-threaded pandas implementation."""
+
+    name = 'pandas'
+
+    def calculate_tvi(self, events_df, playtime_df, **kwargs):
+        from tvi_footballindex.tvi.calculator import _calculate_tvi_pandas
+        return _calculate_tvi_pandas(events_df, playtime_df, **kwargs)
+
+    def aggregate_tvi_by_player(self, tvi_df, **kwargs):
+        from tvi_footballindex.tvi.calculator import _aggregate_tvi_by_player_pandas
+        return _aggregate_tvi_by_player_pandas(tvi_df, **kwargs)
+
+
+def _import_polars():
+    try:
+        import polars
+    except ImportError:
+        raise ImportError(
+            "The 'polars' backend requires the polars package: pip install polars"
+        ) from None
+    return polars
+
+
+class PolarsBackend(TVIBackend):
+    """
+    Multi-threaded Polars implementation.
+
+    Keys and action-zones are reduced to integer codes with pandas (keeping
+    pandas' key matching and column dtypes), the counting and per-group
+    reductions run as Polars lazy queries across all cores, and the output frame
+    is assembled in the exact layout of the pandas backend.
+    """
+
+    name = 'polars'
+
+    def __init__(self):
+        self.pl = _import_polars()
+
+    def calculate_tvi(self, events_df, playtime_df, player_id_col, event_name_col, x_col, y_col,
+                      game_id_col, team_id_col, playtime_col, C, zone_map):
+        pl = self.pl
+        keys = [game_id_col, team_id_col, player_id_col]
+
+        # Player-game codes from the playtime keys (rows follow playtime_df, as in the right join)
+        playtime_keys = pd.MultiIndex.from_frame(playtime_df[keys])
+        unique_keys = playtime_keys.unique()
+        playtime_codes = unique_keys.get_indexer(playtime_keys)
+        event_codes = unique_keys.get_indexer(pd.MultiIndex.from_frame(events_df[keys]))
+
+        name_codes, names = pd.factorize(events_df[event_name_col])
+        zone_codes, zones = pd.factorize(
+            helpers.assign_zones_array(events_df[x_col].to_numpy(), events_df[y_col].to_numpy(),
+                                       zone_map=zone_map)
+        )
+
+        # Event-zone columns are ordered by name, like the pandas pivot
+        labels = np.array([f"{name}_{zone}" for name in names for zone in zones], dtype=object)
+        order = np.argsort(labels, kind='stable')
+        column_of_code = np.empty(len(labels), dtype=np.int64)
+        column_of_code[order] = np.arange(len(labels))
+
+        events = pl.DataFrame({
+            'key': event_codes.astype(np.int64),
+            'code': name_codes.astype(np.int64) * len(zones) + zone_codes,
+            'valid': (event_codes >= 0) & (name_codes >= 0),
+        }).lazy()
+        counts = (events.filter(pl.col('valid'))
+                  .group_by(['key', 'code'])
+                  .agg(pl.len().cast(pl.Float64).alias('count'))
+                  .with_columns(pl.col('code').replace_strict(np.arange(len(labels)), column_of_code,
+                                                             return_dtype=pl.Int64).alias('column'))
+                  .sort(['key', 'column'])
+                  .collect())
+
+        # Only event-zones that occurred become columns
+        used = np.unique(counts['column'].to_numpy())
+        position_of_column = np.full(len(labels), -1, dtype=np.int64)
+        position_of_column[used] = np.arange(len(used))
+        event_zone_cols = list(labels[order][used])
+
+        per_key = (counts.lazy()
+                   .with_columns((pl.col('count') / pl.col('count').sum().over('key')).alias('p'))
+                   .group_by('key', maintain_order=True)
+                   .agg(pl.len().cast(pl.Float64).alias('action_diversity'),
+                        (-(pl.col('p') * pl.col('p').log()).sum() / np.log(2)).alias('shannon_entropy'))
+                   .collect())
+
+        n_keys = len(unique_keys)
+        wide = np.zeros((n_keys, len(used)))
+        wide[counts['key'].to_numpy(), position_of_column[counts['column'].to_numpy()]] = \
+            counts['count'].to_numpy()
+        action_diversity = np.zeros(n_keys)
+        shannon_entropy = np.zeros(n_keys)
+        key_index = per_key['key'].to_numpy()
+        action_diversity[key_index] = per_key['action_diversity'].to_numpy()
+        shannon_entropy[key_index] = per_key['shannon_entropy'].to_numpy()
+
+        # Assemble in the column order of the pandas merge: keys, event-zones, metrics, playtime
+        rows = playtime_codes
+        data = {col: playtime_df[col].to_numpy() for col in keys}
+        data.update(zip(event_zone_cols, wide[rows].T))
+        data['action_diversity'] = action_diversity[rows]
+        data['shannon_entropy'] = shannon_entropy[rows]
+        data.update({col: playtime_df[col].to_numpy() for col in playtime_df.columns if col not in keys})
+        tvi = pd.DataFrame(data).fillna(0)
+        for col in playtime_df.columns:
+            if tvi[col].dtype != playtime_df[col].dtype and not playtime_df[col].isna().any():
+                tvi[col] = tvi[col].astype(playtime_df[col].dtype)
+
+        playtime = tvi[playtime_col].to_numpy(dtype=float)
+        valid_playtime = playtime > 0
+        safe_playtime = np.where(valid_playtime, playtime, 1.0)
+        tvi['TVI_entropy'] = np.minimum(np.where(valid_playtime, tvi['shannon_entropy'] / safe_playtime, 0.0), 1)
+        tvi['TVI'] = np.minimum(np.where(valid_playtime, C * tvi['action_diversity'] / safe_playtime, 0.0), 1)
+        return tvi
+
+    def aggregate_tvi_by_player(self, tvi_df, keys, playtime_col, position_col):
+        pl = self.pl
+        has_position = position_col in tvi_df.columns
+        dropped = [col for col in ['team_id', 'game_id'] + ([position_col] if has_position else [])
+                   if col in tvi_df.columns and col not in keys]
+        numeric_cols = [col for col in tvi_df.drop(columns=dropped + keys).select_dtypes(include=np.number).columns
+                        if col != playtime_col]
+
+        # Group codes in pandas' sorted key order; rows with missing keys are dropped like groupby
+        group = tvi_df.groupby(keys, sort=True).ngroup().to_numpy()
+        rows = group >= 0
+        weights = tvi_df[playtime_col].to_numpy()[rows]
+        columns = {'group': group[rows], 'w': weights}
+        columns.update({f"c{i}": tvi_df[col].to_numpy(dtype=float)[rows] for i, col in enumerate(numeric_cols)})
+        frame = pl.DataFrame(columns)
+        weighted = (frame.lazy()
+                    .group_by('group')
+                    .agg([pl.col('w').sum().alias('total')]
+                         + [((pl.col(f"c{i}") * pl.col('w')).sum() / pl.col('w').sum()).alias(f"c{i}")
+                            for i in range(len(numeric_cols))])
+                    .sort('group')
+                    .collect())
+
+        first_row = np.flatnonzero(rows)[np.unique(group[rows], return_index=True)[1]]
+        out = tvi_df[keys].iloc[first_row].reset_index(drop=True)
+        # Groups with no playing time have no weighted average and are left out
+        kept = weighted['total'].to_numpy() != 0
+        out = out[kept].reset_index(drop=True)
+        for i, col in enumerate(numeric_cols):
+            out[col] = weighted[f"c{i}"].to_numpy()[kept]
+
+        if has_position:
+            position_codes, positions = pd.factorize(tvi_df[position_col], sort=True)
+            by_position = (pl.DataFrame({'group': group, 'position': position_codes,
+                                         'w': tvi_df[playtime_col].to_numpy()})
+                           .lazy()
+                           .filter((pl.col('group') >= 0) & (pl.col('position') >= 0))
+                           .group_by(['group', 'position'])
+                           .agg(pl.col('w').sum())
+                           .sort(['group', 'position'])
+                           .group_by('group', maintain_order=True)
+                           .agg(pl.col('position').get(pl.col('w').arg_max()))
+                           .collect())
+            main_position = pd.Series(
+                positions.take(by_position['position'].to_numpy()),
+                index=by_position['group'].to_numpy()
+            )
+            out['main_position'] = main_position.reindex(np.unique(group[rows])[kept]).to_numpy()
+
+        out[playtime_col] = weighted['total'].to_numpy()[kept]
+        if has_position:
+            out = out.rename(columns={'main_position': position_col})
+        return out.sort_values('TVI', ascending=False)
+
+
+_BACKENDS = {
+    'pandas': PandasBackend,
+    'polars': PolarsBackend,
+}
+
+
+def register_backend(name, backend_cls):
+    """
+    Make a TVIBackend subclass available by name to calculate_tvi(backend=...).
+
+    Args:
+        name (str): Backend name.
+        backend_cls (type): TVIBackend subclass, instantiated without arguments.
+
+    Raises:
+        ValueError: If backend_cls is not a TVIBackend subclass or leaves methods unimplemented.
+    """
+    if not (isinstance(backend_cls, type) and issubclass(backend_cls, TVIBackend)):
+        raise ValueError(f"backend_cls must be a TVIBackend subclass, got {backend_cls!r}")
+    if backend_cls.__abstractmethods__:
+        raise ValueError(f"{backend_cls.__name__} does not implement "
+                         f"{sorted(backend_cls.__abstractmethods__)}")
+    _BACKENDS[name] = backend_cls
+
+
+def get_backend(backend='pandas'):
+    """
+    Resolve a backend name or instance.
+
+    Args:
+        backend (str or TVIBackend): Registered name ('pandas', 'polars', ...) or an instance.
+
+    Returns:
+        TVIBackend: The backend.
+
+    Raises:
+        ValueError: If the name is not registered.
+        ImportError: If the backend's optional dependency is not installed.
+    """
+    if isinstance(backend, TVIBackend):
+        return backend
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Available: {sorted(_BACKENDS)}")
+    return _BACKENDS[backend]()
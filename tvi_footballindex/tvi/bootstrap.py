@@ -0,0 +1,126 @@
+"""
+Bootstrap confidence intervals for TVI
+
+Resamples each player's games with replacement and recomputes the
+playtime-weighted TVI (as aggregate_tvi_by_player does) for all players at
+once, using one vectorised draw matrix per batch of resamples.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+
+
+def bootstrap_tvi(
+    tvi_df,
+    n_resamples=1000,
+    ci=0.95,
+    seed=None,
+    player_id_col='player_id',
+    playtime_col='play_time',
+    score_cols=('TVI', 'TVI_entropy'),
+    group_cols=None,
+    max_batch_elements=5_000_000
+):
+    """
+    Bootstrap confidence intervals of season-level TVI for every player.
+
+    Each resample draws, for every player, as many games as the player played
+    (with replacement) and recomputes the playtime-weighted average of each score.
+    Games of all players are laid out in one flat array, so a batch of resamples
+    is a single (players x resamples x max_games) index matrix and a couple of
+    NumPy reductions; batches only bound the memory used.
+
+    Args:
+        tvi_df (pd.DataFrame): Output from calculate_tvi() function (one row per player-game).
+        n_resamples (int, optional): Number of bootstrap resamples. Defaults to 1000.
+        ci (float, optional): Confidence level of the interval. Defaults to 0.95.
+        seed (int or np.random.Generator, optional): Seed or generator for reproducible
+            draws. Defaults to None.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        playtime_col (str, optional): Column name for playtime. Defaults to 'play_time'.
+        score_cols (tuple, optional): Scores to bootstrap. Defaults to ('TVI', 'TVI_entropy').
+        group_cols (list, optional): Extra key columns to keep separate (e.g. ['season_id']).
+            Defaults to None.
+        max_batch_elements (int, optional): Upper bound on the size of one draw matrix.
+            Defaults to 5,000,000.
+
+    Returns:
+        pd.DataFrame: One row per player (and group) with columns:
+            - n_games, play_time: number of games and total minutes
+            - <score>: playtime-weighted point estimate
+            - <score>_se: bootstrap standard error
+            - <score>_ci_low, <score>_ci_high: percentile interval bounds
+
+    Raises:
+        KeyError: If required columns are missing.
+        ValueError: If the input DataFrame is empty or ci/n_resamples are invalid.
+
+    Example:
+        >>> game_tvi = calculate_tvi(events_df, playtime_df)
+        >>> cis = bootstrap_tvi(game_tvi, n_resamples=2000, seed=42)
+        >>> cis[['player_id', 'TVI', 'TVI_ci_low', 'TVI_ci_high']].head()
+    """
+    if tvi_df.empty:
+        raise ValueError("tvi_df cannot be empty")
+    if not 0 < ci < 1:
+        raise ValueError("ci must be between 0 and 1")
+    if n_resamples < 1:
+        raise ValueError("n_resamples must be at least 1")
+
+    score_cols = list(score_cols)
+    keys = [player_id_col] + (list(group_cols) if group_cols else [])
+    missing = [col for col in keys + [playtime_col] + score_cols if col not in tvi_df.columns]
+    if missing:
+        raise KeyError(f"Missing columns in tvi_df: {missing}")
+
+    rng = np.random.default_rng(seed)
+
+    # Lay out games contiguously per player
+    data = tvi_df[keys + [playtime_col] + score_cols].sort_values(keys, kind='stable')
+    group_index = data.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+    n_players = group_index.max() + 1
+    n_games = np.bincount(group_index, minlength=n_players)
+    starts = np.concatenate(([0], np.cumsum(n_games)[:-1]))
+    max_games = int(n_games.max())
+
+    weights = data[playtime_col].to_numpy(dtype=float)
+    scores = data[score_cols].to_numpy(dtype=float)
+    weighted = scores * weights[:, None]
+
+    # Padding slots beyond a player's game count get zero weight
+    valid = (np.arange(max_games)[None, :] < n_games[:, None])[:, None, :]
+
+    batch = max(1, min(n_resamples, max_batch_elements // max(1, n_players * max_games)))
+    samples = np.empty((len(score_cols), n_players, n_resamples))
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        draws = rng.random((n_players, size, max_games))
+        idx = starts[:, None, None] + (draws * n_games[:, None, None]).astype(np.int64)
+        idx = np.where(valid, idx, 0)
+        w = np.where(valid, weights[idx], 0.0)
+        total_w = w.sum(axis=2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for k in range(len(score_cols)):
+                ws = np.where(valid, weighted[idx, k], 0.0).sum(axis=2)
+                samples[k, :, start:start + size] = ws / total_w
+
+    alpha = (1 - ci) / 2
+    result = data[keys].drop_duplicates().reset_index(drop=True)
+    result['n_games'] = n_games
+    total = np.bincount(group_index, weights=weights, minlength=n_players)
+    result[playtime_col] = total
+    with np.errstate(invalid='ignore', divide='ignore'):
+        point = np.stack([np.bincount(group_index, weights=weighted[:, k], minlength=n_players)
+                          for k in range(len(score_cols))]) / total
+    bounds = np.nanquantile(samples, [alpha, 1 - alpha], axis=2) if n_resamples > 1 \
+        else np.stack([samples[:, :, 0], samples[:, :, 0]])
+    se = np.nanstd(samples, axis=2, ddof=1) if n_resamples > 1 else np.full(point.shape, np.nan)
+
+    for k, col in enumerate(score_cols):
+        result[col] = point[k]
+        result[f'{col}_se'] = se[k]
+        result[f'{col}_ci_low'] = bounds[0, k]
+        result[f'{col}_ci_high'] = bounds[1, k]
+
+    return result.sort_values(score_cols[0], ascending=False).reset_index(drop=True)
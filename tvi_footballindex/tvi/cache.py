@@ -0,0 +1,303 @@
+"""
+Result cache for TVI calculations
+
+Memoizes calculate_tvi and aggregate_tvi_by_player on a content hash of the
+input columns they read plus every parameter, so re-running a notebook cell with
+the same data returns the stored result instead of recomputing it. Results are
+kept in an in-memory LRU tier bounded by entry count and bytes, with an optional
+on-disk tier that survives restarts.
+
+Part of the tvi_footballindex library.
+"""
+
+import hashlib
+import inspect
+import os
+import pickle
+from collections import OrderedDict
+
+import pandas as pd
+
+from tvi_footballindex.tvi.calculator import calculate_tvi, aggregate_tvi_by_player
+
+
+def hash_frame(df, columns=None):
+    """
+    Fast content hash of DataFrame columns.
+
+    Rows are hashed with pandas' vectorised hash_pandas_object and the resulting
+    uint64 array is digested once, together with the column names and dtypes.
+
+    Args:
+        df (pd.DataFrame): DataFrame to hash.
+        columns (list, optional): Columns to include. Defaults to all columns.
+
+    Returns:
+        str: Hex digest identifying the content.
+    """
+    if columns is not None:
+        df = df[list(columns)]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(str(len(df)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class TVICache:
+    """
+    Two-tier LRU cache for TVI results keyed by content hash.
+
+    Args:
+        max_entries (int, optional): Maximum number of results kept in memory.
+            Defaults to 64.
+        max_bytes (int, optional): Maximum total memory of the in-memory results.
+            Defaults to 512 MB.
+        disk_dir (str, optional): Folder for the on-disk tier. Defaults to None
+            (memory only).
+        max_disk_bytes (int, optional): Maximum total size of the on-disk tier;
+            least recently used files are deleted beyond it. Defaults to 2 GB.
+
+    Attributes:
+        stats (dict): 'hits', 'disk_hits', 'misses', 'evictions' and
+            'disk_evictions' counters.
+
+    Example:
+        >>> cache = TVICache(disk_dir=".tvi_cache")
+        >>> tvi_df = cache.calculate_tvi(events_df, playtime_df)   # computed
+        >>> tvi_df = cache.calculate_tvi(events_df, playtime_df)   # from cache
+        >>> cache.stats
+    """
+
+    def __init__(self, max_entries=64, max_bytes=512 * 2**20, disk_dir=None, max_disk_bytes=2 * 2**30):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()   # key -> (result, nbytes)
+        self._bytes = 0
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_evictions': 0}
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries or (self.disk_dir is not None and os.path.exists(self._path(key)))
+
+    @property
+    def nbytes(self):
+        """Memory used by the in-memory tier."""
+        return self._bytes
+
+    # Keys -----------------------------------------------------------------------------------
+
+    @staticmethod
+    def make_key(func_name, frames, params):
+        """
+        Build a cache key from a function name, (DataFrame, columns) pairs and parameters.
+
+        Args:
+            func_name (str): Name of the cached function.
+            frames (list): (DataFrame, columns or None) pairs hashed by content.
+            params (dict): Remaining parameters; hashed through their repr.
+
+        Returns:
+            str: Cache key.
+        """
+        digest = hashlib.blake2b(func_name.encode(), digest_size=16)
+        for df, columns in frames:
+            digest.update(hash_frame(df, columns).encode())
+        digest.update(repr(sorted(params.items())).encode())
+        return digest.hexdigest()
+
+    # Storage --------------------------------------------------------------------------------
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Return the cached result for key, or None."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0].copy()
+        if self.disk_dir is not None:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    result = pickle.load(f)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                result = None
+            if result is not None:
+                os.utime(path)  # mark as recently used for disk eviction
+                self.stats['disk_hits'] += 1
+                self._store(key, result)
+                return result.copy()
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key, result):
+        """Store a result under key in both tiers."""
+        self._store(key, result.copy())
+        if self.disk_dir is not None:
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self._evict_disk()
+
+    def _store(self, key, result):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        nbytes = _frame_bytes(result)
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = (result, nbytes)
+        self._bytes += nbytes
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_bytes) = self._entries.popitem(last=False)
+            self._bytes -= evicted_bytes
+            self.stats['evictions'] += 1
+
+    def _evict_disk(self):
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+            self.stats['disk_evictions'] += 1
+
+    def clear(self, disk=False):
+        """Empty the in-memory tier, and the on-disk tier if disk=True."""
+        self._entries.clear()
+        self._bytes = 0
+        if disk and self.disk_dir is not None:
+            for entry in os.scandir(self.disk_dir):
+                if entry.name.endswith(".pkl"):
+                    os.remove(entry.path)
+
+    # Cached functions -----------------------------------------------------------------------
+
+    def calculate_tvi(self, events_df, playtime_df, **kwargs):
+        """
+        calculate_tvi() through the cache.
+
+        The key covers the event columns calculate_tvi reads, the whole playtime
+        table (all of its columns appear in the output) and every parameter,
+        including defaults, so changing C, zone_map or a column name is a miss.
+
+        Args:
+            events_df (pd.DataFrame): As in calculate_tvi.
+            playtime_df (pd.DataFrame): As in calculate_tvi.
+            **kwargs: Any calculate_tvi parameters.
+
+        Returns:
+            pd.DataFrame: Same as calculate_tvi (a copy of the cached result).
+        """
+        params = _bound_params(calculate_tvi, kwargs, exclude=('events_df', 'playtime_df', 'validated'))
+        if params.get('xt_grid') is not None:
+            params['xt_grid'] = hashlib.blake2b(params['xt_grid'].values.tobytes(), digest_size=16).hexdigest()
+        if params.get('possessions_df') is not None:
+            params['possessions_df'] = hash_frame(params['possessions_df'])
+        event_cols = [params[name] for name in ('game_id_col', 'team_id_col', 'player_id_col',
+                                                'event_name_col', 'x_col', 'y_col')]
+        missing = [col for col in event_cols if col not in events_df.columns]
+        if missing:
+            raise KeyError(f"Missing columns in events_df: {missing}")
+        key = self.make_key('calculate_tvi', [(events_df, event_cols), (playtime_df, None)], params)
+        result = self.get(key)
+        if result is None:
+            result = calculate_tvi(events_df, playtime_df, **kwargs)
+            self.put(key, result)
+        return result
+
+    def aggregate_tvi_by_player(self, tvi_df, **kwargs):
+        """
+        aggregate_tvi_by_player() through the cache.
+
+        Args:
+            tvi_df (pd.DataFrame): As in aggregate_tvi_by_player.
+            **kwargs: Any aggregate_tvi_by_player parameters.
+
+        Returns:
+            pd.DataFrame: Same as aggregate_tvi_by_player (a copy of the cached result).
+        """
+        params = _bound_params(aggregate_tvi_by_player, kwargs, exclude=('tvi_df',))
+        key = self.make_key('aggregate_tvi_by_player', [(tvi_df, None)], params)
+        result = self.get(key)
+        if result is None:
+            result = aggregate_tvi_by_player(tvi_df, **kwargs)
+            self.put(key, result)
+        return result
+
+
+def _bound_params(func, kwargs, exclude):
+    signature = inspect.signature(func)
+    unknown = [name for name in kwargs if name not in signature.parameters]
+    if unknown:
+        raise TypeError(f"{func.__name__}() got unexpected arguments: {unknown}")
+    params = {name: p.default for name, p in signature.parameters.items() if name not in exclude}
+    params.update({name: value for name, value in kwargs.items() if name not in exclude})
+    return params
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Process-wide in-memory TVICache used by the cached_* functions."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TVICache()
+    return _default_cache
+
+
+def cached_calculate_tvi(events_df, playtime_df, cache=None, **kwargs):
+    """
+    Memoized calculate_tvi().
+
+    Args:
+        events_df (pd.DataFrame): As in calculate_tvi.
+        playtime_df (pd.DataFrame): As in calculate_tvi.
+        cache (TVICache, optional): Cache to use. Defaults to default_cache().
+        **kwargs: Any calculate_tvi parameters.
+
+    Returns:
+        pd.DataFrame: Same as calculate_tvi.
+
+    Example:
+        >>> tvi_df = cached_calculate_tvi(events_df, playtime_df, C=2.0)
+    """
+    # An empty TVICache is falsy (__len__), so test for None explicitly
+    cache = cache if cache is not None else default_cache()
+    return cache.calculate_tvi(events_df, playtime_df, **kwargs)
+
+
+def cached_aggregate_tvi_by_player(tvi_df, cache=None, **kwargs):
+    """
+    Memoized aggregate_tvi_by_player().
+
+    Args:
+        tvi_df (pd.DataFrame): As in aggregate_tvi_by_player.
+        cache (TVICache, optional): Cache to use. Defaults to default_cache().
+        **kwargs: Any aggregate_tvi_by_player parameters.
+
+    Returns:
+        pd.DataFrame: Same as aggregate_tvi_by_player.
+    """
+    cache = cache if cache is not None else default_cache()
+    return cache.aggregate_tvi_by_player(tvi_df, **kwargs)
@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
 from tvi_footballindex.utils import helpers
+from tvi_footballindex.utils.interning import mark_interned
+from tvi_footballindex.tvi.validation import validate_inputs
+from tvi_footballindex.tvi.backends import PandasBackend, get_backend
 
 def calculate_tvi(
     events_df,
@@ -14,7 +18,13 @@ def calculate_tvi(
     C=90/44,
     zone_map=[[2, 4, 6],
               [1, 3, 5], 
-              [2, 4, 6]]
+              [2, 4, 6]],
+    validated=None,
+    low_memory=False,
+    backend='pandas',
+    interner=None,
+    xt_grid=None,
+    possessions_df=None
 ):
     """
     Calculate the Tactical Versatility Index (TVI) for players based on their actions and playtime.
@@ -36,7 +46,38 @@ def calculate_tvi(
         playtime_col (str, optional): Column name for playing time in minutes. Defaults to 'play_time'.
         C (float, optional): Scaling constant for TVI calculation. Higher values increase scores.
             Defaults to 90/44 ≈ 2.05.
-        zone_map (list, optional): 2D list defining pitch zones. If None, uses default 3x3 grid.
+        zone_map (list or ZoneMap, optional): 2D list defining pitch zones, or a ZoneMap of polygon
+            and rectangle zones. If None, uses default 3x3 grid.
+        validated (ValidationToken, optional): Token from validate_inputs() for these same
+            DataFrames and column names. If it matches, the input checks are skipped.
+            Defaults to None.
+        low_memory (bool, optional): If True, only the six needed columns are read, keys and
+            action-zones are handled as integer codes and no wide event-zone table is built,
+            so peak memory stays close to the size of the output. The per action-zone count
+            columns are then not included in the output. This is a pandas code path, so it
+            needs backend='pandas'. Defaults to False.
+        backend (str or TVIBackend, optional): Dataframe engine used for the computation:
+            'pandas' or 'polars' (multi-threaded, requires the polars package), or a
+            TVIBackend instance. All backends return the same pandas DataFrame.
+            Defaults to 'pandas'.
+        interner (IDInterner, optional): If given, game, team and player IDs of both
+            frames are interned to int32 codes before the join (so e.g. 123, 123.0 and
+            "123" match) and restored to their canonical string form in the output.
+            Columns marked as interned (frames from the parser, calculate_player_playtime
+            or encode_frame, see utils.interning.mark_interned) are used as-is.
+            Defaults to None.
+        xt_grid (XTGrid, optional): Expected Threat grid (see tvi.xt.XTGrid). If given, every
+            action-zone combination a player used counts with the mean xT of its events,
+            relative to the mean xT of all events, and the output gains the columns
+            weighted_diversity and TVI_weighted (C * weighted_diversity / play_time,
+            clipped at 1). Defaults to None.
+        possessions_df (pd.DataFrame, optional): Possessions per team and game with game_id,
+            team_id and 'possessions' columns (see parsing.possessions.get_possession_counts).
+            If given, the output gains 'possessions' (of the player's team in the game) and
+            TVI_possession, where playing time is scaled by the team's possessions relative
+            to the average matched team-game: C * action_diversity / (play_time * possessions /
+            mean possessions), clipped at 1; NaN for team-games missing from possessions_df.
+            Defaults to None.
 
     Returns:
         pd.DataFrame: DataFrame with TVI scores and metrics for each player-game combination.
@@ -45,10 +86,13 @@ def calculate_tvi(
             - TVI: Main versatility score (0-1, higher = more versatile)
             - TVI_entropy: Alternative entropy-based score
             - shannon_entropy: Raw entropy of action distribution
+            - weighted_diversity, TVI_weighted: xT-weighted variants (only with xt_grid)
+            - possessions, TVI_possession: possession-normalised variant (only with possessions_df)
 
     Raises:
         KeyError: If required columns are missing from input DataFrames.
-        ValueError: If DataFrames are empty or contain invalid data.
+        ValueError: If DataFrames are empty or contain invalid data, if the backend is
+            unknown, or if low_memory is combined with a backend other than pandas.
 
     Example:
         >>> events = pd.DataFrame({
@@ -63,23 +107,34 @@ def calculate_tvi(
         ... })
         >>> tvi_df = calculate_tvi(events, playtime)
     """
-    # Input validation
-    if events_df.empty:
-        raise ValueError("events_df cannot be empty")
-    if playtime_df.empty:
-        raise ValueError("playtime_df cannot be empty")
-    
-    # Check required columns
-    required_event_cols = [player_id_col, event_name_col, x_col, y_col, game_id_col, team_id_col]
-    required_playtime_cols = [player_id_col, playtime_col, game_id_col, team_id_col]
-    
-    missing_event_cols = [col for col in required_event_cols if col not in events_df.columns]
-    missing_playtime_cols = [col for col in required_playtime_cols if col not in playtime_df.columns]
-    
-    if missing_event_cols:
-        raise KeyError(f"Missing columns in events_df: {missing_event_cols}")
-    if missing_playtime_cols:
-        raise KeyError(f"Missing columns in playtime_df: {missing_playtime_cols}")
+    # Input validation (skipped when validate_inputs already covered these frames)
+    already_validated = validated is not None and validated.matches(
+        events_df, playtime_df,
+        player_id_col=player_id_col, event_name_col=event_name_col, x_col=x_col, y_col=y_col,
+        game_id_col=game_id_col, team_id_col=team_id_col, playtime_col=playtime_col
+    )
+    if not already_validated:
+        if events_df.empty:
+            raise ValueError("events_df cannot be empty")
+        if playtime_df.empty:
+            raise ValueError("playtime_df cannot be empty")
+
+        # Check required columns
+        required_event_cols = [player_id_col, event_name_col, x_col, y_col, game_id_col, team_id_col]
+        required_playtime_cols = [player_id_col, playtime_col, game_id_col, team_id_col]
+
+        missing_event_cols = [col for col in required_event_cols if col not in events_df.columns]
+        missing_playtime_cols = [col for col in required_playtime_cols if col not in playtime_df.columns]
+
+        if missing_event_cols:
+            raise KeyError(f"Missing columns in events_df: {missing_event_cols}")
+        if missing_playtime_cols:
+            raise KeyError(f"Missing columns in playtime_df: {missing_playtime_cols}")
+
+    # Resolved up front so an unknown backend fails even when low_memory skips it
+    tvi_backend = get_backend(backend)
+    if low_memory and not isinstance(tvi_backend, PandasBackend):
+        raise ValueError(f"low_memory=True is a pandas code path and cannot be combined with backend={backend!r}")
 
     # Use default zone map if none provided
     if zone_map is None:
@@ -89,14 +144,106 @@ def calculate_tvi(
             [2, 4, 6]
         ]
 
+    if possessions_df is not None:
+        missing_possession_cols = [col for col in [game_id_col, team_id_col, 'possessions']
+                                   if col not in possessions_df.columns]
+        if missing_possession_cols:
+            raise KeyError(f"Missing columns in possessions_df: {missing_possession_cols}")
+
+    if interner is not None:
+        id_columns = {game_id_col: 'game', team_id_col: 'team', player_id_col: 'player'}
+        events_df = interner.encode_frame(events_df, id_columns)
+        playtime_df = interner.encode_frame(playtime_df, id_columns)
+        if possessions_df is not None:
+            possessions_df = interner.encode_frame(possessions_df, id_columns)
+
+    if low_memory:
+        tvi = _calculate_tvi_low_memory(
+            events_df, playtime_df, player_id_col, event_name_col, x_col, y_col,
+            game_id_col, team_id_col, playtime_col, C, zone_map
+        )
+    else:
+        tvi = tvi_backend.calculate_tvi(
+            events_df, playtime_df,
+            player_id_col=player_id_col, event_name_col=event_name_col, x_col=x_col, y_col=y_col,
+            game_id_col=game_id_col, team_id_col=team_id_col, playtime_col=playtime_col,
+            C=C, zone_map=zone_map
+        )
+
+    if xt_grid is not None:
+        # Output rows follow playtime_df in every backend
+        tvi['weighted_diversity'] = _weighted_action_diversity(
+            events_df, playtime_df, player_id_col, event_name_col, x_col, y_col,
+            game_id_col, team_id_col, zone_map, xt_grid
+        )
+        playtime = tvi[playtime_col].to_numpy(dtype=float)
+        valid_playtime = playtime > 0
+        safe_playtime = np.where(valid_playtime, playtime, 1.0)
+        tvi['TVI_weighted'] = np.minimum(
+            np.where(valid_playtime, C * tvi['weighted_diversity'] / safe_playtime, 0.0), 1
+        )
+
+    if possessions_df is not None:
+        team_keys = [game_id_col, team_id_col]
+        possession_index = pd.MultiIndex.from_frame(possessions_df[team_keys])
+        rows = possession_index.get_indexer(pd.MultiIndex.from_frame(tvi[team_keys]))
+        possessions = possessions_df['possessions'].to_numpy(dtype=float)
+        matched = rows >= 0
+        tvi['possessions'] = np.where(matched, possessions[rows], np.nan)
+        # Reference: the average over the team-games that are actually scored
+        mean_possessions = possessions[np.unique(rows[matched])].mean() if matched.any() else np.nan
+        exposure = tvi[playtime_col].to_numpy(dtype=float) * tvi['possessions'].to_numpy() / mean_possessions
+        valid_exposure = exposure > 0
+        safe_exposure = np.where(valid_exposure, exposure, 1.0)
+        score = np.minimum(np.where(valid_exposure, C * tvi['action_diversity'] / safe_exposure, 0.0), 1)
+        # Unknown possessions give an unknown score, not 0
+        tvi['TVI_possession'] = np.where(np.isnan(exposure), np.nan, score)
+
+    if interner is not None:
+        # Every ID column was encoded above, whatever marks the backend carried over
+        tvi = interner.decode_frame(mark_interned(tvi, list(id_columns)), id_columns)
+    return tvi
+
+
+def _weighted_action_diversity(events_df, playtime_df, player_id_col, event_name_col, x_col, y_col,
+                               game_id_col, team_id_col, zone_map, xt_grid):
+    """xT-weighted action diversity per playtime_df row; see calculate_tvi(xt_grid=...)."""
+    keys = [game_id_col, team_id_col, player_id_col]
+    playtime_keys = pd.MultiIndex.from_frame(playtime_df[keys])
+    unique_keys = playtime_keys.unique()
+    event_codes = unique_keys.get_indexer(pd.MultiIndex.from_frame(events_df[keys]))
+
+    x = events_df[x_col].to_numpy(dtype=float)
+    y = events_df[y_col].to_numpy(dtype=float)
+    name_codes, names = pd.factorize(events_df[event_name_col])
+    zone_codes, zones = pd.factorize(helpers.assign_zones_array(x, y, zone_map=zone_map))
+    values = xt_grid.value_at(x, y)
+
+    valid = (event_codes >= 0) & (name_codes >= 0)
+    n_event_zones = max(1, len(names) * len(zones))
+    combined = event_codes[valid].astype(np.int64) * n_event_zones + name_codes[valid] * len(zones) + zone_codes[valid]
+    values = values[valid]
+    mean_value = values.mean() if len(values) else 0.0
+    if mean_value <= 0:
+        return np.zeros(len(playtime_df))
+
+    # Mean xT of each (player-game, action-zone) pair, relative to the mean over all events
+    pairs, inverse, counts = np.unique(combined, return_inverse=True, return_counts=True)
+    pair_values = np.bincount(inverse, weights=values, minlength=len(pairs)) / counts / mean_value
+    weighted = np.bincount(pairs // n_event_zones, weights=pair_values, minlength=len(unique_keys))
+    return weighted[unique_keys.get_indexer(playtime_keys)]
+
+
+def _calculate_tvi_pandas(events_df, playtime_df, player_id_col, event_name_col, x_col, y_col,
+                          game_id_col, team_id_col, playtime_col, C, zone_map):
+    """Core of calculate_tvi for the pandas backend."""
     # Work with copies to avoid modifying originals
     events = events_df.copy()
     playtime = playtime_df.copy()
 
     # Assign zones to each event
-    events['zone'] = events.apply(
-        lambda row: helpers.assign_zones(row[x_col], row[y_col], zone_map=zone_map), 
-        axis=1
+    events['zone'] = helpers.assign_zones_array(
+        events[x_col].to_numpy(), events[y_col].to_numpy(), zone_map=zone_map
     )
 
     # Group by event type and zone to count occurrences
@@ -154,11 +301,66 @@ def calculate_tvi(
     return tvi
 
 
+def _calculate_tvi_low_memory(events_df, playtime_df, player_id_col, event_name_col, x_col, y_col,
+                              game_id_col, team_id_col, playtime_col, C, zone_map):
+    """calculate_tvi without copies or wide intermediates; see calculate_tvi(low_memory=True)."""
+    keys = [game_id_col, team_id_col, player_id_col]
+
+    # Player-game codes come from the playtime keys, so events are joined by lookup, not merge
+    playtime_keys = pd.MultiIndex.from_frame(playtime_df[keys])
+    unique_keys = playtime_keys.unique()
+    playtime_codes = unique_keys.get_indexer(playtime_keys)
+    event_codes = unique_keys.get_indexer(pd.MultiIndex.from_frame(events_df[keys]))
+    n_groups = len(unique_keys)
+
+    # Integer action-zone code per event
+    name_codes, names = pd.factorize(events_df[event_name_col])
+    zone_codes, zones = pd.factorize(
+        helpers.assign_zones_array(events_df[x_col].to_numpy(), events_df[y_col].to_numpy(), zone_map=zone_map)
+    )
+    n_event_zones = max(1, len(names) * len(zones))
+    combined = event_codes.astype(np.int64) * n_event_zones + name_codes * len(zones) + zone_codes
+    # Drop events without a playtime row or without an event name
+    combined = combined[(event_codes >= 0) & (name_codes >= 0)]
+    del name_codes, zone_codes, event_codes
+
+    # Count each (player-game, action-zone) pair, then reduce per player-game
+    pairs, counts = np.unique(combined, return_counts=True)
+    del combined
+    group_of_pair = pairs // n_event_zones
+    counts = counts.astype(float)
+    action_diversity = np.bincount(group_of_pair, minlength=n_groups).astype(float)
+    totals = np.bincount(group_of_pair, weights=counts, minlength=n_groups)
+    clogc = np.bincount(group_of_pair, weights=counts * np.log2(counts), minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shannon_entropy = np.where(totals > 0, np.log2(totals) - clogc / totals, 0.0)
+    shannon_entropy = np.clip(shannon_entropy, 0, None)
+
+    # Output rows follow playtime_df, like the right join in calculate_tvi
+    other_cols = [col for col in playtime_df.columns if col not in keys]
+    tvi = playtime_df[keys].reset_index(drop=True)
+    tvi['action_diversity'] = action_diversity[playtime_codes]
+    tvi['shannon_entropy'] = shannon_entropy[playtime_codes]
+    for col in other_cols:
+        tvi[col] = playtime_df[col].to_numpy()
+    tvi = tvi.fillna(0)
+
+    playtime = tvi[playtime_col].to_numpy(dtype=float)
+    valid_playtime = playtime > 0
+    safe_playtime = np.where(valid_playtime, playtime, 1.0)
+    tvi['TVI_entropy'] = np.minimum(np.where(valid_playtime, tvi['shannon_entropy'] / safe_playtime, 0.0), 1)
+    tvi['TVI'] = np.minimum(np.where(valid_playtime, C * tvi['action_diversity'] / safe_playtime, 0.0), 1)
+
+    return tvi
+
+
 def aggregate_tvi_by_player(
     tvi_df,
     player_id_col='player_id',
     playtime_col='play_time',
-    position_col='position'
+    position_col='position',
+    group_cols=None,
+    backend='pandas'
 ):
     """
     Aggregate TVI metrics by player across all games.
@@ -171,6 +373,10 @@ def aggregate_tvi_by_player(
         playtime_col (str, optional): Column name for playtime. Defaults to 'play_time'.
         position_col (str, optional): Column name for positions. Defaults to 'position'.
             If column doesn't exist, this parameter is ignored.
+        group_cols (list, optional): Extra key columns to keep separate, e.g.
+            ['competition_id', 'season_id'] for one row per player-season. Defaults to None.
+        backend (str or TVIBackend, optional): Dataframe engine, as in calculate_tvi.
+            Defaults to 'pandas'.
 
     Returns:
         pd.DataFrame: Aggregated DataFrame with one row per player, sorted by TVI descending.
@@ -193,6 +399,19 @@ def aggregate_tvi_by_player(
     if playtime_col not in tvi_df.columns:
         raise KeyError(f"Column '{playtime_col}' not found in tvi_df")
 
+    group_cols = list(group_cols) if group_cols else []
+    missing_group_cols = [col for col in group_cols if col not in tvi_df.columns]
+    if missing_group_cols:
+        raise KeyError(f"Columns {missing_group_cols} not found in tvi_df")
+    keys = [player_id_col] + group_cols
+
+    return get_backend(backend).aggregate_tvi_by_player(
+        tvi_df, keys=keys, playtime_col=playtime_col, position_col=position_col
+    )
+
+
+def _aggregate_tvi_by_player_pandas(tvi_df, keys, playtime_col, position_col):
+    """Core of aggregate_tvi_by_player for the pandas backend."""
     tvi_final = tvi_df.copy()
 
     # Check if position column exists
@@ -204,38 +423,38 @@ def aggregate_tvi_by_player(
         cols_to_drop.append(position_col)
     
     # Only drop columns that exist
-    cols_to_drop = [col for col in cols_to_drop if col in tvi_final.columns]
+    cols_to_drop = [col for col in cols_to_drop if col in tvi_final.columns and col not in keys]
     
     # Weighted average of metrics
     tvi_aggregated = (tvi_final.drop(columns=cols_to_drop)
-                     .groupby([player_id_col])
+                     .groupby(keys)
                      .apply(helpers.weighted_avg, weight_column=playtime_col)
                      .reset_index())
     
     # Handle position data if available
     if has_position:
         # Find most played position
-        position_time = (tvi_df.groupby([player_id_col, position_col])[playtime_col]
+        position_time = (tvi_df.groupby(keys + [position_col])[playtime_col]
                         .sum().reset_index())
         most_played_position = position_time.loc[
-            position_time.groupby(player_id_col)[playtime_col].idxmax()
-        ][[player_id_col, position_col]].rename(columns={position_col: 'main_position'})
+            position_time.groupby(keys)[playtime_col].idxmax()
+        ][keys + [position_col]].rename(columns={position_col: 'main_position'})
         
         # Merge position data
         tvi_aggregated = pd.merge(
             tvi_aggregated, most_played_position, 
-            on=[player_id_col], how='left'
+            on=keys, how='left'
         )
 
     # Calculate total playtime
-    total_play_time = (tvi_df.groupby([player_id_col])[playtime_col]
+    total_play_time = (tvi_df.groupby(keys)[playtime_col]
                       .sum().reset_index()
                       .rename(columns={playtime_col: 'total_play_time'}))
 
     # Merge total playtime
     tvi_aggregated = pd.merge(
         tvi_aggregated, total_play_time, 
-        on=[player_id_col], how='left'
+        on=keys, how='left'
     )
 
     # Final adjustments
@@ -248,17 +467,83 @@ def aggregate_tvi_by_player(
     return tvi_aggregated.sort_values('TVI', ascending=False)
 
 
+def count_event_zones(
+    events_df,
+    player_id_col='player_id',
+    event_name_col='event_name',
+    x_col='x',
+    y_col='y',
+    game_id_col='game_id',
+    team_id_col='team_id',
+    zone_map=[[2, 4, 6],
+              [1, 3, 5],
+              [2, 4, 6]]
+):
+    """
+    Count each player's events per action-zone combination in every game.
+
+    This is the long-format event-zone count table that calculate_tvi pivots into
+    columns. Keeping it long makes it cheap to roll up to other levels (teams,
+    lineup units, opponents) before computing diversity.
+
+    Args:
+        events_df (pd.DataFrame): DataFrame containing player actions with coordinates.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        event_name_col (str, optional): Column name for event types. Defaults to 'event_name'.
+        x_col (str, optional): Column name for x-coordinate (0-100 scale). Defaults to 'x'.
+        y_col (str, optional): Column name for y-coordinate (0-100 scale). Defaults to 'y'.
+        game_id_col (str, optional): Column name for game IDs. Defaults to 'game_id'.
+        team_id_col (str, optional): Column name for team IDs. Defaults to 'team_id'.
+        zone_map (list or ZoneMap, optional): 2D list defining pitch zones, or a ZoneMap of polygon
+            and rectangle zones. Defaults to the 3x3 grid.
+
+    Returns:
+        pd.DataFrame: Columns game_id, team_id, player_id, event_zone ('<event>_<zone>')
+            and count, one row per non-zero combination.
+
+    Raises:
+        KeyError: If required columns are missing.
+    """
+    required_cols = [player_id_col, event_name_col, x_col, y_col, game_id_col, team_id_col]
+    missing_cols = [col for col in required_cols if col not in events_df.columns]
+    if missing_cols:
+        raise KeyError(f"Missing columns in events_df: {missing_cols}")
+
+    if zone_map is None:
+        zone_map = [
+            [2, 4, 6],
+            [1, 3, 5],
+            [2, 4, 6]
+        ]
+
+    keys = [game_id_col, team_id_col, player_id_col]
+    zones = helpers.assign_zones_array(events_df[x_col], events_df[y_col], zone_map=zone_map)
+    event_zone = events_df[event_name_col].astype(str) + '_' + pd.Series(zones, index=events_df.index).astype(str)
+
+    counts = (events_df[keys]
+              .assign(event_zone=event_zone)
+              .groupby(keys + ['event_zone'], sort=False)
+              .size()
+              .reset_index(name='count'))
+    return counts
+
+
 def validate_data_format(events_df, playtime_df, **kwargs):
     """
     Validate input data format and provide helpful error messages.
     
+    All checks run in one fused pass per table (see validate_inputs), which also
+    reports duplicate playtime keys and events without a playtime row.
+
     Args:
         events_df (pd.DataFrame): Events DataFrame to validate
         playtime_df (pd.DataFrame): Playtime DataFrame to validate
-        **kwargs: Column name parameters (same as calculate_tvi)
+        **kwargs: Column name parameters (same as calculate_tvi), plus optional
+            'sample' and 'seed' to validate a random sample of events
     
     Returns:
-        dict: Validation results with 'valid' (bool) and 'messages' (list)
+        dict: Validation results with 'valid' (bool) and 'messages' (list), plus
+            'notes', 'stats' and 'token' as returned by validate_inputs
     
     Example:
         >>> result = validate_data_format(events_df, playtime_df)
@@ -266,83 +551,4 @@ def validate_data_format(events_df, playtime_df, **kwargs):
         ...     for msg in result['messages']:
         ...         print(f"⚠️  {msg}")
     """
-    messages = []
-    valid = True
-    
-    # Extract column names
-    player_id_col = kwargs.get('player_id_col', 'player_id')
-    event_name_col = kwargs.get('event_name_col', 'event_name')
-    x_col = kwargs.get('x_col', 'x')
-    y_col = kwargs.get('y_col', 'y')
-    game_id_col = kwargs.get('game_id_col', 'game_id')
-    team_id_col = kwargs.get('team_id_col', 'team_id')
-    playtime_col = kwargs.get('playtime_col', 'play_time')
-    
-    # Check DataFrame existence and emptiness
-    if events_df is None or events_df.empty:
-        messages.append("events_df is empty or None")
-        valid = False
-    if playtime_df is None or playtime_df.empty:
-        messages.append("playtime_df is empty or None")
-        valid = False
-        
-    if not valid:
-        return {'valid': False, 'messages': messages}
-    
-    # Check required columns
-    required_event_cols = [player_id_col, event_name_col, x_col, y_col, game_id_col, team_id_col]
-    required_playtime_cols = [player_id_col, playtime_col, game_id_col, team_id_col]
-    
-    missing_event_cols = [col for col in required_event_cols if col not in events_df.columns]
-    missing_playtime_cols = [col for col in required_playtime_cols if col not in playtime_df.columns]
-    
-    if missing_event_cols:
-        messages.append(f"Missing columns in events_df: {missing_event_cols}")
-        messages.append(f"Available columns: {list(events_df.columns)}")
-        valid = False
-        
-    if missing_playtime_cols:
-        messages.append(f"Missing columns in playtime_df: {missing_playtime_cols}")
-        messages.append(f"Available columns: {list(playtime_df.columns)}")
-        valid = False
-    
-    if not valid:
-        return {'valid': False, 'messages': messages}
-    
-    # Check coordinate ranges
-    x_vals = events_df[x_col].dropna()
-    y_vals = events_df[y_col].dropna()
-    
-    if len(x_vals) > 0:
-        if x_vals.min() < 0 or x_vals.max() > 100:
-            messages.append(f"x coordinates should be 0-100, found range: {x_vals.min():.1f} to {x_vals.max():.1f}")
-    
-    if len(y_vals) > 0:
-        if y_vals.min() < 0 or y_vals.max() > 100:
-            messages.append(f"y coordinates should be 0-100, found range: {y_vals.min():.1f} to {y_vals.max():.1f}")
-    
-    # Check for null values in key columns
-    null_checks = [
-        (events_df[player_id_col].isnull().sum(), f"events_df.{player_id_col}"),
-        (events_df[event_name_col].isnull().sum(), f"events_df.{event_name_col}"),
-        (playtime_df[player_id_col].isnull().sum(), f"playtime_df.{player_id_col}"),
-        (playtime_df[playtime_col].isnull().sum(), f"playtime_df.{playtime_col}")
-    ]
-    
-    for null_count, col_name in null_checks:
-        if null_count > 0:
-            messages.append(f"Found {null_count} null values in {col_name}")
-    
-    # Check playtime values
-    playtime_vals = playtime_df[playtime_col].dropna()
-    if len(playtime_vals) > 0:
-        if playtime_vals.min() <= 0:
-            messages.append(f"All playtime values should be positive, found minimum: {playtime_vals.min()}")
-        if playtime_vals.max() > 120:
-            messages.append(f"Playtime values seem high (>120 min), maximum found: {playtime_vals.max()}")
-    
-    # Success message if all good
-    if not messages:
-        messages.append("✅ Data format validation passed!")
-    
-    return {'valid': len([m for m in messages if not m.startswith('✅')]) == 0, 'messages': messages}
\ No newline at end of file
+    return validate_inputs(events_df, playtime_df, **kwargs)
@@ -0,0 +1,331 @@
+"""
+Heatmap exports
+
+Bins the actions of every player (or player-season) into fixed-resolution
+count tensors of shape (players, actions, w, l) with one np.bincount over
+combined player/action/cell codes, and writes them next to a JSON index either
+as a raw .npy file that readers memory-map, or as a compressed .npz archive
+with one member per player. Either way a front-end can read one player's
+heatmaps without loading the others.
+
+Part of the tvi_footballindex library.
+"""
+
+import json
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from tvi_footballindex.utils import helpers
+
+
+HEATMAP_FORMATS = ('npy', 'npz')
+INDEX_FILE = 'index.json'
+
+
+def _cell_codes(x, y, l, w, x_min_max, y_min_max):
+    """Row-major cell of every point (rows along y, columns along x), clamped to the pitch."""
+    col = np.floor((x - x_min_max[0]) / (x_min_max[1] - x_min_max[0]) * l).astype(np.int64)
+    row = np.floor((y - y_min_max[0]) / (y_min_max[1] - y_min_max[0]) * w).astype(np.int64)
+    return np.clip(row, 0, w - 1) * l + np.clip(col, 0, l - 1)
+
+
+def heatmap_tensor(
+    events_df,
+    player_id_col='player_id',
+    event_name_col='event_name',
+    x_col='x',
+    y_col='y',
+    group_cols=None,
+    actions=None,
+    l=24,
+    w=16,
+    x_min_max=(0, 100),
+    y_min_max=(0, 100),
+    dtype=np.uint32
+):
+    """
+    Count every player's actions on an l x w grid.
+
+    Args:
+        events_df (pd.DataFrame): DataFrame containing player actions with coordinates.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        event_name_col (str, optional): Column name for event types. Defaults to 'event_name'.
+        x_col (str, optional): Column name for x-coordinate. Defaults to 'x'.
+        y_col (str, optional): Column name for y-coordinate. Defaults to 'y'.
+        group_cols (list, optional): Extra key columns, e.g. ['season_id'] for one heatmap
+            per player-season. Defaults to None.
+        actions (list, optional): Actions to keep, in tensor order. Defaults to all actions
+            in events_df, sorted by name.
+        l (int, optional): Number of cells along x. Defaults to 24.
+        w (int, optional): Number of cells along y. Defaults to 16.
+        x_min_max (tuple, optional): Pitch extent along x. Defaults to (0, 100).
+        y_min_max (tuple, optional): Pitch extent along y. Defaults to (0, 100).
+        dtype (np.dtype, optional): Count type of the tensor. Defaults to np.uint32.
+
+    Returns:
+        tuple: (tensor, keys, actions). tensor has shape (len(keys), len(actions), w, l),
+            keys is a DataFrame of the player keys in tensor order and actions the list
+            of action names.
+
+    Raises:
+        KeyError: If required columns are missing.
+        ValueError: If a count does not fit in dtype.
+
+    Example:
+        >>> tensor, keys, actions = heatmap_tensor(metric_events, l=24, w=16)
+        >>> tensor[0, actions.index('pass')]   # first player's pass heatmap
+    """
+    keys, actions, player_codes, codes = _heatmap_codes(
+        events_df, player_id_col, event_name_col, x_col, y_col, group_cols, actions, l, w, x_min_max, y_min_max)
+    counts = np.bincount(codes, minlength=len(keys) * len(actions) * w * l)
+    return _cast_counts(counts, dtype).reshape(len(keys), len(actions), w, l), keys, actions
+
+
+def _heatmap_codes(events_df, player_id_col, event_name_col, x_col, y_col, group_cols, actions,
+                   l, w, x_min_max, y_min_max):
+    """Player keys, actions and the (player, action, cell) code of every kept event, sorted."""
+    key_cols = [player_id_col] + (list(group_cols) if group_cols else [])
+    missing = [col for col in key_cols + [event_name_col, x_col, y_col] if col not in events_df.columns]
+    if missing:
+        raise KeyError(f"Missing columns in events_df: {missing}")
+
+    x = events_df[x_col].to_numpy(dtype=float)
+    y = events_df[y_col].to_numpy(dtype=float)
+    keep = ~(np.isnan(x) | np.isnan(y)) & events_df[player_id_col].notna().to_numpy()
+    if actions is None:
+        actions = sorted(events_df.loc[keep, event_name_col].dropna().unique().tolist())
+    actions = list(actions)
+    action_codes = pd.Index(actions).get_indexer(events_df[event_name_col])
+    keep &= action_codes >= 0
+
+    key_index = pd.MultiIndex.from_frame(events_df.loc[keep, key_cols]).unique().sort_values()
+    keys = key_index.to_frame(index=False)
+    player_codes = key_index.get_indexer(pd.MultiIndex.from_frame(events_df.loc[keep, key_cols]))
+
+    cells = _cell_codes(x[keep], y[keep], l, w, x_min_max, y_min_max)
+    codes = (player_codes.astype(np.int64) * len(actions) + action_codes[keep]) * (w * l) + cells
+    order = np.argsort(codes, kind='stable')
+    return keys, actions, player_codes[order], codes[order]
+
+
+def _cast_counts(counts, dtype):
+    if counts.size and counts.max() > np.iinfo(dtype).max:
+        raise ValueError(f"Counts up to {counts.max()} do not fit in {np.dtype(dtype).name}")
+    return counts.astype(dtype)
+
+
+def export_heatmaps(
+    events_df,
+    path,
+    format='npy',
+    player_id_col='player_id',
+    event_name_col='event_name',
+    x_col='x',
+    y_col='y',
+    group_cols=None,
+    actions=None,
+    l=24,
+    w=16,
+    x_min_max=(0, 100),
+    y_min_max=(0, 100),
+    dtype=np.uint32,
+    max_batch_elements=50_000_000
+):
+    """
+    Bin all player heatmaps and write them to a directory with an index.
+
+    The directory gets index.json (grid, actions, dtype and one entry per player
+    with its keys, row and number of events) and either heatmaps.npy ('npy', a
+    (players, actions, w, l) array written through a memory map and read back
+    with np.load(mmap_mode='r')) or heatmaps.npz ('npz', compressed, one
+    (actions, w, l) member per row named 'r<row>'). Players are binned in
+    batches, so the full tensor never has to fit in memory.
+
+    Args:
+        events_df (pd.DataFrame): DataFrame containing player actions with coordinates.
+        path (str): Output directory (created if needed).
+        format (str, optional): 'npy' or 'npz'. Defaults to 'npy'.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        event_name_col (str, optional): Column name for event types. Defaults to 'event_name'.
+        x_col (str, optional): Column name for x-coordinate. Defaults to 'x'.
+        y_col (str, optional): Column name for y-coordinate. Defaults to 'y'.
+        group_cols (list, optional): Extra key columns, e.g. ['season_id']. Defaults to None.
+        actions (list, optional): Actions to keep, in tensor order. Defaults to all actions.
+        l (int, optional): Number of cells along x. Defaults to 24.
+        w (int, optional): Number of cells along y. Defaults to 16.
+        x_min_max (tuple, optional): Pitch extent along x. Defaults to (0, 100).
+        y_min_max (tuple, optional): Pitch extent along y. Defaults to (0, 100).
+        dtype (np.dtype, optional): Count type. Defaults to np.uint32.
+        max_batch_elements (int, optional): Upper bound on the tensor cells binned at once.
+            Defaults to 50,000,000.
+
+    Returns:
+        HeatmapStore: Reader over the written files.
+
+    Raises:
+        KeyError: If required columns are missing.
+        ValueError: If format is unknown or a count does not fit in dtype.
+
+    Example:
+        >>> store = export_heatmaps(metric_events, 'heatmaps/2024', group_cols=['season_id'])
+        >>> store.player(('123', '2024'))
+    """
+    if format not in HEATMAP_FORMATS:
+        raise ValueError(f"Unknown heatmap format '{format}'. Use one of {HEATMAP_FORMATS}")
+
+    keys, actions, player_codes, codes = _heatmap_codes(
+        events_df, player_id_col, event_name_col, x_col, y_col, group_cols, actions, l, w, x_min_max, y_min_max)
+    n_players = len(keys)
+    per_player = len(actions) * w * l
+    shape = (n_players, len(actions), w, l)
+    os.makedirs(path, exist_ok=True)
+
+    batch = max(1, max_batch_elements // max(1, per_player))
+    bounds = np.searchsorted(player_codes, np.arange(0, n_players + batch, batch))
+    if format == 'npy':
+        data_file = 'heatmaps.npy'
+        tensor = np.lib.format.open_memmap(os.path.join(path, data_file), mode='w+', dtype=dtype, shape=shape)
+    else:
+        data_file = 'heatmaps.npz'
+        archive = zipfile.ZipFile(os.path.join(path, data_file), mode='w', compression=zipfile.ZIP_DEFLATED)
+    try:
+        for b, first in enumerate(range(0, n_players, batch)):
+            size = min(batch, n_players - first)
+            chunk = codes[bounds[b]:bounds[b + 1]] - first * per_player
+            counts = _cast_counts(np.bincount(chunk, minlength=size * per_player), dtype)
+            counts = counts.reshape(size, len(actions), w, l)
+            if format == 'npy':
+                tensor[first:first + size] = counts
+            else:
+                # One .npy member per player, written as soon as its batch is binned
+                for i in range(size):
+                    with archive.open(f"r{first + i}.npy", mode='w', force_zip64=True) as member:
+                        np.lib.format.write_array(member, counts[i], allow_pickle=False)
+    finally:
+        if format == 'npy':
+            tensor.flush()
+            del tensor
+        else:
+            archive.close()
+
+    n_events = np.bincount(player_codes, minlength=n_players)
+    index = {
+        'format': format,
+        'file': data_file,
+        'shape': list(shape),
+        'dtype': np.dtype(dtype).name,
+        'l': l,
+        'w': w,
+        'x_min_max': list(x_min_max),
+        'y_min_max': list(y_min_max),
+        'actions': [helpers.to_python(action) for action in actions],
+        'key_columns': list(keys.columns),
+        'players': [
+            {**{col: helpers.to_python(value) for col, value in zip(keys.columns, row)}, 'row': i,
+             'events': int(n_events[i])}
+            for i, row in enumerate(keys.itertuples(index=False, name=None))
+        ],
+    }
+    with open(os.path.join(path, INDEX_FILE), 'w') as f:
+        json.dump(index, f)
+    return HeatmapStore(path)
+
+
+class HeatmapStore:
+    """
+    Reader for a directory written by export_heatmaps.
+
+    Only the index is loaded up front; player() reads a single player's
+    heatmaps from the memory-mapped .npy file or the matching .npz member.
+
+    Args:
+        path (str): Directory written by export_heatmaps.
+
+    Attributes:
+        index (dict): The parsed index.json.
+        keys (pd.DataFrame): Player keys, with 'row' and 'events'.
+        actions (list): Action names in tensor order.
+
+    Example:
+        >>> store = HeatmapStore('heatmaps/2024')
+        >>> store.player(('123', '2024'), action='pass')   # (w, l) counts
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.path = path
+        self.actions = self.index['actions']
+        self.keys = pd.DataFrame(self.index['players'],
+                                 columns=self.index['key_columns'] + ['row', 'events'])
+        key_values = self.keys[self.index['key_columns']].itertuples(index=False, name=None)
+        self._rows = {helpers.key_str(key): row for key, row in zip(key_values, self.keys['row'])}
+        data_path = os.path.join(path, self.index['file'])
+        if self.index['format'] == 'npy':
+            self._data = np.load(data_path, mmap_mode='r')
+        else:
+            self._data = np.load(data_path)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return self._normalize_key(key) in self._rows
+
+    def __repr__(self):
+        return (f"HeatmapStore(players={len(self)}, actions={len(self.actions)}, "
+                f"grid={self.index['w']}x{self.index['l']}, format='{self.index['format']}')")
+
+    def _normalize_key(self, key):
+        return helpers.key_str(key if isinstance(key, tuple) else (key,))
+
+    def row_of(self, key):
+        """
+        Tensor row of a player key.
+
+        Args:
+            key: Player ID, or a tuple of key values (player ID first, then group_cols).
+
+        Returns:
+            int: The row.
+
+        Raises:
+            KeyError: If the key is not in the store.
+        """
+        row = self._rows.get(self._normalize_key(key))
+        if row is None:
+            raise KeyError(f"No heatmaps for {key!r}")
+        return row
+
+    def player(self, key, action=None):
+        """
+        One player's heatmaps.
+
+        Args:
+            key: Player ID, or a tuple of key values.
+            action (str, optional): Only return this action's heatmap. Defaults to None.
+
+        Returns:
+            np.ndarray: Counts of shape (actions, w, l), or (w, l) for a single action.
+
+        Raises:
+            KeyError: If the key or action is unknown.
+        """
+        row = self.row_of(key)
+        heatmaps = self._data[row] if self.index['format'] == 'npy' else self._data[f"r{row}"]
+        if action is None:
+            return np.asarray(heatmaps)
+        if action not in self.actions:
+            raise KeyError(f"Unknown action '{action}'. Available: {self.actions}")
+        return np.asarray(heatmaps[self.actions.index(action)])
+
+    __getitem__ = player
+
+    def close(self):
+        """Release the underlying file."""
+        if self.index['format'] == 'npz':
+            self._data.close()
+        self._data = None
@@ -0,0 +1,383 @@
+"""
+Passing networks
+
+Infers the receiver of every pass from the next in-play event of the same
+team and builds the passing networks of all team-games at once. Players are
+nodes keyed by (game_id, team_id, player_id), the keys calculate_tvi uses, and
+the passer -> receiver counts of a whole season form one block-diagonal
+sparse adjacency matrix (one block per team-game). Degrees, PageRank and
+zone-to-zone flows are computed for every block together with np.bincount, so
+SciPy is only needed to get the matrices themselves.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+import pandas as pd
+
+from tvi_footballindex.parsing.possessions import NON_PLAY_TYPES
+from tvi_footballindex.tvi.xt import PASS_ID, pass_end_coordinates
+from tvi_footballindex.utils.helpers import assign_zones_array
+
+
+def _import_scipy_sparse():
+    try:
+        from scipy import sparse
+    except ImportError:
+        raise ImportError(
+            "Sparse passing network matrices require the scipy package: pip install scipy"
+        ) from None
+    return sparse
+
+
+def infer_receivers(
+    match_events,
+    successful_only=True,
+    player_id_col='player_id',
+    game_id_col='game_id',
+    team_id_col='team_id'
+):
+    """
+    Find the receiver of every pass.
+
+    Events are ordered by game, period, minute, second and event ID, and
+    administrative events are skipped. The receiver is the player of the next
+    event if it belongs to the passing team and to a different player;
+    otherwise it is missing (the ball was lost, or the pass ended play).
+
+    Args:
+        match_events (pd.DataFrame): Parsed F24 events with type_id, outcome, period_id,
+            min, sec and x, y (event_id orders events within the same second).
+        successful_only (bool, optional): Only return successful passes. Defaults to True.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        game_id_col (str, optional): Column name for game IDs. Defaults to 'game_id'.
+        team_id_col (str, optional): Column name for team IDs. Defaults to 'team_id'.
+
+    Returns:
+        pd.DataFrame: The pass events (original columns) plus 'receiver_id', 'end_x' and
+            'end_y', in event order. End coordinates come from the pass_end_x/pass_end_y
+            columns when present, otherwise from qualifiers 140/141.
+
+    Raises:
+        KeyError: If required columns are missing.
+    """
+    required = [game_id_col, team_id_col, player_id_col, 'type_id', 'period_id', 'min', 'sec']
+    missing = [col for col in required if col not in match_events.columns]
+    if missing:
+        raise KeyError(f"Missing columns in match_events: {missing}")
+
+    n = len(match_events)
+    type_ids = match_events['type_id'].to_numpy()
+    in_play = ~np.isin(type_ids, NON_PLAY_TYPES)
+    event_ids = (match_events['event_id'].to_numpy() if 'event_id' in match_events.columns
+                 else np.arange(n))
+    game_codes = pd.factorize(match_events[game_id_col], sort=True)[0]
+    periods = match_events['period_id'].to_numpy()
+    order = np.lexsort((np.arange(n), event_ids, match_events['sec'].to_numpy(),
+                        match_events['min'].to_numpy(), periods, game_codes))
+    order = order[in_play[order]]
+
+    # Next in-play event in the same game and period
+    team_codes = pd.factorize(match_events[team_id_col])[0][order]
+    players = match_events[player_id_col].to_numpy()[order]
+    same_segment = ((game_codes[order][1:] == game_codes[order][:-1])
+                    & (periods[order][1:] == periods[order][:-1]))
+    next_players = np.append(players[1:], None).astype(object)
+    has_receiver = np.append(same_segment & (team_codes[1:] == team_codes[:-1]) & (team_codes[1:] >= 0), False)
+    has_receiver &= ~pd.isna(next_players) & (next_players != players)
+
+    is_pass = type_ids[order] == PASS_ID
+    if successful_only and 'outcome' in match_events.columns:
+        is_pass &= match_events['outcome'].to_numpy()[order] == 1
+    rows = order[is_pass]
+
+    passes = match_events.iloc[rows].copy()
+    passes['receiver_id'] = np.where(has_receiver[is_pass], next_players[is_pass], None)
+    if 'pass_end_x' in passes.columns and 'pass_end_y' in passes.columns:
+        passes['end_x'] = pd.to_numeric(passes['pass_end_x'], errors='coerce')
+        passes['end_y'] = pd.to_numeric(passes['pass_end_y'], errors='coerce')
+    elif 'qualifiers' in passes.columns:
+        passes['end_x'], passes['end_y'] = pass_end_coordinates(passes)
+    else:
+        passes['end_x'] = np.nan
+        passes['end_y'] = np.nan
+    return passes
+
+
+class PassingNetworks:
+    """
+    Passing networks of many team-games, stored as one block-diagonal adjacency.
+
+    Nodes are (game, team, player) keys, ordered by team-game so that every
+    team-game is a contiguous block of the adjacency matrix. Edge weights are
+    pass counts from passer to receiver.
+
+    Args:
+        passes (pd.DataFrame): Passes with a receiver column (infer_receivers output).
+            Passes without receiver are kept for zone_flows but are not edges.
+        player_id_col (str, optional): Column name for passer IDs. Defaults to 'player_id'.
+        receiver_col (str, optional): Column name for receiver IDs. Defaults to 'receiver_id'.
+        game_id_col (str, optional): Column name for game IDs. Defaults to 'game_id'.
+        team_id_col (str, optional): Column name for team IDs. Defaults to 'team_id'.
+
+    Attributes:
+        nodes (pd.DataFrame): game_id_col, team_id_col, player_id_col per node.
+        groups (pd.DataFrame): game_id_col, team_id_col per team-game (block).
+        src, dst, weight (np.ndarray): Edge list in node codes.
+
+    Example:
+        >>> networks = PassingNetworks.from_events(events_df)
+        >>> centrality = networks.centrality()
+        >>> tvi_results.merge(centrality, on=['game_id', 'team_id', 'player_id'])
+    """
+
+    def __init__(self, passes, player_id_col='player_id', receiver_col='receiver_id',
+                 game_id_col='game_id', team_id_col='team_id'):
+        required = [game_id_col, team_id_col, player_id_col, receiver_col]
+        missing = [col for col in required if col not in passes.columns]
+        if missing:
+            raise KeyError(f"Missing columns in passes: {missing}")
+
+        self.player_id_col = player_id_col
+        self.game_id_col = game_id_col
+        self.team_id_col = team_id_col
+        self.passes = passes
+        group_keys = [game_id_col, team_id_col]
+
+        # Team-game blocks over all passes, nodes over passers and receivers of completed links
+        group_index = pd.MultiIndex.from_frame(passes[group_keys]).unique().sort_values()
+        self.groups = group_index.to_frame(index=False)
+        self._pass_groups = group_index.get_indexer(pd.MultiIndex.from_frame(passes[group_keys]))
+
+        linked = passes[passes[receiver_col].notna()]
+        senders = linked[group_keys + [player_id_col]]
+        receivers = linked[group_keys + [receiver_col]].rename(columns={receiver_col: player_id_col})
+        node_index = pd.MultiIndex.from_frame(pd.concat([senders, receivers], ignore_index=True))
+        node_index = node_index.unique().sort_values()
+        self.nodes = node_index.to_frame(index=False)
+        self.node_group = group_index.get_indexer(node_index.droplevel(2))
+
+        src = node_index.get_indexer(pd.MultiIndex.from_frame(senders))
+        dst = node_index.get_indexer(pd.MultiIndex.from_frame(receivers))
+        n = len(node_index)
+        edge_codes, weight = np.unique(src.astype(np.int64) * n + dst, return_counts=True)
+        self.src = edge_codes // max(n, 1)
+        self.dst = edge_codes % max(n, 1)
+        self.weight = weight.astype(float)
+
+        sizes = np.bincount(self.node_group, minlength=len(self.groups))
+        self._block_start = np.concatenate([[0], np.cumsum(sizes)])
+
+    @classmethod
+    def from_events(cls, match_events, successful_only=True, player_id_col='player_id',
+                    game_id_col='game_id', team_id_col='team_id'):
+        """
+        Infer receivers (see infer_receivers) and build the networks.
+
+        Args:
+            match_events (pd.DataFrame): Parsed F24 events, e.g. a whole season.
+            successful_only (bool, optional): Only use successful passes. Defaults to True.
+            player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+            game_id_col (str, optional): Column name for game IDs. Defaults to 'game_id'.
+            team_id_col (str, optional): Column name for team IDs. Defaults to 'team_id'.
+
+        Returns:
+            PassingNetworks: One network per team-game.
+        """
+        passes = infer_receivers(match_events, successful_only=successful_only, player_id_col=player_id_col,
+                                 game_id_col=game_id_col, team_id_col=team_id_col)
+        return cls(passes, player_id_col=player_id_col, game_id_col=game_id_col, team_id_col=team_id_col)
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __repr__(self):
+        return f"PassingNetworks(team_games={len(self.groups)}, players={len(self.nodes)}, edges={len(self.src)})"
+
+    def edges(self):
+        """
+        Edge list with the original keys.
+
+        Returns:
+            pd.DataFrame: game_id_col, team_id_col, player_id_col, 'receiver_id' and 'passes'.
+        """
+        edges = self.nodes.iloc[self.src].reset_index(drop=True)
+        edges['receiver_id'] = self.nodes[self.player_id_col].to_numpy()[self.dst]
+        edges['passes'] = self.weight.astype(np.int64)
+        return edges
+
+    def matrix(self):
+        """
+        Block-diagonal adjacency of all team-games (requires scipy).
+
+        Returns:
+            scipy.sparse.csr_matrix: Shape (n_nodes, n_nodes); rows and columns follow self.nodes.
+        """
+        sparse = _import_scipy_sparse()
+        n = len(self.nodes)
+        return sparse.csr_matrix((self.weight, (self.src, self.dst)), shape=(n, n))
+
+    def adjacency(self, game_id, team_id, dense=False):
+        """
+        Adjacency of one team-game.
+
+        Args:
+            game_id: Game of the network.
+            team_id: Team of the network.
+            dense (bool, optional): Return a NumPy array instead of a scipy.sparse matrix
+                (no scipy needed). Defaults to False.
+
+        Returns:
+            tuple: (matrix, player_ids), the pass counts from row to column player.
+
+        Raises:
+            KeyError: If the team-game has no network.
+        """
+        block = pd.MultiIndex.from_frame(self.groups).get_indexer([(game_id, team_id)])[0]
+        if block < 0:
+            raise KeyError(f"No passing network for game {game_id!r}, team {team_id!r}")
+        start, stop = self._block_start[block], self._block_start[block + 1]
+        in_block = (self.src >= start) & (self.src < stop)
+        src, dst, weight = self.src[in_block] - start, self.dst[in_block] - start, self.weight[in_block]
+        players = self.nodes[self.player_id_col].to_numpy()[start:stop]
+        size = stop - start
+        if dense:
+            matrix = np.zeros((size, size))
+            np.add.at(matrix, (src, dst), weight)
+        else:
+            matrix = _import_scipy_sparse().csr_matrix((weight, (src, dst)), shape=(size, size))
+        return matrix, players
+
+    def pagerank(self, damping=0.85, tol=1e-10, max_iter=200):
+        """
+        Weighted PageRank of every player within their team-game.
+
+        All blocks are iterated together; the mass of players without outgoing
+        passes is spread evenly over their own team-game, so every block sums to 1.
+
+        Args:
+            damping (float, optional): Damping factor. Defaults to 0.85.
+            tol (float, optional): Stop when no score changes by more than tol. Defaults to 1e-10.
+            max_iter (int, optional): Maximum number of iterations. Defaults to 200.
+
+        Returns:
+            np.ndarray: PageRank per node, in self.nodes order.
+        """
+        n = len(self.nodes)
+        sizes = np.bincount(self.node_group, minlength=len(self.groups)).astype(float)[self.node_group]
+        out_weight = np.bincount(self.src, weights=self.weight, minlength=n)
+        dangling = out_weight == 0
+        share = self.weight / np.where(dangling, 1.0, out_weight)[self.src]
+        rank = 1.0 / sizes
+        for _ in range(max_iter):
+            spread = np.bincount(self.dst, weights=share * rank[self.src], minlength=n)
+            lost = np.bincount(self.node_group, weights=rank * dangling, minlength=len(self.groups))
+            new_rank = (1 - damping) / sizes + damping * (spread + lost[self.node_group] / sizes)
+            converged = np.abs(new_rank - rank).max(initial=0.0) < tol
+            rank = new_rank
+            if converged:
+                break
+        return rank
+
+    def centrality(self, damping=0.85):
+        """
+        Per-player network measures for every team-game.
+
+        Returns:
+            pd.DataFrame: The node keys plus passes_made, passes_received, pass_share
+                ((made + received) / (2 * team passes)), out_degree and in_degree
+                (distinct team-mates passed to / received from) and pagerank.
+        """
+        n = len(self.nodes)
+        result = self.nodes.copy()
+        made = np.bincount(self.src, weights=self.weight, minlength=n)
+        received = np.bincount(self.dst, weights=self.weight, minlength=n)
+        team_passes = np.bincount(self.node_group, weights=made, minlength=len(self.groups))[self.node_group]
+        result['passes_made'] = made.astype(np.int64)
+        result['passes_received'] = received.astype(np.int64)
+        result['pass_share'] = (made + received) / (2 * team_passes)
+        result['out_degree'] = np.bincount(self.src, minlength=n)
+        result['in_degree'] = np.bincount(self.dst, minlength=n)
+        result['pagerank'] = self.pagerank(damping=damping)
+        return result
+
+    def team_metrics(self):
+        """
+        Per team-game network summaries.
+
+        Returns:
+            pd.DataFrame: The group keys plus players, passes, links (distinct passer-receiver
+                pairs), density (links / possible directed links) and centralisation (Freeman
+                centralisation of pass_share: 0 when every player is equally involved, 1 when
+                all passes go through one player).
+        """
+        n_groups = len(self.groups)
+        centrality = self.centrality()
+        players = np.bincount(self.node_group, minlength=n_groups)
+        edge_group = self.node_group[self.src]
+        share = centrality['pass_share'].to_numpy()
+        max_share = np.full(n_groups, -np.inf)
+        np.maximum.at(max_share, self.node_group, share)
+        spread = np.bincount(self.node_group, weights=max_share[self.node_group] - share, minlength=n_groups)
+        # The most centralised network has one player in every pass: shares 1/2 and 1/(2(k-1))
+        max_spread = np.where(players > 1, (players - 1) * (0.5 - 0.5 / np.maximum(players - 1, 1)), 0.0)
+
+        result = self.groups.copy()
+        result['players'] = players
+        result['passes'] = np.bincount(edge_group, weights=self.weight, minlength=n_groups).astype(np.int64)
+        result['links'] = np.bincount(edge_group, minlength=n_groups)
+        possible = players * (players - 1)
+        result['density'] = np.divide(result['links'], possible, out=np.zeros(n_groups),
+                                      where=possible > 0)
+        result['centralisation'] = np.divide(spread, max_spread, out=np.zeros(n_groups), where=max_spread > 0)
+        return result
+
+    def zone_flows(self, x_col='x', y_col='y', end_x_col='end_x', end_y_col='end_y',
+                   zone_map=[[2, 4, 6],
+                             [1, 3, 5],
+                             [2, 4, 6]],
+                   normalize=True):
+        """
+        Zone-to-zone pass flows for every team-game.
+
+        Uses all passes with start and end coordinates, including those without
+        an inferred receiver.
+
+        Args:
+            x_col (str, optional): Column name for the pass start x. Defaults to 'x'.
+            y_col (str, optional): Column name for the pass start y. Defaults to 'y'.
+            end_x_col (str, optional): Column name for the pass end x. Defaults to 'end_x'.
+            end_y_col (str, optional): Column name for the pass end y. Defaults to 'end_y'.
+            zone_map (list or ZoneMap, optional): 2D list defining pitch zones, or a ZoneMap of polygon
+                and rectangle zones. Defaults to the 3x3 grid used by calculate_tvi.
+            normalize (bool, optional): Add 'share', the flow's share of the team-game's
+                passes. Defaults to True.
+
+        Returns:
+            pd.DataFrame: The group keys plus from_zone, to_zone and passes (and share),
+                one row per non-empty flow.
+        """
+        passes = self.passes
+        start_x = passes[x_col].to_numpy(dtype=float)
+        start_y = passes[y_col].to_numpy(dtype=float)
+        end_x = passes[end_x_col].to_numpy(dtype=float)
+        end_y = passes[end_y_col].to_numpy(dtype=float)
+        valid = ~(np.isnan(start_x) | np.isnan(start_y) | np.isnan(end_x) | np.isnan(end_y))
+
+        from_zone = assign_zones_array(start_x[valid], start_y[valid], zone_map=zone_map)
+        to_zone = assign_zones_array(end_x[valid], end_y[valid], zone_map=zone_map)
+        zone_codes, zones = pd.factorize(np.concatenate([from_zone, to_zone]), sort=True)
+        n_zones = max(len(zones), 1)
+        from_code, to_code = zone_codes[:len(from_zone)], zone_codes[len(from_zone):]
+        groups = self._pass_groups[valid].astype(np.int64)
+
+        codes, counts = np.unique((groups * n_zones + from_code) * n_zones + to_code, return_counts=True)
+        flow_groups = codes // (n_zones * n_zones)
+        result = self.groups.iloc[flow_groups].reset_index(drop=True)
+        result['from_zone'] = np.asarray(zones)[(codes // n_zones) % n_zones]
+        result['to_zone'] = np.asarray(zones)[codes % n_zones]
+        result['passes'] = counts
+        if normalize:
+            totals = np.bincount(flow_groups, weights=counts, minlength=len(self.groups))
+            result['share'] = counts / totals[flow_groups]
+        return result
@@ -0,0 +1,343 @@
+"""
+Pipeline scheduler
+
+A small declarative DAG runner for the TVI pipeline. Stages declare the names
+of their inputs; every stage whose inputs are ready is submitted to a thread or
+process pool, each intermediate result is computed once and shared by all
+stages that need it, and the run reports stage timings and the critical path
+(the longest dependency chain, which bounds the end-to-end latency).
+
+Part of the tvi_footballindex library.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+
+from tvi_footballindex.parsing.f24_parser import (
+    calculate_player_playtime,
+    explode_passes,
+    get_interceptions,
+    get_tackles,
+    get_aerials,
+    get_dribbles,
+    get_key_passes,
+    get_deep_completions,
+    get_shots_on_target,
+    get_progressive_passes,
+)
+from tvi_footballindex.tvi.calculator import calculate_tvi, aggregate_tvi_by_player
+
+
+def _run_stage(func, args, kwargs):
+    """Run one stage and time it where it runs (also inside worker processes)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class Stage:
+    """
+    One node of a Pipeline.
+
+    Args:
+        name (str): Stage name; other stages refer to its result by this name.
+        func (callable): Called as func(*input results, **kwargs). Must be a
+            module-level function when the pipeline runs in a process pool.
+        inputs (tuple): Names of stages or pipeline inputs, in argument order.
+        kwargs (dict): Fixed keyword arguments.
+    """
+
+    __slots__ = ('name', 'func', 'inputs', 'kwargs')
+
+    def __init__(self, name, func, inputs=(), kwargs=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.kwargs = dict(kwargs or {})
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, inputs={list(self.inputs)})"
+
+
+class PipelineRun:
+    """
+    Results and timings of one Pipeline.run().
+
+    Attributes:
+        results (dict): Stage (and input) name -> result.
+        timings (pd.DataFrame): One row per stage: stage, start, end (seconds from the
+            start of the run), duration (time inside the stage) and critical.
+        critical_path (list): Stage names on the longest dependency chain.
+        critical_path_seconds (float): Sum of the stage durations on it.
+        wall_seconds (float): End-to-end time of the run.
+    """
+
+    def __init__(self, results, timings, critical_path, critical_path_seconds, wall_seconds):
+        self.results = results
+        self.timings = timings
+        self.critical_path = critical_path
+        self.critical_path_seconds = critical_path_seconds
+        self.wall_seconds = wall_seconds
+
+    def __getitem__(self, name):
+        return self.results[name]
+
+    def __repr__(self):
+        return (f"PipelineRun(stages={len(self.timings)}, wall={self.wall_seconds:.3f}s, "
+                f"critical_path={self.critical_path_seconds:.3f}s)")
+
+    def report(self):
+        """Printable summary: timings sorted by start, then the critical path."""
+        lines = [self.timings.sort_values('start').to_string(index=False, float_format=lambda v: f"{v:.3f}"),
+                 f"critical path ({self.critical_path_seconds:.3f}s): {' -> '.join(self.critical_path)}",
+                 f"wall time: {self.wall_seconds:.3f}s"]
+        return "\n".join(lines)
+
+
+class Pipeline:
+    """
+    Declarative DAG of stages.
+
+    Example:
+        >>> pipeline = Pipeline()
+        >>> pipeline.add('playtime', calculate_player_playtime, inputs=['events'])
+        >>> pipeline.add('actions', get_metric_events, inputs=['events'])
+        >>> pipeline.add('tvi', calculate_tvi, inputs=['actions', 'playtime'])
+        >>> run = pipeline.run({'events': events_df}, max_workers=4)
+        >>> print(run.report())
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def __len__(self):
+        return len(self.stages)
+
+    def __repr__(self):
+        return f"Pipeline({list(self.stages)})"
+
+    def add(self, name, func, inputs=(), **kwargs):
+        """
+        Add a stage.
+
+        Args:
+            name (str): Stage name.
+            func (callable): Stage function, called as func(*input results, **kwargs).
+            inputs (list, optional): Names of the stages or pipeline inputs it needs.
+            **kwargs: Fixed keyword arguments for func.
+
+        Returns:
+            Pipeline: self, so calls can be chained.
+
+        Raises:
+            ValueError: If a stage with this name already exists.
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' already exists")
+        self.stages[name] = Stage(name, func, inputs, kwargs)
+        return self
+
+    def _plan(self, available, targets):
+        """Stages needed for targets, in topological order."""
+        needed = []
+        state = {}   # name -> 'visiting' | 'done'
+
+        def visit(name, path):
+            if name in available and name not in self.stages:
+                return
+            if name not in self.stages:
+                raise ValueError(f"Unknown input '{name}' (required by '{path[-1]}')" if path
+                                 else f"Unknown stage '{name}'")
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Cycle in pipeline: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dependency in self.stages[name].inputs:
+                visit(dependency, path + [name])
+            state[name] = 'done'
+            needed.append(name)
+
+        for target in targets:
+            visit(target, [])
+        return needed
+
+    def run(self, inputs=None, targets=None, executor='thread', max_workers=None):
+        """
+        Run the stages needed for `targets`, independent stages in parallel.
+
+        Args:
+            inputs (dict, optional): Pipeline inputs by name, e.g. {'events': events_df}.
+            targets (list, optional): Stages to compute. Defaults to all stages.
+            executor (str or Executor, optional): 'thread', 'process', 'serial' or an
+                existing concurrent.futures executor. Defaults to 'thread'.
+            max_workers (int, optional): Pool size for 'thread' and 'process'.
+
+        Returns:
+            PipelineRun: Results, timings and critical path.
+
+        Raises:
+            ValueError: On unknown inputs, cycles or an unknown executor.
+        """
+        results = dict(inputs or {})
+        targets = list(self.stages) if targets is None else list(targets)
+        order = self._plan(results, targets)
+        pending = {name: {d for d in self.stages[name].inputs if d in self.stages}
+                   for name in order}
+        started = {}
+        finished = {}
+        durations = {}
+        t0 = time.perf_counter()
+
+        if executor == 'serial':
+            for name in order:
+                stage = self.stages[name]
+                started[name] = time.perf_counter() - t0
+                results[name], durations[name] = _run_stage(
+                    stage.func, [results[d] for d in stage.inputs], stage.kwargs)
+                finished[name] = time.perf_counter() - t0
+        else:
+            if executor == 'thread':
+                pool, owned = ThreadPoolExecutor(max_workers=max_workers), True
+            elif executor == 'process':
+                pool, owned = ProcessPoolExecutor(max_workers=max_workers), True
+            elif hasattr(executor, 'submit'):
+                pool, owned = executor, False
+            else:
+                raise ValueError(f"Unknown executor '{executor}'. Use 'thread', 'process', 'serial' "
+                                 "or an Executor instance")
+            running = {}
+            try:
+                def submit_ready():
+                    for name in [n for n, deps in pending.items() if not deps]:
+                        del pending[name]
+                        stage = self.stages[name]
+                        started[name] = time.perf_counter() - t0
+                        future = pool.submit(_run_stage, stage.func,
+                                             [results[d] for d in stage.inputs], stage.kwargs)
+                        running[future] = name
+
+                submit_ready()
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        results[name], durations[name] = future.result()
+                        finished[name] = time.perf_counter() - t0
+                        for deps in pending.values():
+                            deps.discard(name)
+                    submit_ready()
+            finally:
+                # Not yet started stages of a failed run (cancel_futures= needs Python 3.9)
+                for future in running:
+                    future.cancel()
+                if owned:
+                    pool.shutdown(wait=True)
+
+        wall = time.perf_counter() - t0
+
+        # Longest chain of stage durations through the DAG
+        chain = {}
+        for name in order:
+            parents = [d for d in self.stages[name].inputs if d in chain]
+            best = max(parents, key=lambda d: chain[d][0], default=None)
+            base, path = chain[best] if best is not None else (0.0, [])
+            chain[name] = (base + durations[name], path + [name])
+        critical_seconds, critical_path = max(chain.values(), key=lambda item: item[0], default=(0.0, []))
+
+        timings = pd.DataFrame({
+            'stage': order,
+            'start': [started[name] for name in order],
+            'end': [finished[name] for name in order],
+            'duration': [durations[name] for name in order],
+            'critical': [name in critical_path for name in order],
+        })
+        return PipelineRun(results, timings, critical_path, critical_seconds, wall)
+
+
+def _concat_actions(*actions):
+    """Concatenate extractor outputs, skipping empty ones."""
+    actions = [df for df in actions if not df.empty]
+    return pd.concat(actions, ignore_index=True) if actions else pd.DataFrame(
+        columns=['game_id', 'team_id', 'player_id', 'event_name', 'x', 'y'])
+
+
+EXTRACTOR_STAGES = {
+    'interceptions': (get_interceptions, ['events']),
+    'tackles': (get_tackles, ['events']),
+    'aerials': (get_aerials, ['events']),
+    'progressive_passes': (get_progressive_passes, ['events', 'passes']),
+    'dribbles': (get_dribbles, ['events']),
+    'key_passes': (get_key_passes, ['events']),
+    'deep_completions': (get_deep_completions, ['events', 'passes']),
+    'shots_on_target': (get_shots_on_target, ['events']),
+}
+
+
+class _PassesExtractor:
+    """Picklable wrapper calling extractor(events, passes_exploded=passes)."""
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+
+    def __call__(self, events, passes, **kwargs):
+        return self.extractor(events, passes_exploded=passes, **kwargs)
+
+
+def build_tvi_pipeline(min_playtime=30, aggregate=True, **tvi_kwargs):
+    """
+    The standard TVI pipeline as a DAG.
+
+    Playtime, the exploded pass table and the eight extractors only depend on the
+    parsed events and run in parallel; progressive passes and deep completions
+    share the exploded passes; the actions are concatenated, scored with
+    calculate_tvi and (optionally) aggregated per player.
+
+    Args:
+        min_playtime (int, optional): Passed to calculate_player_playtime. Defaults to 30.
+        aggregate (bool, optional): Add the 'player_tvi' aggregation stage. Defaults to True.
+        **tvi_kwargs: Passed to calculate_tvi (C, zone_map, backend, ...).
+
+    Returns:
+        Pipeline: Stages playtime, passes, the extractor names, metric_events, tvi
+            (and player_tvi), with input 'events'.
+    """
+    pipeline = Pipeline()
+    pipeline.add('playtime', calculate_player_playtime, inputs=['events'], min_playtime=min_playtime)
+    pipeline.add('passes', explode_passes, inputs=['events'])
+    for name, (extractor, inputs) in EXTRACTOR_STAGES.items():
+        func = _PassesExtractor(extractor) if 'passes' in inputs else extractor
+        pipeline.add(name, func, inputs=inputs)
+    pipeline.add('metric_events', _concat_actions, inputs=list(EXTRACTOR_STAGES))
+    pipeline.add('tvi', calculate_tvi, inputs=['metric_events', 'playtime'], **tvi_kwargs)
+    if aggregate:
+        pipeline.add('player_tvi', aggregate_tvi_by_player, inputs=['tvi'])
+    return pipeline
+
+
+def run_tvi_pipeline(events_df, executor='thread', max_workers=None, min_playtime=30, aggregate=True,
+                     **tvi_kwargs):
+    """
+    Run the standard TVI pipeline on parsed events.
+
+    Args:
+        events_df (pd.DataFrame): Parsed F24 events (parsef24_folder output).
+        executor (str or Executor, optional): 'thread', 'process', 'serial' or an Executor.
+            Defaults to 'thread'.
+        max_workers (int, optional): Pool size.
+        min_playtime (int, optional): Passed to calculate_player_playtime. Defaults to 30.
+        aggregate (bool, optional): Also aggregate per player. Defaults to True.
+        **tvi_kwargs: Passed to calculate_tvi.
+
+    Returns:
+        PipelineRun: run['tvi'], run['player_tvi'], ... plus timings and the critical path.
+
+    Example:
+        >>> run = run_tvi_pipeline(events_df, max_workers=8)
+        >>> print(run.report())
+        >>> run['player_tvi'].head()
+    """
+    pipeline = build_tvi_pipeline(min_playtime=min_playtime, aggregate=aggregate, **tvi_kwargs)
+    return pipeline.run({'events': events_df}, executor=executor, max_workers=max_workers)
@@ -0,0 +1,180 @@
+"""
+TVI rankings
+
+Position- and competition-relative percentile ranks, z-scores and rank numbers
+for player-level TVI tables, computed for every group in a single groupby pass.
+
+Part of the tvi_footballindex library.
+"""
+
+import pandas as pd
+
+
+def _id_key(series):
+    """Normalise an ID column to strings so '123', 123 and 123.0 all join."""
+    if pd.api.types.is_float_dtype(series):
+        series = series.astype('Int64')
+    return series.astype(str)
+
+
+def attach_game_metadata(
+    tvi_df,
+    events_df,
+    game_id_col='game_id',
+    metadata_cols=('competition_id', 'season_id')
+):
+    """
+    Add game-level metadata (competition, season, ...) from the events table to TVI rows.
+
+    Args:
+        tvi_df (pd.DataFrame): Output from calculate_tvi() function.
+        events_df (pd.DataFrame): Parsed events, e.g. from parsef24_folder().
+        game_id_col (str, optional): Column name for game IDs. Defaults to 'game_id'.
+        metadata_cols (tuple, optional): Game-level columns to copy over.
+            Defaults to ('competition_id', 'season_id'). Missing columns are ignored.
+
+    Returns:
+        pd.DataFrame: tvi_df with the metadata columns added.
+    """
+    metadata_cols = [col for col in metadata_cols
+                     if col in events_df.columns and col not in tvi_df.columns]
+    if not metadata_cols:
+        return tvi_df
+    games = events_df[[game_id_col] + metadata_cols].drop_duplicates(subset=game_id_col)
+    games = games.assign(_game_key=_id_key(games[game_id_col])).drop(columns=[game_id_col])
+    result = tvi_df.assign(_game_key=_id_key(tvi_df[game_id_col]))
+    return result.merge(games, on='_game_key', how='left').drop(columns=['_game_key'])
+
+
+def add_player_names(
+    df,
+    names_df,
+    player_id_col='player_id',
+    rename=None
+):
+    """
+    Join player names (and any other descriptive columns) onto a TVI table.
+
+    IDs are matched on their normalised string form, so names read from an events
+    CSV (float IDs), an Excel squad list (int IDs) or XML (string IDs) all join
+    without manual casting.
+
+    Args:
+        df (pd.DataFrame): TVI table, e.g. from aggregate_tvi_by_player() or rank_tvi().
+        names_df (pd.DataFrame): Table with player_id_col and descriptive columns, e.g.
+            events_df[['player_id', 'player', 'team']] or a squad list.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        rename (dict, optional): Column renames applied to names_df, e.g.
+            {'player': 'player_name', 'team': 'team_name'}. Defaults to None.
+
+    Returns:
+        pd.DataFrame: df with the names columns added (one name row per player).
+
+    Raises:
+        KeyError: If player_id_col is missing from either table.
+    """
+    if player_id_col not in df.columns:
+        raise KeyError(f"Column '{player_id_col}' not found in df")
+    if player_id_col not in names_df.columns:
+        raise KeyError(f"Column '{player_id_col}' not found in names_df")
+
+    names = names_df.rename(columns=rename) if rename else names_df
+    names = names[names[player_id_col].notna()].drop_duplicates(subset=player_id_col)
+    # Never overwrite columns already in the TVI table (e.g. position)
+    extra_cols = [col for col in names.columns if col != player_id_col and col not in df.columns]
+    names = names[extra_cols].assign(_player_key=_id_key(names[player_id_col]))
+
+    result = df.assign(_player_key=_id_key(df[player_id_col]))
+    result = result.merge(names, on='_player_key', how='left').drop(columns=['_player_key'])
+    # Put names next to the player ID like the examples do
+    ordered = [player_id_col] + extra_cols
+    return result[ordered + [col for col in result.columns if col not in ordered]]
+
+
+def rank_tvi(
+    tvi_df,
+    group_cols=('competition_id', 'season_id', 'position'),
+    score_cols=('TVI', 'TVI_entropy'),
+    playtime_col='play_time',
+    min_minutes=0,
+    names_df=None,
+    player_id_col='player_id',
+    names_rename=None
+):
+    """
+    Compute percentile ranks, z-scores and rank numbers within every peer group.
+
+    All groups are handled by one groupby over the filtered table, so the cost is
+    a couple of vectorised passes regardless of the number of groups.
+
+    Args:
+        tvi_df (pd.DataFrame): Player-level TVI table, e.g. from
+            aggregate_tvi_by_player(game_tvi, group_cols=['competition_id', 'season_id']).
+        group_cols (tuple, optional): Peer group columns. Defaults to
+            ('competition_id', 'season_id', 'position'). Columns not in tvi_df are ignored,
+            so with none present the whole table is a single group.
+        score_cols (tuple, optional): Score columns to rank. Defaults to ('TVI', 'TVI_entropy').
+        playtime_col (str, optional): Column name for minutes played. Defaults to 'play_time'.
+        min_minutes (float, optional): Only players with more minutes than this are ranked
+            and returned. Defaults to 0.
+        names_df (pd.DataFrame, optional): Player names table joined in with
+            add_player_names(). Defaults to None.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        names_rename (dict, optional): Column renames for names_df. Defaults to None.
+
+    Returns:
+        pd.DataFrame: The eligible rows with, for each score column:
+            - <score>_pct: percentile rank within the group (0-100]
+            - <score>_z: z-score within the group (NaN for single-player groups)
+            - <score>_rank: rank within the group, 1 = best
+            - group_size: number of ranked players in the group
+        Sorted by group and first score descending.
+
+    Raises:
+        KeyError: If score or playtime columns are missing.
+        ValueError: If the input DataFrame is empty.
+
+    Example:
+        >>> ranked = rank_tvi(player_tvi, min_minutes=450, names_df=events_df[['player_id', 'player']],
+        ...                   names_rename={'player': 'player_name'})
+        >>> ranked[ranked['position'] != 'Goalkeeper'].head(20)
+    """
+    if tvi_df.empty:
+        raise ValueError("tvi_df cannot be empty")
+    score_cols = list(score_cols)
+    missing = [col for col in score_cols + [playtime_col] if col not in tvi_df.columns]
+    if missing:
+        raise KeyError(f"Missing columns in tvi_df: {missing}")
+
+    group_cols = [col for col in group_cols if col in tvi_df.columns]
+    ranked = tvi_df[tvi_df[playtime_col] > min_minutes] if min_minutes else tvi_df
+    ranked = ranked.reset_index(drop=True)
+
+    if group_cols:
+        grouped = ranked.groupby(group_cols, dropna=False, sort=False)[score_cols]
+        means = grouped.transform('mean')
+        stds = grouped.transform('std')
+        pcts = grouped.rank(pct=True)
+        ranks = grouped.rank(ascending=False, method='min')
+        sizes = ranked.groupby(group_cols, dropna=False, sort=False)[playtime_col].transform('size')
+    else:
+        scores = ranked[score_cols]
+        means = pd.DataFrame({col: scores[col].mean() for col in score_cols}, index=ranked.index)
+        stds = pd.DataFrame({col: scores[col].std() for col in score_cols}, index=ranked.index)
+        pcts = scores.rank(pct=True)
+        ranks = scores.rank(ascending=False, method='min')
+        sizes = pd.Series(len(ranked), index=ranked.index)
+
+    new_cols = {}
+    for col in score_cols:
+        new_cols[f'{col}_pct'] = pcts[col] * 100
+        new_cols[f'{col}_z'] = (ranked[col] - means[col]) / stds[col]
+        new_cols[f'{col}_rank'] = ranks[col].astype('Int64')
+    new_cols['group_size'] = sizes.astype(int)
+    ranked = pd.concat([ranked, pd.DataFrame(new_cols, index=ranked.index)], axis=1)
+
+    if names_df is not None:
+        ranked = add_player_names(ranked, names_df, player_id_col=player_id_col, rename=names_rename)
+
+    return ranked.sort_values(group_cols + [score_cols[0]],
+                              ascending=[True] * len(group_cols) + [False]).reset_index(drop=True)
@@ -0,0 +1,313 @@
+"""
+Reliability of TVI
+
+Split-half reliability and stability curves computed from per player-game
+sufficient statistics (minutes and minutes x score). Each random split shuffles
+every player's games and deals them alternately into two halves; for a minutes
+budget m a half keeps its games until it holds m minutes. Half means, their
+correlation across players and the per-position sums are evaluated for all
+players, budgets and a batch of splits at once with cumulative sums and
+segment reductions, instead of re-running aggregate_tvi_by_player per split.
+
+Part of the tvi_footballindex library.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+ALL_POSITIONS = 'All'
+
+
+def _player_games(tvi_df, score_col, player_id_col, playtime_col, position_col, group_cols):
+    """Sorted sufficient statistics, player blocks and each player's main position."""
+    keys = [player_id_col] + (list(group_cols) if group_cols else [])
+    missing = [col for col in keys + [playtime_col, score_col] if col not in tvi_df.columns]
+    if missing:
+        raise KeyError(f"Missing columns in tvi_df: {missing}")
+
+    data = tvi_df[tvi_df[playtime_col] > 0].sort_values(keys, kind='stable')
+    data = data[data[score_col].notna()]
+    player_codes = data.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+    n_players = player_codes.max() + 1 if len(player_codes) else 0
+    n_games = np.bincount(player_codes, minlength=n_players)
+    starts = np.concatenate(([0], np.cumsum(n_games)[:-1])).astype(np.int64)
+
+    players = data[keys].drop_duplicates().reset_index(drop=True)
+    players['n_games'] = n_games
+    players[playtime_col] = np.bincount(player_codes, weights=data[playtime_col].to_numpy(dtype=float),
+                                        minlength=n_players)
+    if position_col in data.columns:
+        position_time = data.groupby(keys + [position_col], sort=False)[playtime_col].sum().reset_index()
+        main = position_time.loc[position_time.groupby(keys, sort=False)[playtime_col].idxmax()]
+        players = players.merge(main[keys + [position_col]], on=keys, how='left')
+    else:
+        players[position_col] = ALL_POSITIONS
+
+    minutes = data[playtime_col].to_numpy(dtype=float)
+    return players, player_codes, starts, minutes, minutes * data[score_col].to_numpy(dtype=float)
+
+
+def _position_indicator(positions):
+    """(players x groups) indicator of every position plus the ALL_POSITIONS group."""
+    codes, labels = pd.factorize(pd.Series(positions).fillna(ALL_POSITIONS), sort=True)
+    labels = list(labels)
+    indicator = np.zeros((len(codes), len(labels)))
+    indicator[np.arange(len(codes)), codes] = 1.0
+    if labels != [ALL_POSITIONS]:
+        indicator = np.hstack([indicator, np.ones((len(codes), 1))])
+        labels.append(ALL_POSITIONS)
+    return indicator, labels
+
+
+def _split_half_correlations(player_codes, starts, minutes, weighted, indicator, budgets, n_splits, rng,
+                             max_batch_elements):
+    """
+    Correlation of the two half means for every budget, position group and split.
+
+    Returns:
+        tuple: (r, n) arrays of shape (budgets, groups, splits); n is the number
+            of players whose halves both reach the budget.
+    """
+    n_rows = len(minutes)
+    n_players = len(starts)
+    # Position of a row inside its player's block; after a within-block shuffle the
+    # rows at even positions form half A and odd positions half B
+    position = np.arange(n_rows) - starts[player_codes]
+    in_half = [(position % 2 == 0)[:, None], (position % 2 == 1)[:, None]]
+
+    r = np.full((len(budgets), indicator.shape[1], n_splits), np.nan)
+    n = np.zeros((len(budgets), indicator.shape[1], n_splits))
+    batch = max(1, min(n_splits, max_batch_elements // max(1, n_rows)))
+    for first in range(0, n_splits, batch):
+        size = min(batch, n_splits - first)
+        order = np.argsort(player_codes[:, None] + rng.random((n_rows, size)), axis=0)
+        w = minutes[order]
+        ws = weighted[order]
+
+        halves = []
+        for member in in_half:
+            w_half = np.where(member, w, 0.0)
+            cum = np.cumsum(w_half, axis=0)
+            # Minutes of the half before each row, restarted at every player block
+            before = cum - w_half
+            before -= before[starts][player_codes]
+            halves.append((member, before, w_half, np.where(member, ws, 0.0)))
+
+        for b, budget in enumerate(budgets):
+            means = []
+            reached = np.ones((n_players, size), dtype=bool)
+            for member, before, w_half, ws_half in halves:
+                keep = member & (before < budget)
+                total = np.add.reduceat(np.where(keep, w_half, 0.0), starts, axis=0)
+                score = np.add.reduceat(np.where(keep, ws_half, 0.0), starts, axis=0)
+                # An unlimited budget only needs a non-empty half
+                reached &= (total >= budget) if np.isfinite(budget) else (total > 0)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    means.append(score / total)
+            a = np.where(reached, means[0], 0.0)
+            c = np.where(reached, means[1], 0.0)
+            mask = reached.astype(float)
+
+            count = indicator.T @ mask
+            sum_a, sum_c = indicator.T @ a, indicator.T @ c
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cov = indicator.T @ (a * c) - sum_a * sum_c / count
+                var_a = indicator.T @ (a * a) - sum_a ** 2 / count
+                var_c = indicator.T @ (c * c) - sum_c ** 2 / count
+                corr = cov / np.sqrt(var_a * var_c)
+            corr[(count < 3) | (var_a <= 1e-12) | (var_c <= 1e-12)] = np.nan
+            r[b, :, first:first + size] = corr
+            n[b, :, first:first + size] = count
+    return r, n
+
+
+def split_half_reliability(
+    tvi_df,
+    score_col='TVI',
+    n_splits=200,
+    seed=None,
+    player_id_col='player_id',
+    playtime_col='play_time',
+    position_col='position',
+    group_cols=None,
+    min_games=2,
+    max_batch_elements=5_000_000
+):
+    """
+    Split-half reliability of the season-level score, per position.
+
+    Every split deals each player's games randomly into two halves and computes
+    the playtime-weighted mean of both halves (as aggregate_tvi_by_player does);
+    the reliability is the correlation of the two means across players, averaged
+    over splits, and its Spearman-Brown correction to full-length seasons.
+
+    Args:
+        tvi_df (pd.DataFrame): Output from calculate_tvi() function (one row per player-game).
+        score_col (str, optional): Score to assess. Defaults to 'TVI'.
+        n_splits (int, optional): Number of random splits. Defaults to 200.
+        seed (int or np.random.Generator, optional): Seed or generator for reproducible
+            splits. Defaults to None.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        playtime_col (str, optional): Column name for playtime. Defaults to 'play_time'.
+        position_col (str, optional): Column name for positions; players are grouped by
+            their most played position. If missing, only ALL_POSITIONS is reported.
+            Defaults to 'position'.
+        group_cols (list, optional): Extra key columns, e.g. ['season_id'] to treat every
+            player-season as a separate subject. Defaults to None.
+        min_games (int, optional): Players with fewer games are left out. Defaults to 2.
+        max_batch_elements (int, optional): Upper bound on the size of one shuffle matrix.
+            Defaults to 5,000,000.
+
+    Returns:
+        pd.DataFrame: One row per position (plus ALL_POSITIONS) with columns n_players,
+            r (mean split-half correlation), r_sd (its spread over splits) and
+            r_full (Spearman-Brown: 2r / (1 + r)).
+
+    Raises:
+        KeyError: If required columns are missing.
+        ValueError: If the input DataFrame is empty or n_splits is invalid.
+
+    Example:
+        >>> game_tvi = calculate_tvi(events_df, playtime_df)
+        >>> split_half_reliability(game_tvi, n_splits=500, seed=42)
+    """
+    if tvi_df.empty:
+        raise ValueError("tvi_df cannot be empty")
+    if n_splits < 1:
+        raise ValueError("n_splits must be at least 1")
+
+    counts = tvi_df.groupby([player_id_col] + (list(group_cols) if group_cols else []))[player_id_col]
+    tvi_df = tvi_df[counts.transform('size') >= max(min_games, 2)]
+    if tvi_df.empty:
+        raise ValueError(f"No player has at least {max(min_games, 2)} games")
+    players, player_codes, starts, minutes, weighted = _player_games(
+        tvi_df, score_col, player_id_col, playtime_col, position_col, group_cols)
+    indicator, labels = _position_indicator(players[position_col])
+
+    r, n = _split_half_correlations(player_codes, starts, minutes, weighted, indicator, [np.inf],
+                                    n_splits, np.random.default_rng(seed), max_batch_elements)
+    with warnings.catch_warnings():
+        # Groups with too few players have all-NaN correlations
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean_r = np.nanmean(r[0], axis=1)
+        sd_r = np.nanstd(r[0], axis=1, ddof=1) if n_splits > 1 else np.full(len(labels), np.nan)
+
+    result = pd.DataFrame({
+        position_col: labels,
+        'n_players': n[0].max(axis=1).astype(np.int64),
+        'r': mean_r,
+        'r_sd': sd_r,
+    })
+    result['r_full'] = 2 * result['r'] / (1 + result['r'])
+    return result
+
+
+def stability_curve(
+    tvi_df,
+    minutes=None,
+    score_col='TVI',
+    n_splits=100,
+    seed=None,
+    player_id_col='player_id',
+    playtime_col='play_time',
+    position_col='position',
+    group_cols=None,
+    min_players=10,
+    ci=0.9,
+    max_batch_elements=5_000_000
+):
+    """
+    Split-half correlation as a function of minutes played, per position.
+
+    For every minutes budget m, each split compares two disjoint samples of a
+    player's games holding m minutes each (games are added in random order until
+    the half reaches m); only players with at least 2m minutes take part. The
+    budget at which the correlation passes a threshold (see stabilization_minutes)
+    is the minutes a player needs before their TVI is mostly signal.
+
+    Args:
+        tvi_df (pd.DataFrame): Output from calculate_tvi() function (one row per player-game).
+        minutes (array-like, optional): Minutes budgets per half. Defaults to 90, 180, ...,
+            up to half of the largest player total.
+        score_col (str, optional): Score to assess. Defaults to 'TVI'.
+        n_splits (int, optional): Number of random splits. Defaults to 100.
+        seed (int or np.random.Generator, optional): Seed or generator. Defaults to None.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        playtime_col (str, optional): Column name for playtime. Defaults to 'play_time'.
+        position_col (str, optional): Column name for positions, as in
+            split_half_reliability. Defaults to 'position'.
+        group_cols (list, optional): Extra key columns, e.g. ['season_id']. Defaults to None.
+        min_players (int, optional): Budgets where fewer players qualify get r = NaN.
+            Defaults to 10.
+        ci (float, optional): Coverage of the r_low/r_high band over splits. Defaults to 0.9.
+        max_batch_elements (int, optional): Upper bound on the size of one shuffle matrix.
+            Defaults to 5,000,000.
+
+    Returns:
+        pd.DataFrame: One row per position (plus ALL_POSITIONS) and budget with columns
+            minutes, n_players, r, r_low and r_high.
+
+    Raises:
+        KeyError: If required columns are missing.
+        ValueError: If the input DataFrame is empty or n_splits/ci are invalid.
+
+    Example:
+        >>> curve = stability_curve(game_tvi, minutes=range(90, 1801, 90), seed=42)
+        >>> stabilization_minutes(curve, threshold=0.7)
+    """
+    if tvi_df.empty:
+        raise ValueError("tvi_df cannot be empty")
+    if n_splits < 1:
+        raise ValueError("n_splits must be at least 1")
+    if not 0 < ci < 1:
+        raise ValueError("ci must be between 0 and 1")
+
+    players, player_codes, starts, play_time, weighted = _player_games(
+        tvi_df, score_col, player_id_col, playtime_col, position_col, group_cols)
+    if minutes is None:
+        max_budget = players[playtime_col].max() / 2
+        minutes = np.arange(90, max(90, max_budget) + 1, 90)
+    minutes = np.asarray(list(minutes), dtype=float)
+    indicator, labels = _position_indicator(players[position_col])
+
+    r, n = _split_half_correlations(player_codes, starts, play_time, weighted, indicator, minutes,
+                                    n_splits, np.random.default_rng(seed), max_batch_elements)
+    r[n < min_players] = np.nan
+
+    alpha = (1 - ci) / 2
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean_r = np.nanmean(r, axis=2)
+        bounds = np.nanquantile(r, [alpha, 1 - alpha], axis=2)
+
+    return pd.DataFrame({
+        position_col: np.tile(labels, len(minutes)),
+        'minutes': np.repeat(minutes, len(labels)),
+        'n_players': np.rint(n.mean(axis=2)).astype(np.int64).ravel(),
+        'r': mean_r.ravel(),
+        'r_low': bounds[0].ravel(),
+        'r_high': bounds[1].ravel(),
+    }).sort_values([position_col, 'minutes'], kind='stable').reset_index(drop=True)
+
+
+def stabilization_minutes(curve, threshold=0.7, position_col='position'):
+    """
+    Minutes at which each position's stability curve first reaches a threshold.
+
+    Args:
+        curve (pd.DataFrame): Output from stability_curve().
+        threshold (float, optional): Required split-half correlation. Defaults to 0.7.
+        position_col (str, optional): Column name for positions. Defaults to 'position'.
+
+    Returns:
+        pd.DataFrame: position_col and minutes (NaN where the curve never reaches the
+            threshold).
+    """
+    reached = curve[curve['r'] >= threshold]
+    first = reached.groupby(position_col, sort=False)['minutes'].min()
+    positions = curve[position_col].drop_duplicates()
+    return pd.DataFrame({position_col: positions.to_numpy(),
+                         'minutes': first.reindex(positions).to_numpy()})
@@ -0,0 +1,360 @@
+"""
+Segmented TVI
+
+TVI within matches: per time block (e.g. 15 minutes), per half and per game
+state (leading, level, trailing). Every metric event is labelled with its
+segments, per-segment minutes come from the on-pitch interval index, and all
+segment rows are scored in a single calculate_tvi call keyed by
+(game, segment type, segment). Events, goals and appearances all share the
+period-aware match clock of event_minutes, so stoppage time stays in the
+period it was played in.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+import pandas as pd
+
+from tvi_footballindex.parsing.f24_parser import get_metric_events
+from tvi_footballindex.parsing.intervals import OnPitchIndex, event_minutes
+from tvi_footballindex.tvi.calculator import calculate_tvi
+
+
+SEGMENT_TYPES = ('block', 'half', 'game_state')
+
+_GOAL_ID = 16
+_OWN_GOAL_QUALIFIER = '28'
+_PERIOD_STARTS = np.array([0, 45, 90, 105], dtype=float)  # Nominal starts of periods 1-4
+
+
+def goal_timeline(match_events):
+    """
+    Running score of every game, one row per goal.
+
+    Own goals (qualifier 28) are credited to the opponent of the team of the
+    event.
+
+    Args:
+        match_events (pd.DataFrame): Parsed F24 events with home_team_id and away_team_id.
+
+    Returns:
+        pd.DataFrame: Columns game_id, minute (on the event_minutes match clock of
+            match_events), scoring_team_id, home_score, away_score, sorted by game and minute.
+    """
+    is_goal = (match_events['type_id'] == _GOAL_ID).to_numpy()
+    goals = match_events.loc[is_goal, ['game_id', 'team_id', 'home_team_id', 'away_team_id', 'qualifiers']]
+    own_goal = np.array([any(str(q.get('qualifier_id')) == _OWN_GOAL_QUALIFIER for q in qualifiers)
+                         for qualifiers in goals['qualifiers']], dtype=bool)
+    team = goals['team_id'].to_numpy()
+    home = goals['home_team_id'].to_numpy()
+    away = goals['away_team_id'].to_numpy()
+    opponent = np.where(team == home, away, home)
+
+    timeline = pd.DataFrame({
+        'game_id': goals['game_id'].to_numpy(),
+        'minute': event_minutes(match_events)[is_goal],
+        'scoring_team_id': np.where(own_goal, opponent, team),
+        'home': home,
+    })
+    timeline = timeline.sort_values(['game_id', 'minute'], kind='stable').reset_index(drop=True)
+    home_goal = (timeline['scoring_team_id'] == timeline['home']).astype(int)
+    timeline['home_score'] = home_goal.groupby(timeline['game_id']).cumsum()
+    timeline['away_score'] = (1 - home_goal).groupby(timeline['game_id']).cumsum()
+    return timeline.drop(columns='home')
+
+
+def _state_name(diff):
+    return np.where(diff > 0, 'leading', np.where(diff < 0, 'trailing', 'level'))
+
+
+def label_game_state(events_df, goals, minutes=None, game_id_col='game_id', team_id_col='team_id'):
+    """
+    Game state of the acting team at every event: 'leading', 'level' or 'trailing'.
+
+    Only goals scored strictly before an event count, so a goal event itself is
+    labelled with the state it changed.
+
+    Args:
+        events_df (pd.DataFrame): Events with game and team columns and 'min' (and 'sec',
+            'period_id').
+        goals (pd.DataFrame): Output of goal_timeline().
+        minutes (array-like, optional): Event minutes on the clock of the goal timeline.
+            Defaults to event_minutes(events_df), which only matches it when events_df
+            holds every event of its games; for a subset such as metric events pass
+            event_minutes(events_df, period_offsets(match_events)).
+
+    Returns:
+        np.ndarray: State label per event.
+    """
+    minutes = event_minutes(events_df) if minutes is None else np.asarray(minutes, dtype=float)
+    if goals.empty:
+        return np.full(len(events_df), 'level', dtype=object)
+    span = float(max(minutes.max(initial=0), goals['minute'].max())) + 1
+
+    # Goals before t: searchsorted over (key, minute) ordered keys, for the game and for the team
+    game_index = pd.Index(pd.unique(np.concatenate([goals['game_id'].to_numpy(), events_df[game_id_col].to_numpy()])))
+    goal_games = game_index.get_indexer(goals['game_id']).astype(float)
+    event_games = game_index.get_indexer(events_df[game_id_col]).astype(float)
+
+    game_keys = np.sort(goal_games * span + goals['minute'].to_numpy())
+    total = (np.searchsorted(game_keys, event_games * span + minutes, side='left')
+             - np.searchsorted(game_keys, event_games * span, side='left'))
+
+    team_index = pd.MultiIndex.from_arrays([goals['game_id'], goals['scoring_team_id']]).unique()
+    goal_teams = team_index.get_indexer(pd.MultiIndex.from_arrays([goals['game_id'], goals['scoring_team_id']]))
+    event_teams = team_index.get_indexer(pd.MultiIndex.from_frame(events_df[[game_id_col, team_id_col]]))
+    team_keys = np.sort(goal_teams * span + goals['minute'].to_numpy())
+    scored = np.where(
+        event_teams >= 0,
+        np.searchsorted(team_keys, event_teams * span + minutes, side='left')
+        - np.searchsorted(team_keys, event_teams * span, side='left'),
+        0
+    )
+    return _state_name(scored - (total - scored))
+
+
+def _piece_minutes(intervals, pieces, on):
+    """Minutes each appearance overlaps each labelled [start, end) piece of its game (or team)."""
+    merged = intervals.merge(pieces, on=on, suffixes=('', '_piece'))
+    overlap = np.minimum(merged['end'], merged['end_piece']) - np.maximum(merged['start'], merged['start_piece'])
+    merged['minutes'] = np.clip(overlap.to_numpy(), 0, None)
+    merged = merged[merged['minutes'] > 0]
+    return (merged.groupby(['game_id', 'team_id', 'player_id', 'segment'], sort=False, dropna=False)
+            .agg(position=('position', 'first'), minutes=('minutes', 'sum'))
+            .reset_index())
+
+
+def game_state_minutes(index, goals, home_teams):
+    """
+    Minutes each appearance spent leading, level and trailing.
+
+    Args:
+        index (OnPitchIndex): Appearance intervals.
+        goals (pd.DataFrame): Output of goal_timeline().
+        home_teams (pd.Series): Home team ID per game ID.
+
+    Returns:
+        pd.DataFrame: Columns game_id, team_id, player_id, segment, position, minutes.
+    """
+    intervals = index.intervals
+    game_end = intervals.groupby('game_id')['end'].max()
+
+    # Score pieces per game: [0, g1), [g1, g2), ..., [gk, end) with the home - away difference
+    goals = goals[goals['game_id'].isin(game_end.index)]
+    pieces = pd.concat([
+        pd.DataFrame({'game_id': game_end.index, 'start': 0.0, 'home_diff': 0}),
+        pd.DataFrame({
+            'game_id': goals['game_id'].to_numpy(),
+            'start': goals['minute'].to_numpy(dtype=float),
+            'home_diff': (goals['home_score'] - goals['away_score']).to_numpy(),
+        }),
+    ], ignore_index=True).sort_values(['game_id', 'start'], kind='stable')
+    pieces['end'] = pieces.groupby('game_id')['start'].shift(-1)
+    pieces['end'] = pieces['end'].fillna(pieces['game_id'].map(game_end))
+
+    # Each team sees the home difference, negated for the away side
+    team_pieces = intervals[['game_id', 'team_id']].drop_duplicates().merge(pieces, on='game_id')
+    is_home = team_pieces['team_id'].to_numpy() == team_pieces['game_id'].map(home_teams).to_numpy()
+    team_pieces['segment'] = _state_name(np.where(is_home, 1, -1) * team_pieces['home_diff'].to_numpy())
+
+    return _piece_minutes(intervals, team_pieces[['game_id', 'team_id', 'segment', 'start', 'end']],
+                          on=['game_id', 'team_id'])
+
+
+def _half_labels(period_ids):
+    """'first_half', 'second_half' or 'extra_time' per F24 period ID; None outside periods 1-4."""
+    period_ids = np.asarray(period_ids)
+    labels = np.full(len(period_ids), None, dtype=object)
+    labels[period_ids == 1] = 'first_half'
+    labels[period_ids == 2] = 'second_half'
+    labels[np.isin(period_ids, (3, 4))] = 'extra_time'
+    return labels
+
+
+def half_minutes(index, match_events):
+    """
+    Minutes each appearance spent in each half (and extra time).
+
+    Periods span from their first to their last event on the match clock, so
+    stoppage time is counted in the half it was played in (F24 keeps first-half
+    stoppage time in period 1 with minutes of 45 and more).
+
+    Args:
+        index (OnPitchIndex): Appearance intervals.
+        match_events (pd.DataFrame): Parsed F24 events with period_id, min and sec.
+
+    Returns:
+        pd.DataFrame: Columns game_id, team_id, player_id, segment, position, minutes.
+    """
+    labels = _half_labels(match_events['period_id'].to_numpy())
+    in_period = pd.notna(labels)
+    periods = (pd.DataFrame({'game_id': match_events['game_id'].to_numpy()[in_period],
+                             'segment': labels[in_period],
+                             'minute': event_minutes(match_events, index.offsets)[in_period]})
+               .groupby(['game_id', 'segment'], sort=False)['minute']
+               .agg(start='min', end='max')
+               .reset_index())
+
+    return _piece_minutes(index.intervals, periods, on=['game_id'])
+
+
+def _block_bounds(block_minutes, end=90):
+    return np.arange(0, end + block_minutes, block_minutes)[:int(np.ceil(end / block_minutes)) + 1]
+
+
+def _block_edges(game_ids, bounds, offsets):
+    """
+    Block edges per game on the match clock.
+
+    Every nominal edge is shifted by the offset of the period it falls in, so the
+    block ending at 45 also collects first-half stoppage time and the next block
+    starts with the second half.
+    """
+    edges = np.tile(np.asarray(bounds, dtype=float), (len(game_ids), 1))
+    if offsets is not None and not offsets.empty:
+        periods = np.searchsorted(_PERIOD_STARTS, bounds, side='right')
+        edges += offsets.reindex(index=game_ids, columns=periods).fillna(0).to_numpy()
+    return edges
+
+
+def time_block_minutes(index, bounds, labels):
+    """
+    Minutes each appearance spent in each time block.
+
+    Args:
+        index (OnPitchIndex): Appearance intervals (with the period offsets of from_events).
+        bounds (array-like): Nominal block edges, e.g. [0, 15, 30, 45, 60, 75, 90]; the
+            last block also collects stoppage time.
+        labels (list): Block names, one per block.
+
+    Returns:
+        pd.DataFrame: Columns game_id, team_id, player_id, segment, position, minutes.
+    """
+    game_ids = pd.unique(index.intervals['game_id'])
+    edges = _block_edges(game_ids, bounds, index.offsets)
+    edges[:, -1] = np.inf
+    n_blocks = edges.shape[1] - 1
+    pieces = pd.DataFrame({
+        'game_id': np.repeat(game_ids, n_blocks),
+        'segment': np.tile(np.asarray(labels, dtype=object), len(game_ids)),
+        'start': edges[:, :-1].ravel(),
+        'end': edges[:, 1:].ravel(),
+    })
+    return _piece_minutes(index.intervals, pieces, on=['game_id'])
+
+
+def _block_labels(events_df, minutes, bounds, labels, offsets):
+    """Block of every event, from its match-clock minute and its game's block edges."""
+    game_ids = pd.unique(events_df['game_id'])
+    edges = _block_edges(game_ids, bounds, offsets)[pd.Index(game_ids).get_indexer(events_df['game_id'])]
+    positions = (edges[:, 1:-1] <= np.asarray(minutes, dtype=float)[:, None]).sum(axis=1)
+    return np.asarray(labels, dtype=object)[positions]
+
+
+def calculate_segment_tvi(
+    match_events,
+    by=SEGMENT_TYPES,
+    block_minutes=15,
+    min_minutes=0,
+    end_minute=None,
+    metric_events=None,
+    interner=None,
+    **tvi_kwargs
+):
+    """
+    Calculate TVI per time block, half and/or game state within each match.
+
+    Events are labelled with their segments (block by match-clock minute, half
+    by period_id, game state from the goal timeline before the event), minutes
+    per segment come from an OnPitchIndex of lineups, substitutions and
+    sending-offs (for halves, intersected with each period's first-to-last event
+    span), and all segment rows are computed in one calculate_tvi call.
+
+    Args:
+        match_events (pd.DataFrame): Parsed F24 events (parsef24_folder output).
+        by (tuple or str, optional): Segment types to compute: 'block', 'half' and/or
+            'game_state'. Defaults to all three.
+        block_minutes (int, optional): Length of a block in minutes; the last block of
+            each half also collects its stoppage time. Defaults to 15.
+        min_minutes (float, optional): Leave out player-segments with fewer minutes
+            on the pitch. Defaults to 0.
+        end_minute (float, optional): End of every game, as in OnPitchIndex.from_events.
+            Defaults to each game's last event.
+        metric_events (pd.DataFrame, optional): Metric actions to score, with 'min',
+            'period_id' (and 'sec') columns. Defaults to
+            get_metric_events(match_events, extra_columns=['min', 'sec', 'period_id']).
+        interner (IDInterner, optional): The interner match_events was encoded with, if any.
+        **tvi_kwargs: Passed to calculate_tvi (C, zone_map, low_memory, backend, ...).
+
+    Returns:
+        pd.DataFrame: One row per game, team, player, segment type and segment with
+            position, play_time (minutes in the segment) and the calculate_tvi metrics.
+
+    Raises:
+        ValueError: If `by` names an unknown segment type.
+        KeyError: If metric_events has no 'min' or no 'period_id' column.
+
+    Example:
+        >>> seg = calculate_segment_tvi(events_df, by=('block', 'game_state'))
+        >>> seg[seg['segment_type'] == 'game_state'].groupby('segment')['TVI'].mean()
+    """
+    by = (by,) if isinstance(by, str) else tuple(by)
+    unknown = [kind for kind in by if kind not in SEGMENT_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown segment types {unknown}. Available: {list(SEGMENT_TYPES)}")
+
+    if metric_events is None:
+        metric_events = get_metric_events(match_events, extra_columns=['min', 'sec', 'period_id'])
+    missing = [col for col in ['min', 'period_id'] if col not in metric_events.columns]
+    if missing:
+        raise KeyError(f"metric_events needs {missing} columns, e.g. "
+                       "get_metric_events(..., extra_columns=['min', 'sec', 'period_id'])")
+
+    # Metric events are a subset, so they take the match clock of the full events
+    index = OnPitchIndex.from_events(match_events, end_minute=end_minute, interner=interner)
+    minutes = event_minutes(metric_events, index.offsets)
+    bounds = _block_bounds(block_minutes)
+    block_labels = [f"{int(a)}-{int(b)}" for a, b in zip(bounds[:-1], bounds[1:])]
+
+    event_frames = []
+    playtime_frames = []
+    for kind in by:
+        if kind == 'block':
+            labels = _block_labels(metric_events, minutes, bounds, block_labels, index.offsets)
+            playtime = time_block_minutes(index, bounds, block_labels)
+        elif kind == 'half':
+            labels = _half_labels(metric_events['period_id'].to_numpy())
+            playtime = half_minutes(index, match_events)
+        else:
+            goals = goal_timeline(match_events)
+            labels = label_game_state(metric_events, goals, minutes=minutes)
+            home_teams = match_events.drop_duplicates('game_id').set_index('game_id')['home_team_id']
+            playtime = game_state_minutes(index, goals, home_teams)
+        event_frames.append(metric_events.assign(segment_type=kind, segment=labels))
+        playtime_frames.append(playtime.assign(segment_type=kind))
+
+    events = pd.concat(event_frames, ignore_index=True)
+    playtime = pd.concat(playtime_frames, ignore_index=True).rename(columns={'minutes': 'play_time'})
+    if min_minutes:
+        playtime = playtime[playtime['play_time'] >= min_minutes]
+
+    # One calculate_tvi call: each (game, segment type, segment) acts as its own "game"
+    unit_cols = ['game_id', 'segment_type', 'segment']
+    units = pd.MultiIndex.from_frame(playtime[unit_cols]).unique()
+    playtime = playtime.assign(segment_unit=units.get_indexer(pd.MultiIndex.from_frame(playtime[unit_cols])))
+    events = events.assign(segment_unit=units.get_indexer(pd.MultiIndex.from_frame(events[unit_cols])))
+    events = events[events['segment_unit'] >= 0]
+
+    tvi = calculate_tvi(
+        events.drop(columns=unit_cols),
+        playtime[['segment_unit', 'team_id', 'player_id', 'position', 'play_time']],
+        game_id_col='segment_unit',
+        **tvi_kwargs
+    )
+
+    unit_values = units.to_frame(index=False)
+    codes = tvi['segment_unit'].to_numpy()
+    tvi = tvi.drop(columns='segment_unit')
+    for position, col in enumerate(unit_cols):
+        tvi.insert(position, col, unit_values[col].to_numpy()[codes])
+    return tvi
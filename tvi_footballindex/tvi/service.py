@@ -0,0 +1,413 @@
+"""
+Local TVI query service.
+
+Loads precomputed TVI tables (e.g. the output of aggregate_tvi_by_player written
+to CSV or parquet) into memory, keeps sorted indexes by competition, position and
+minutes, and answers top-k, percentile and player lookup queries over a small
+asyncio HTTP server. The table is reloaded automatically when the file changes.
+
+Part of the tvi_footballindex library.
+"""
+
+import asyncio
+import json
+import os
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from tvi_footballindex.utils import helpers
+
+
+# Group key of rows with a missing competition or position (None is the "any" wildcard)
+_MISSING_KEY = 'missing'
+
+
+def _key(value):
+    """Index key of a competition, position or player ID: key_str, or _MISSING_KEY if missing."""
+    if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+        return _MISSING_KEY
+    return helpers.key_str(value)
+
+
+def load_tvi_table(path):
+    """
+    Load a precomputed TVI table from disk.
+
+    Args:
+        path (str): Path to a .csv, .parquet or .pkl file.
+
+    Returns:
+        pd.DataFrame: The loaded table.
+
+    Raises:
+        ValueError: If the file extension is not supported.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return pd.read_csv(path)
+    if ext in ('.parquet', '.pq'):
+        return pd.read_parquet(path)
+    if ext in ('.pkl', '.pickle'):
+        return pd.read_pickle(path)
+    raise ValueError(f"Unsupported TVI table format: {ext}")
+
+
+class TVIIndex:
+    """
+    In-memory sorted indexes over a player-level TVI table.
+
+    For every (competition, position) group, plus the wildcard groups
+    (competition, any), (any, position) and (any, any), the row positions are
+    stored sorted by each score column. Queries then only need a boolean mask
+    on the minutes column and a slice, so they run in microseconds.
+
+    Competitions, positions and player IDs are keyed by their string form with
+    integral floats written as integers, so 8, 8.0 and '8' all find the same
+    group. Rows with a missing competition or position form their own group,
+    queried as 'missing'.
+
+    Args:
+        tvi_df (pd.DataFrame): Player-level TVI table.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        competition_col (str, optional): Column name for competitions. Defaults to 'competition_id'.
+            If the column doesn't exist, all rows belong to a single competition.
+        position_col (str, optional): Column name for positions. Defaults to 'position'.
+            If the column doesn't exist, all rows share a single position.
+        playtime_col (str, optional): Column name for minutes played. Defaults to 'play_time'.
+        score_cols (tuple, optional): Columns that can be ranked. Defaults to ('TVI', 'TVI_entropy').
+
+    Raises:
+        KeyError: If the player, playtime or score columns are missing.
+    """
+
+    def __init__(
+        self,
+        tvi_df,
+        player_id_col='player_id',
+        competition_col='competition_id',
+        position_col='position',
+        playtime_col='play_time',
+        score_cols=('TVI', 'TVI_entropy')
+    ):
+        required = [player_id_col, playtime_col] + list(score_cols)
+        missing = [col for col in required if col not in tvi_df.columns]
+        if missing:
+            raise KeyError(f"Missing columns in tvi_df: {missing}")
+
+        df = tvi_df.reset_index(drop=True)
+        self.player_id_col = player_id_col
+        self.competition_col = competition_col
+        self.position_col = position_col
+        self.playtime_col = playtime_col
+        self.score_cols = tuple(score_cols)
+        self.size = len(df)
+
+        # Pre-serialised rows so queries never touch pandas
+        self._records = [
+            {key: helpers.to_python(value) for key, value in record.items()}
+            for record in df.to_dict('records')
+        ]
+
+        n = len(df)
+        competitions = (np.array([_key(value) for value in df[competition_col]], dtype=object)
+                        if competition_col in df.columns else np.full(n, None, dtype=object))
+        positions = (np.array([_key(value) for value in df[position_col]], dtype=object)
+                     if position_col in df.columns else np.full(n, None, dtype=object))
+        self._competitions = competitions
+        self._positions = positions
+        # Integer position codes make exclusion filters a cheap integer comparison
+        self._position_codes = {pos: code for code, pos in enumerate(dict.fromkeys(positions))}
+        self._position_code_arr = np.array([self._position_codes[pos] for pos in positions], dtype=np.int32)
+        self._minutes = df[playtime_col].to_numpy(dtype=float)
+        self._scores = {col: df[col].to_numpy(dtype=float) for col in self.score_cols}
+
+        # Player lookup: external ID key -> row positions
+        self._by_player = {}
+        for row, player_id in enumerate(df[player_id_col]):
+            self._by_player.setdefault(_key(player_id), []).append(row)
+
+        # Group membership for every (competition, position) key including wildcards
+        members = {(None, None): []}
+        for row, (comp, pos) in enumerate(zip(competitions, positions)):
+            for key in ((comp, pos), (comp, None), (None, pos), (None, None)):
+                members.setdefault(key, []).append(row)
+        members = {key: np.asarray(rows, dtype=np.int64) for key, rows in members.items()}
+
+        # Sorted indexes: rows by score descending, with aligned minutes and scores
+        self._index = {}
+        for key, rows in members.items():
+            per_score = {}
+            for col, values in self._scores.items():
+                vals = values[rows]
+                # NaN scores sort last
+                order = rows[np.lexsort((-np.nan_to_num(vals, nan=-np.inf), np.isnan(vals)))]
+                per_score[col] = (order, self._minutes[order], values[order])
+            self._index[key] = per_score
+
+    def _group(self, competition, position, score):
+        if score not in self._scores:
+            raise KeyError(f"Unknown score column '{score}'. Available: {list(self.score_cols)}")
+        key = (None if competition is None else _key(competition),
+               None if position is None else _key(position))
+        return self._index.get(key)
+
+    def top_k(self, k=50, score='TVI', competition=None, position=None,
+              exclude_position=None, min_minutes=0):
+        """
+        Return the k best players by score within a group.
+
+        Args:
+            k (int, optional): Number of players to return. Defaults to 50.
+            score (str, optional): Score column to rank by. Defaults to 'TVI'.
+            competition (optional): Restrict to a competition. Defaults to None (all).
+            position (optional): Restrict to a position. Defaults to None (all).
+            exclude_position (optional): Position to leave out (e.g. 'Goalkeeper').
+            min_minutes (float, optional): Strict lower bound on minutes played. Defaults to 0.
+
+        Returns:
+            list: Row dicts sorted by score descending.
+        """
+        group = self._group(competition, position, score)
+        if group is None:
+            return []
+        order, minutes, _ = group[score]
+        mask = minutes > min_minutes if min_minutes else np.ones(len(order), dtype=bool)
+        if exclude_position is not None:
+            code = self._position_codes.get(_key(exclude_position), -1)
+            mask &= self._position_code_arr[order] != code
+        rows = order[np.flatnonzero(mask)[:int(k)]]
+        return [self._records[row] for row in rows]
+
+    def percentile(self, player_id, score='TVI', by=('position',), min_minutes=0):
+        """
+        Percentile of each of a player's rows within its peer group.
+
+        Args:
+            player_id: External player ID.
+            score (str, optional): Score column. Defaults to 'TVI'.
+            by (tuple, optional): Grouping for the peer group, any subset of
+                ('competition', 'position'). Defaults to ('position',).
+            min_minutes (float, optional): Only peers with more minutes than this are
+                counted. Defaults to 0.
+
+        Returns:
+            list: One dict per player row with the score, the peer group size and
+                the percentile (0-100, share of peers with a score at or below it).
+
+        Raises:
+            KeyError: If the player is not in the table.
+        """
+        rows = self._by_player.get(_key(player_id))
+        if rows is None:
+            raise KeyError(f"Player '{player_id}' not found")
+        results = []
+        for row in rows:
+            record = self._records[row]
+            competition = self._competitions[row] if 'competition' in by else None
+            position = self._positions[row] if 'position' in by else None
+            group = self._group(competition, position, score)
+            _, minutes, values = group[score]
+            peers = values[(minutes > min_minutes) & ~np.isnan(values)] if min_minutes else values[~np.isnan(values)]
+            value = self._scores[score][row]
+            # values are sorted descending, so count peers strictly above the player
+            above = np.searchsorted(-peers, -value, side='left')
+            pct = float(100.0 * (len(peers) - above) / len(peers)) if len(peers) else None
+            results.append({
+                self.player_id_col: record[self.player_id_col],
+                self.competition_col: record.get(self.competition_col),
+                self.position_col: record.get(self.position_col),
+                score: helpers.to_python(value),
+                'group_size': int(len(peers)),
+                'percentile': pct,
+            })
+        return results
+
+    def player(self, player_id):
+        """
+        Return every row for a player.
+
+        Args:
+            player_id: External player ID.
+
+        Returns:
+            list: Row dicts, empty if the player is unknown.
+        """
+        return [self._records[row] for row in self._by_player.get(_key(player_id), [])]
+
+
+class TVIQueryService:
+    """
+    Asyncio HTTP service answering TVI queries from an in-memory TVIIndex.
+
+    Endpoints (GET, JSON responses):
+        /top?k=50&score=TVI&competition=X&position=Y&exclude_position=Goalkeeper&min_minutes=450
+        /percentile?player_id=P&score=TVI&by=position,competition&min_minutes=450
+        /player?player_id=P
+        /health
+
+    Args:
+        path (str): Path of the precomputed TVI table to serve.
+        reload_interval (float, optional): Seconds between checks for a modified file.
+            Defaults to 2.0. Set to 0 to disable hot-reloading.
+        **index_kwargs: Column name parameters passed to TVIIndex.
+    """
+
+    def __init__(self, path, reload_interval=2.0, **index_kwargs):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.index_kwargs = index_kwargs
+        self.index = None
+        self._mtime = None
+        self._server = None
+        self._reload_task = None
+
+    def load(self):
+        """(Re)build the index from the table on disk."""
+        mtime = os.stat(self.path).st_mtime_ns
+        index = TVIIndex(load_tvi_table(self.path), **self.index_kwargs)
+        # Swap in one assignment so concurrent queries see either index, never a mix
+        self.index = index
+        self._mtime = mtime
+
+    async def _watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if mtime != self._mtime:
+                try:
+                    await loop.run_in_executor(None, self.load)
+                except Exception:
+                    # Partially written file; keep serving the old index and retry
+                    continue
+
+    def handle_query(self, route, params):
+        """
+        Answer a query for a route and parsed query-string parameters.
+
+        Returns:
+            tuple: (HTTP status code, JSON-serialisable payload).
+        """
+        index = self.index
+        get = lambda name, default=None: params.get(name, [default])[0]
+        try:
+            if route == '/health':
+                return 200, {'status': 'ok', 'rows': index.size}
+            if route == '/top':
+                return 200, index.top_k(
+                    k=int(get('k', 50)),
+                    score=get('score', 'TVI'),
+                    competition=get('competition'),
+                    position=get('position'),
+                    exclude_position=get('exclude_position'),
+                    min_minutes=float(get('min_minutes', 0)),
+                )
+            if route == '/percentile':
+                by = tuple(part for part in get('by', 'position').split(',') if part)
+                return 200, index.percentile(
+                    get('player_id'),
+                    score=get('score', 'TVI'),
+                    by=by,
+                    min_minutes=float(get('min_minutes', 0)),
+                )
+            if route == '/player':
+                return 200, index.player(get('player_id'))
+        except KeyError as e:
+            return 404, {'error': str(e).strip("'\"")}
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        return 404, {'error': f"Unknown route {route}"}
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                # Drain headers
+                keep_alive = True
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    if line.lower().startswith(b'connection:') and b'close' in line.lower():
+                        keep_alive = False
+                parts = request_line.decode('latin-1').split()
+                if len(parts) < 2 or parts[0] != 'GET':
+                    status, payload = 405, {'error': 'Only GET is supported'}
+                else:
+                    url = urlsplit(parts[1])
+                    status, payload = self.handle_query(url.path, parse_qs(url.query))
+                body = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=8765):
+        """Load the table, start listening and start the hot-reload watcher."""
+        if self.index is None:
+            self.load()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        if self.reload_interval:
+            self._reload_task = asyncio.create_task(self._watch())
+        return self._server
+
+    async def stop(self):
+        """Stop the server and the hot-reload watcher."""
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            self._reload_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+def serve_tvi(path, host='127.0.0.1', port=8765, reload_interval=2.0, **index_kwargs):
+    """
+    Serve a precomputed TVI table over HTTP until interrupted.
+
+    Args:
+        path (str): Path of the TVI table (.csv, .parquet or .pkl).
+        host (str, optional): Interface to bind. Defaults to '127.0.0.1'.
+        port (int, optional): Port to bind. Defaults to 8765.
+        reload_interval (float, optional): Seconds between checks for a modified file.
+            Defaults to 2.0.
+        **index_kwargs: Column name parameters passed to TVIIndex.
+
+    Example:
+        >>> aggregated_tvi.to_csv("tvi_season.csv", index=False)
+        >>> serve_tvi("tvi_season.csv", port=8765)
+        # curl "http://127.0.0.1:8765/top?k=50&exclude_position=Goalkeeper&min_minutes=450"
+    """
+    service = TVIQueryService(path, reload_interval=reload_interval, **index_kwargs)
+
+    async def _main():
+        server = await service.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    import sys
+    serve_tvi(sys.argv[1], port=int(sys.argv[2]) if len(sys.argv) > 2 else 8765)
@@ -0,0 +1,346 @@
+"""
+Player similarity search
+
+Per-player event-zone profiles (the event x zone counts that calculate_tvi
+pivots, summed over games and normalised) and a nearest-neighbour index over
+them. Profiles are stored as one L2-normalised float32 matrix, optionally
+reduced with a truncated SVD, so cosine similarities for a batch of query
+players are a single matrix product followed by a top-k partition.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+import pandas as pd
+
+from tvi_footballindex.utils import helpers
+
+
+PROFILE_NORMALIZATIONS = ('share', 'per90', 'count')
+
+
+def event_zone_profiles(
+    events_df,
+    playtime_df=None,
+    player_id_col='player_id',
+    event_name_col='event_name',
+    x_col='x',
+    y_col='y',
+    playtime_col='play_time',
+    position_col='position',
+    group_cols=None,
+    normalize='share',
+    zone_map=[[2, 4, 6],
+              [1, 3, 5],
+              [2, 4, 6]]
+):
+    """
+    Build one event-zone profile per player (or player-season) across all games.
+
+    Args:
+        events_df (pd.DataFrame): DataFrame containing player actions with coordinates.
+        playtime_df (pd.DataFrame, optional): Playtime per player-game. If given, the
+            total minutes and the most played position of every profile are returned
+            as well. Required for normalize='per90'.
+        player_id_col (str, optional): Column name for player IDs. Defaults to 'player_id'.
+        event_name_col (str, optional): Column name for event types. Defaults to 'event_name'.
+        x_col (str, optional): Column name for x-coordinate (0-100 scale). Defaults to 'x'.
+        y_col (str, optional): Column name for y-coordinate (0-100 scale). Defaults to 'y'.
+        playtime_col (str, optional): Column name for playing time. Defaults to 'play_time'.
+        position_col (str, optional): Column name for positions. Defaults to 'position'.
+            Ignored if playtime_df has no such column.
+        group_cols (list, optional): Extra key columns, e.g. ['season_id'] for one profile
+            per player-season. They must exist in events_df (and in playtime_df if given).
+        normalize (str, optional): 'share' (each profile sums to 1), 'per90' (actions per
+            90 minutes) or 'count' (raw counts). Defaults to 'share'.
+        zone_map (list or ZoneMap, optional): 2D list defining pitch zones, or a ZoneMap of polygon
+            and rectangle zones. Defaults to the 3x3 grid.
+
+    Returns:
+        tuple: (profiles, meta). profiles is a DataFrame indexed by the profile keys with
+            one '<event>_<zone>' column per combination, sorted by name. meta has the same
+            index with playtime_col and position_col (when playtime_df is given) and
+            n_actions.
+
+    Raises:
+        KeyError: If required columns are missing.
+        ValueError: If normalize is unknown, or 'per90' is asked for without playtime_df.
+
+    Example:
+        >>> profiles, meta = event_zone_profiles(events_df, playtime_df, group_cols=['season_id'])
+    """
+    if normalize not in PROFILE_NORMALIZATIONS:
+        raise ValueError(f"Unknown normalize '{normalize}'. Available: {list(PROFILE_NORMALIZATIONS)}")
+    if normalize == 'per90' and playtime_df is None:
+        raise ValueError("normalize='per90' requires playtime_df")
+
+    keys = [player_id_col] + (list(group_cols) if group_cols else [])
+    required_cols = keys + [event_name_col, x_col, y_col]
+    missing_cols = [col for col in required_cols if col not in events_df.columns]
+    if missing_cols:
+        raise KeyError(f"Missing columns in events_df: {missing_cols}")
+    if playtime_df is not None:
+        missing_cols = [col for col in keys + [playtime_col] if col not in playtime_df.columns]
+        if missing_cols:
+            raise KeyError(f"Missing columns in playtime_df: {missing_cols}")
+
+    if zone_map is None:
+        zone_map = [
+            [2, 4, 6],
+            [1, 3, 5],
+            [2, 4, 6]
+        ]
+
+    # Integer codes for profile keys and event-zone combinations, counted with one bincount
+    key_index = pd.MultiIndex.from_frame(events_df[keys])
+    key_codes, unique_keys = pd.factorize(key_index)
+    zones = helpers.assign_zones_array(events_df[x_col].to_numpy(), events_df[y_col].to_numpy(),
+                                       zone_map=zone_map)
+    labels = events_df[event_name_col].astype(str).to_numpy(dtype=object) + '_' + zones.astype(str).astype(object)
+    label_codes, event_zones = pd.factorize(labels, sort=True)
+    valid = (key_codes >= 0) & events_df[event_name_col].notna().to_numpy()
+    n_keys, n_cols = len(unique_keys), len(event_zones)
+    counts = np.bincount(key_codes[valid].astype(np.int64) * n_cols + label_codes[valid],
+                         minlength=n_keys * n_cols).reshape(n_keys, n_cols).astype(float)
+
+    index = pd.MultiIndex.from_tuples(unique_keys, names=keys) if len(keys) > 1 \
+        else pd.Index(unique_keys.get_level_values(0), name=player_id_col)
+    meta = pd.DataFrame({'n_actions': counts.sum(axis=1)}, index=index)
+
+    if playtime_df is not None:
+        playtime = playtime_df.groupby(keys)[playtime_col].sum()
+        meta[playtime_col] = playtime.reindex(index).fillna(0).to_numpy()
+        if position_col in playtime_df.columns:
+            position_time = playtime_df.groupby(keys + [position_col])[playtime_col].sum().reset_index()
+            main_position = (position_time.sort_values(playtime_col, ascending=False, kind='stable')
+                             .drop_duplicates(keys)
+                             .set_index(keys)[position_col])
+            meta[position_col] = main_position.reindex(index).to_numpy()
+
+    if normalize == 'share':
+        totals = counts.sum(axis=1, keepdims=True)
+        counts = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+    elif normalize == 'per90':
+        minutes = meta[playtime_col].to_numpy()[:, None]
+        counts = np.divide(counts * 90, minutes, out=np.zeros_like(counts), where=minutes > 0)
+
+    profiles = pd.DataFrame(counts, index=index, columns=list(event_zones))
+    return profiles, meta
+
+
+class SimilarityIndex:
+    """
+    Cosine nearest-neighbour index over player profiles.
+
+    Profiles are stored row-wise as an L2-normalised float32 matrix. With
+    n_components, they are first projected onto the top right singular vectors
+    of the (mean-centred) profile matrix and normalised again, which removes
+    noise and shrinks the matrix products. Queries are answered in batches: one
+    matrix product per batch, candidate filters applied as a mask, and
+    np.argpartition for the top k.
+
+    Args:
+        profiles (pd.DataFrame): Profiles indexed by player (or player-season), e.g.
+            from event_zone_profiles().
+        meta (pd.DataFrame, optional): Per-profile metadata on the same index, used
+            for the position and minutes filters and copied into query results.
+        n_components (int, optional): Number of SVD components to keep. Defaults to
+            None (full profiles).
+        playtime_col (str, optional): Minutes column in meta. Defaults to 'play_time'.
+        position_col (str, optional): Position column in meta. Defaults to 'position'.
+        batch_size (int, optional): Query rows per matrix product. Defaults to 1024.
+
+    Raises:
+        ValueError: If profiles is empty or n_components is not positive.
+
+    Example:
+        >>> profiles, meta = event_zone_profiles(events_df, playtime_df)
+        >>> index = SimilarityIndex(profiles, meta, n_components=16)
+        >>> index.query('12345', k=10, position='Midfielder', min_minutes=900)
+    """
+
+    def __init__(
+        self,
+        profiles,
+        meta=None,
+        n_components=None,
+        playtime_col='play_time',
+        position_col='position',
+        batch_size=1024
+    ):
+        if profiles.empty:
+            raise ValueError("profiles cannot be empty")
+        if n_components is not None and n_components < 1:
+            raise ValueError(f"n_components must be positive, got {n_components}")
+
+        self.keys = profiles.index
+        self.columns = list(profiles.columns)
+        self.meta = meta.reindex(profiles.index) if meta is not None else None
+        self.playtime_col = playtime_col
+        self.position_col = position_col
+        self.batch_size = batch_size
+        self.n_components = None
+        self.components = None
+        self.mean = None
+
+        matrix = profiles.to_numpy(dtype=np.float64)
+        if n_components is not None and n_components < min(matrix.shape):
+            self.mean = matrix.mean(axis=0)
+            _, _, vt = np.linalg.svd(matrix - self.mean, full_matrices=False)
+            self.components = vt[:n_components]
+            self.n_components = n_components
+        self.vectors = self._embed(matrix)
+
+        # Key lookup: label (or its string form) -> row
+        self._rows = pd.Index(self.keys)
+        self._str_rows = pd.Index(self._rows.map(helpers.key_str))
+
+        n = len(self.keys)
+        self._minutes = (self.meta[playtime_col].to_numpy(dtype=float)
+                         if self.meta is not None and playtime_col in self.meta.columns else None)
+        if self.meta is not None and position_col in self.meta.columns:
+            self._position_codes, self._positions = pd.factorize(self.meta[position_col].astype(str))
+        else:
+            self._position_codes, self._positions = np.zeros(n, dtype=np.int64), pd.Index([])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __repr__(self):
+        dims = self.vectors.shape[1]
+        return f"SimilarityIndex(profiles={len(self)}, dims={dims})"
+
+    def _embed(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if self.components is not None:
+            matrix = (matrix - self.mean) @ self.components.T
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0).astype(np.float32)
+
+    def rows_of(self, players):
+        """
+        Row positions of profile keys.
+
+        Keys are matched as given first and then on their string form, so '123',
+        123 and 123.0 find the same player.
+
+        Raises:
+            KeyError: If a key is not in the index.
+        """
+        players = list(players)
+        rows = self._rows.get_indexer(players) if not isinstance(self._rows, pd.MultiIndex) \
+            else self._rows.get_indexer(pd.MultiIndex.from_tuples(players))
+        missing = rows < 0
+        if missing.any():
+            rows[missing] = self._str_rows.get_indexer([helpers.key_str(p) for p, m in zip(players, missing) if m])
+        if (rows < 0).any():
+            unknown = [p for p, row in zip(players, rows) if row < 0]
+            raise KeyError(f"Players not in the index: {unknown}")
+        return rows
+
+    def _candidates(self, position, min_minutes):
+        mask = np.ones(len(self), dtype=bool)
+        if position is not None:
+            wanted = [position] if isinstance(position, str) else list(position)
+            mask &= np.isin(self._position_codes, self._positions.get_indexer([str(p) for p in wanted]))
+        if min_minutes:
+            if self._minutes is None:
+                raise KeyError(f"min_minutes needs a '{self.playtime_col}' column in meta")
+            mask &= self._minutes >= min_minutes
+        return mask
+
+    def search(self, vectors, k=10, position=None, min_minutes=None, exclude=None):
+        """
+        Top-k neighbours of arbitrary profile vectors.
+
+        Args:
+            vectors (array-like): Profiles with the index columns, shape (n, n_columns).
+            k (int, optional): Neighbours per query. Defaults to 10.
+            position (str or list, optional): Only return candidates with these positions.
+            min_minutes (float, optional): Only return candidates with at least these minutes.
+            exclude (array-like, optional): Row per query to leave out (-1 for none).
+
+        Returns:
+            tuple: (rows, scores), both of shape (n, k'), k' = min(k, candidates);
+                rows are -1 where fewer candidates exist, sorted by descending similarity.
+        """
+        return self._search(self._embed(np.atleast_2d(vectors)), k, position, min_minutes, exclude)
+
+    def _search(self, queries, k, position, min_minutes, exclude):
+        mask = self._candidates(position, min_minutes)
+        candidates = np.flatnonzero(mask)
+        candidate_vectors = self.vectors[candidates]
+        k = min(k, len(candidates))
+        n = len(queries)
+        rows = np.full((n, k), -1, dtype=np.int64)
+        scores = np.full((n, k), np.nan, dtype=np.float32)
+        if k == 0:
+            return rows, scores
+        exclude = np.full(n, -1) if exclude is None else np.asarray(exclude)
+        # Position of every excluded row among the candidates (-1 if it isn't one)
+        candidate_pos = np.full(len(self), -1, dtype=np.int64)
+        candidate_pos[candidates] = np.arange(len(candidates))
+
+        for start in range(0, n, self.batch_size):
+            stop = min(start + self.batch_size, n)
+            sims = queries[start:stop] @ candidate_vectors.T
+            excluded = candidate_pos[np.where(exclude[start:stop] >= 0, exclude[start:stop], 0)]
+            excluded = np.where(exclude[start:stop] >= 0, excluded, -1)
+            hit = excluded >= 0
+            sims[np.flatnonzero(hit), excluded[hit]] = -np.inf
+
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k] if k < sims.shape[1] \
+                else np.tile(np.arange(sims.shape[1]), (len(sims), 1))
+            top_sims = np.take_along_axis(sims, top, axis=1)
+            order = np.argsort(-top_sims, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+            top_sims = np.take_along_axis(top_sims, order, axis=1)
+            valid = np.isfinite(top_sims)
+            rows[start:stop] = np.where(valid, candidates[top], -1)
+            scores[start:stop] = np.where(valid, top_sims, np.nan)
+        return rows, scores
+
+    def query(self, players, k=10, position=None, min_minutes=None, exclude_self=True):
+        """
+        Most similar profiles to one or many query players.
+
+        Args:
+            players: A profile key (player ID, or a tuple with group_cols) or a list of keys.
+            k (int, optional): Neighbours per query player. Defaults to 10.
+            position (str or list, optional): Only return candidates with these positions.
+            min_minutes (float, optional): Only return candidates with at least these minutes.
+            exclude_self (bool, optional): Leave the query player out of its own results.
+                Defaults to True.
+
+        Returns:
+            pd.DataFrame: One row per (query, neighbour) with query_<key> columns, the
+                neighbour key columns, similarity, rank (1 = most similar) and the meta
+                columns of the neighbour.
+
+        Raises:
+            KeyError: If a query player is not in the index.
+        """
+        single = not isinstance(players, (list, np.ndarray, pd.Index, pd.Series))
+        players = [players] if single else list(players)
+        query_rows = self.rows_of(players)
+        rows, scores = self._search(self.vectors[query_rows], k, position, min_minutes,
+                                    query_rows if exclude_self else None)
+
+        found = rows >= 0
+        query_pos, rank = np.nonzero(found)
+        neighbour_rows = rows[found]
+        key_frame = self.keys.to_frame(index=False)
+        result = key_frame.iloc[query_rows[query_pos]].add_prefix('query_').reset_index(drop=True)
+        result = pd.concat([result, key_frame.iloc[neighbour_rows].reset_index(drop=True)], axis=1)
+        result['similarity'] = scores[found].astype(float)
+        result['rank'] = rank + 1
+        if self.meta is not None:
+            meta = self.meta.iloc[neighbour_rows].reset_index(drop=True)
+            result = pd.concat([result, meta.drop(columns=[c for c in meta.columns if c in result.columns])],
+                               axis=1)
+        return result
+
+    def similarity(self, player_a, player_b):
+        """Cosine similarity between two indexed profiles."""
+        rows = self.rows_of([player_a, player_b])
+        return float(self.vectors[rows[0]] @ self.vectors[rows[1]])
@@ -0,0 +1,217 @@
+"""
+Pre-flight validation of TVI inputs
+
+Computes every input check (columns, coordinate ranges, nulls, playtime values,
+duplicate playtime keys, events without a playtime row) in one fused pass per
+table, optionally on a random sample of events, and issues a token that lets
+calculate_tvi skip re-validating the same frames.
+
+Part of the tvi_footballindex library.
+"""
+
+import weakref
+
+import numpy as np
+import pandas as pd
+
+
+_COLUMN_DEFAULTS = {
+    'player_id_col': 'player_id',
+    'event_name_col': 'event_name',
+    'x_col': 'x',
+    'y_col': 'y',
+    'game_id_col': 'game_id',
+    'team_id_col': 'team_id',
+    'playtime_col': 'play_time',
+}
+
+
+def _column_names(kwargs):
+    return {name: kwargs.get(name, default) for name, default in _COLUMN_DEFAULTS.items()}
+
+
+def _frame_schema(df):
+    """Length, column names and dtypes of a frame."""
+    return len(df), tuple(df.columns), tuple(str(dtype) for dtype in df.dtypes)
+
+
+class ValidationToken:
+    """
+    Proof that a pair of frames passed validate_inputs with given column names.
+
+    calculate_tvi(..., validated=token) skips its own input checks when the token
+    matches the frames it is called with. The token holds weak references to the
+    frame objects (so a new frame that reuses a collected frame's id() doesn't
+    match) and records their lengths, column names and dtypes, so a different,
+    resized or restructured frame is validated again.
+    """
+
+    __slots__ = ('_events_ref', '_playtime_ref', '_events_schema', '_playtime_schema', 'columns', 'sampled')
+
+    def __init__(self, events_df, playtime_df, columns, sampled):
+        self._events_ref = weakref.ref(events_df)
+        self._playtime_ref = weakref.ref(playtime_df)
+        self._events_schema = _frame_schema(events_df)
+        self._playtime_schema = _frame_schema(playtime_df)
+        self.columns = dict(columns)
+        self.sampled = sampled
+
+    def matches(self, events_df, playtime_df, **kwargs):
+        """Return True if the token covers these frames and column names."""
+        return (self._events_ref() is events_df
+                and self._playtime_ref() is playtime_df
+                and _frame_schema(events_df) == self._events_schema
+                and _frame_schema(playtime_df) == self._playtime_schema
+                and _column_names(kwargs) == self.columns)
+
+    def __repr__(self):
+        return (f"ValidationToken(events={self._events_schema[0]}, playtime={self._playtime_schema[0]}, "
+                f"sampled={self.sampled})")
+
+
+def validate_inputs(events_df, playtime_df, sample=None, seed=None, **kwargs):
+    """
+    Validate TVI inputs in one fused pass per table.
+
+    Coordinates are checked with a single min/max/NaN reduction over the stacked
+    x and y arrays, nulls with one isna() over all key columns, and the playtime
+    key checks with one index of the (game, team, player) keys.
+
+    Args:
+        events_df (pd.DataFrame): Events DataFrame to validate.
+        playtime_df (pd.DataFrame): Playtime DataFrame to validate.
+        sample (int or float, optional): Validate only a random sample of events:
+            a row count (int) or a fraction (float between 0 and 1). Counts in the
+            messages then refer to the sample. Defaults to None (all rows).
+        seed (int, optional): Seed for the row sample. Defaults to None.
+        **kwargs: Column name parameters (same as calculate_tvi).
+
+    Returns:
+        dict: Validation results with:
+            - 'valid' (bool): True if no problems were found
+            - 'messages' (list): Problems found, or a success message
+            - 'notes' (list): Informational findings that don't invalidate the data
+            - 'stats' (dict): Raw counts and ranges behind the messages
+            - 'token' (ValidationToken or None): Pass to calculate_tvi(validated=...)
+              to skip re-validation; None if the data is invalid
+
+    Example:
+        >>> report = validate_inputs(events_df, playtime_df, sample=0.05, seed=0)
+        >>> tvi_df = calculate_tvi(events_df, playtime_df, validated=report['token'])
+    """
+    columns = _column_names(kwargs)
+    player_id_col = columns['player_id_col']
+    event_name_col = columns['event_name_col']
+    x_col = columns['x_col']
+    y_col = columns['y_col']
+    game_id_col = columns['game_id_col']
+    team_id_col = columns['team_id_col']
+    playtime_col = columns['playtime_col']
+
+    messages = []
+    notes = []
+    stats = {}
+
+    def result(valid):
+        if valid and not messages:
+            messages.append("✅ Data format validation passed!")
+        token = ValidationToken(events_df, playtime_df, columns, sample is not None) if valid else None
+        return {'valid': valid, 'messages': messages, 'notes': notes, 'stats': stats, 'token': token}
+
+    # Check DataFrame existence and emptiness
+    if events_df is None or events_df.empty:
+        messages.append("events_df is empty or None")
+    if playtime_df is None or playtime_df.empty:
+        messages.append("playtime_df is empty or None")
+    if messages:
+        return result(False)
+
+    # Check required columns
+    keys = [game_id_col, team_id_col, player_id_col]
+    required_event_cols = [player_id_col, event_name_col, x_col, y_col, game_id_col, team_id_col]
+    required_playtime_cols = [player_id_col, playtime_col, game_id_col, team_id_col]
+
+    missing_event_cols = [col for col in required_event_cols if col not in events_df.columns]
+    missing_playtime_cols = [col for col in required_playtime_cols if col not in playtime_df.columns]
+
+    if missing_event_cols:
+        messages.append(f"Missing columns in events_df: {missing_event_cols}")
+        messages.append(f"Available columns: {list(events_df.columns)}")
+    if missing_playtime_cols:
+        messages.append(f"Missing columns in playtime_df: {missing_playtime_cols}")
+        messages.append(f"Available columns: {list(playtime_df.columns)}")
+    if messages:
+        return result(False)
+
+    # Project (and optionally sample) only the columns that are checked
+    events = events_df[[game_id_col, team_id_col, player_id_col, event_name_col, x_col, y_col]]
+    if sample is not None:
+        n = int(round(sample * len(events))) if isinstance(sample, float) else int(sample)
+        n = max(1, min(n, len(events)))
+        rows = np.random.default_rng(seed).choice(len(events), size=n, replace=False)
+        events = events.iloc[np.sort(rows)]
+        notes.append(f"Validated a sample of {n} of {len(events_df)} events")
+    stats['events_checked'] = len(events)
+
+    # Coordinates: one reduction over the stacked (n, 2) array
+    coords = events[[x_col, y_col]].to_numpy(dtype=float)
+    finite = ~np.isnan(coords)
+    stats['coordinate_nulls'] = int((~finite).sum())
+    if finite.any():
+        with np.errstate(invalid='ignore'):
+            lo = np.where(finite, coords, np.inf).min(axis=0)
+            hi = np.where(finite, coords, -np.inf).max(axis=0)
+        for axis, name in enumerate(('x', 'y')):
+            if np.isfinite(lo[axis]):
+                stats[f'{name}_range'] = (float(lo[axis]), float(hi[axis]))
+                if lo[axis] < 0 or hi[axis] > 100:
+                    messages.append(f"{name} coordinates should be 0-100, found range: "
+                                    f"{lo[axis]:.1f} to {hi[axis]:.1f}")
+
+    # Nulls in key columns: one isna() per table
+    event_nulls = events[[player_id_col, event_name_col]].isna().sum()
+    playtime_nulls = playtime_df[[player_id_col, playtime_col]].isna().sum()
+    null_checks = [
+        (event_nulls[player_id_col], f"events_df.{player_id_col}"),
+        (event_nulls[event_name_col], f"events_df.{event_name_col}"),
+        (playtime_nulls[player_id_col], f"playtime_df.{player_id_col}"),
+        (playtime_nulls[playtime_col], f"playtime_df.{playtime_col}")
+    ]
+    for null_count, col_name in null_checks:
+        stats[f'nulls.{col_name}'] = int(null_count)
+        if null_count > 0:
+            messages.append(f"Found {null_count} null values in {col_name}")
+
+    # Playtime values
+    playtime_vals = playtime_df[playtime_col].to_numpy(dtype=float)
+    playtime_vals = playtime_vals[~np.isnan(playtime_vals)]
+    if len(playtime_vals) > 0:
+        pt_min, pt_max = playtime_vals.min(), playtime_vals.max()
+        stats['playtime_range'] = (float(pt_min), float(pt_max))
+        if pt_min <= 0:
+            messages.append(f"All playtime values should be positive, found minimum: {pt_min}")
+        if pt_max > 120:
+            messages.append(f"Playtime values seem high (>120 min), maximum found: {pt_max}")
+
+    # Key columns must have comparable types or the playtime merge silently finds nothing
+    for col in keys:
+        if (pd.api.types.is_numeric_dtype(events_df[col])
+                != pd.api.types.is_numeric_dtype(playtime_df[col])):
+            messages.append(f"Column {col} has dtype {events_df[col].dtype} in events_df "
+                            f"but {playtime_df[col].dtype} in playtime_df")
+
+    # Key checks: build the playtime key index once and look events up in it
+    playtime_keys = pd.MultiIndex.from_frame(playtime_df[keys])
+    duplicated = playtime_keys.duplicated()
+    stats['duplicate_playtime_keys'] = int(duplicated.sum())
+    if duplicated.any():
+        messages.append(f"Found {int(duplicated.sum())} duplicate ({', '.join(keys)}) keys in playtime_df")
+
+    unmatched = int((~pd.MultiIndex.from_frame(events[keys]).isin(playtime_keys)).sum())
+    stats['events_without_playtime'] = unmatched
+    if unmatched:
+        # calculate_tvi drops these by design (e.g. players under min_playtime)
+        notes.append(f"Found {unmatched} events with no matching playtime row; "
+                     f"they are ignored by calculate_tvi")
+
+    return result(not messages)
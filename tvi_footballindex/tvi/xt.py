@@ -0,0 +1,218 @@
+"""
+Expected Threat (xT)
+
+Learns a zone value grid from parsed F24 events: the pitch is split into
+l x w cells, and for every cell the shot, goal and move probabilities and the
+move transition matrix are counted with np.bincount over cell codes. The xT
+surface is then the fixed point of
+
+    xT = s * g + m * (T @ xT)
+
+solved by value iteration with NumPy. The grid maps any coordinates to their
+zone value at once and is used by calculate_tvi(xt_grid=...) for the
+value-weighted action diversity.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+PASS_ID = 1
+TAKE_ON_ID = 3
+SHOT_IDS = (13, 14, 15, 16)   # Miss, Post, SavedShot, Goal
+GOAL_ID = 16
+_PASS_END_X = '140'
+_PASS_END_Y = '141'
+
+
+def _qualifier_value(qualifiers, qualifier_id):
+    for q in qualifiers:
+        if str(q.get('qualifier_id')) == qualifier_id:
+            return q.get('value')
+    return None
+
+
+def pass_end_coordinates(passes):
+    """
+    End coordinates of F24 passes from qualifiers 140 (PassEndX) and 141 (PassEndY).
+
+    Args:
+        passes (pd.DataFrame): Parsed pass events with a 'qualifiers' column.
+
+    Returns:
+        tuple: (end_x, end_y) float arrays, NaN where the qualifier is missing.
+    """
+    end_x = pd.to_numeric(pd.Series([_qualifier_value(q, _PASS_END_X) for q in passes['qualifiers']],
+                                    dtype=object), errors='coerce').to_numpy(dtype=float)
+    end_y = pd.to_numeric(pd.Series([_qualifier_value(q, _PASS_END_Y) for q in passes['qualifiers']],
+                                    dtype=object), errors='coerce').to_numpy(dtype=float)
+    return end_x, end_y
+
+
+class XTGrid:
+    """
+    Expected Threat values on an l x w grid of the pitch.
+
+    Cells are numbered row-major with rows along y and columns along x, both in
+    the 0-100 F24 coordinate system with the team attacking towards x = 100.
+
+    Args:
+        values (np.ndarray): xT per cell, shape (w, l).
+        shot_prob (np.ndarray, optional): P(shot | action in cell), shape (w, l).
+        goal_prob (np.ndarray, optional): P(goal | shot from cell), shape (w, l).
+        move_prob (np.ndarray, optional): P(move | action in cell), shape (w, l).
+        transition (np.ndarray, optional): P(successful move to cell j | move from cell i),
+            shape (w * l, w * l).
+        n_iter (int, optional): Value iterations used to fit the grid.
+
+    Example:
+        >>> grid = XTGrid.from_events(events_df)
+        >>> grid.value_at([80, 95], [50, 50])
+    """
+
+    def __init__(self, values, shot_prob=None, goal_prob=None, move_prob=None, transition=None, n_iter=None):
+        self.values = np.asarray(values, dtype=float)
+        if self.values.ndim != 2:
+            raise ValueError(f"values must be a 2D array, got shape {self.values.shape}")
+        self.w, self.l = self.values.shape
+        self.shot_prob = shot_prob
+        self.goal_prob = goal_prob
+        self.move_prob = move_prob
+        self.transition = transition
+        self.n_iter = n_iter
+
+    def __repr__(self):
+        return f"XTGrid(l={self.l}, w={self.w}, max={self.values.max():.3f})"
+
+    def cells(self, x, y):
+        """Row-major cell code of every coordinate pair; coordinates are clamped to the pitch."""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        cols = np.clip((x / 100 * self.l).astype(np.intp), 0, self.l - 1)
+        rows = np.clip((y / 100 * self.w).astype(np.intp), 0, self.w - 1)
+        return rows * self.l + cols
+
+    def value_at(self, x, y):
+        """
+        xT of every coordinate pair.
+
+        Args:
+            x (array-like): x-coordinates (0-100).
+            y (array-like): y-coordinates (0-100).
+
+        Returns:
+            np.ndarray: Zone values.
+
+        Raises:
+            ValueError: If coordinates contain NaN.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if np.isnan(x).any() or np.isnan(y).any():
+            raise ValueError("Coordinates cannot contain NaN values.")
+        return self.values.ravel()[self.cells(x, y)]
+
+    def move_value(self, x, y, end_x, end_y):
+        """xT added by moving the ball from (x, y) to (end_x, end_y)."""
+        return self.value_at(end_x, end_y) - self.value_at(x, y)
+
+    def to_frame(self):
+        """Long table with one row per cell: cell, row, col, x_min, x_max, y_min, y_max, xT."""
+        rows, cols = np.divmod(np.arange(self.w * self.l), self.l)
+        return pd.DataFrame({
+            'cell': np.arange(self.w * self.l),
+            'row': rows,
+            'col': cols,
+            'x_min': cols * 100 / self.l,
+            'x_max': (cols + 1) * 100 / self.l,
+            'y_min': rows * 100 / self.w,
+            'y_max': (rows + 1) * 100 / self.w,
+            'xT': self.values.ravel(),
+        })
+
+    @classmethod
+    def from_events(cls, match_events, l=16, w=12, tol=1e-5, max_iter=100):
+        """
+        Fit the grid from parsed F24 events.
+
+        Moves are passes (type 1) and take-ons (type 3); shots are types 13-16,
+        goals type 16. A successful pass moves the ball to the cell of its end
+        coordinates, a successful take-on keeps it in its cell, and unsuccessful
+        moves lose the ball (they count for m but not for T).
+
+        Args:
+            match_events (pd.DataFrame): Parsed F24 events (parsef24_folder output).
+            l (int, optional): Cells along the pitch length (x). Defaults to 16.
+            w (int, optional): Cells along the pitch width (y). Defaults to 12.
+            tol (float, optional): Stop when no cell changes by more than tol. Defaults to 1e-5.
+            max_iter (int, optional): Maximum value iterations. Defaults to 100.
+
+        Returns:
+            XTGrid: The fitted grid.
+
+        Raises:
+            KeyError: If required columns are missing.
+            ValueError: If there are no moves or shots to learn from.
+        """
+        required = ['type_id', 'outcome', 'x', 'y', 'qualifiers']
+        missing = [col for col in required if col not in match_events.columns]
+        if missing:
+            raise KeyError(f"Missing columns in match_events: {missing}")
+
+        type_ids = match_events['type_id'].to_numpy()
+        is_pass = type_ids == PASS_ID
+        is_move = is_pass | (type_ids == TAKE_ON_ID)
+        is_shot = np.isin(type_ids, SHOT_IDS)
+        if not is_move.any() or not is_shot.any():
+            raise ValueError("match_events needs both moves (passes, take-ons) and shots to fit xT")
+
+        grid = cls(np.zeros((w, l)))
+        n_cells = w * l
+        cells = grid.cells(match_events['x'].to_numpy(dtype=float), match_events['y'].to_numpy(dtype=float))
+
+        move_counts = np.bincount(cells[is_move], minlength=n_cells).astype(float)
+        shot_counts = np.bincount(cells[is_shot], minlength=n_cells).astype(float)
+        goal_counts = np.bincount(cells[type_ids == GOAL_ID], minlength=n_cells).astype(float)
+        action_counts = move_counts + shot_counts
+
+        # Successful moves: passes to their end cell, take-ons within their cell
+        successful = match_events['outcome'].to_numpy() == 1
+        passes = match_events[is_pass & successful]
+        end_x, end_y = pass_end_coordinates(passes)
+        has_end = ~(np.isnan(end_x) | np.isnan(end_y))
+        starts = np.concatenate([cells[is_pass & successful][has_end],
+                                 cells[(type_ids == TAKE_ON_ID) & successful]])
+        ends = np.concatenate([grid.cells(end_x[has_end], end_y[has_end]),
+                               cells[(type_ids == TAKE_ON_ID) & successful]])
+        transition = np.bincount(starts * n_cells + ends, minlength=n_cells * n_cells)
+        transition = transition.reshape(n_cells, n_cells).astype(float)
+
+        def share(numerator, denominator):
+            return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+        shot_prob = share(shot_counts, action_counts)
+        goal_prob = share(goal_counts, shot_counts)
+        move_prob = share(move_counts, action_counts)
+        transition = share(transition, move_counts[:, None])
+
+        # Value iteration: xT = s * g + m * (T @ xT)
+        scoring = shot_prob * goal_prob
+        values = np.zeros(n_cells)
+        n_iter = 0
+        for n_iter in range(1, max_iter + 1):
+            updated = scoring + move_prob * (transition @ values)
+            converged = np.abs(updated - values).max() <= tol
+            values = updated
+            if converged:
+                break
+
+        return cls(
+            values.reshape(w, l),
+            shot_prob=shot_prob.reshape(w, l),
+            goal_prob=goal_prob.reshape(w, l),
+            move_prob=move_prob.reshape(w, l),
+            transition=transition,
+            n_iter=n_iter
+        )
@@ -4,12 +4,34 @@ General utilities for the football library.
 
 from .helpers import (
     assign_zones,
+    assign_zones_array,
     pass_length,
+    pass_length_array,
     weighted_avg
 )
+from .zones import (
+    ZoneMap,
+    points_in_polygon
+)
+from .interning import (
+    IDInterner,
+    normalize_ids,
+    get_default_interner,
+    interned_columns,
+    mark_interned
+)
 
 __all__ = [
     'assign_zones',
+    'assign_zones_array',
     'pass_length',
-    'weighted_avg'
+    'pass_length_array',
+    'weighted_avg',
+    'ZoneMap',
+    'points_in_polygon',
+    'IDInterner',
+    'normalize_ids',
+    'get_default_interner',
+    'interned_columns',
+    'mark_interned'
 ]
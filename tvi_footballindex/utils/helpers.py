@@ -1,6 +1,8 @@
 import numpy as np
 import math
 
+from tvi_footballindex.utils.zones import ZoneMap
+
 def assign_zones(x, y, x_min_max=(0, 100), y_min_max=(0, 100), 
                 zone_map=[[2, 4, 6],
                           [1, 3, 5], 
@@ -22,7 +24,8 @@ def assign_zones(x, y, x_min_max=(0, 100), y_min_max=(0, 100),
         y_min_max (tuple, optional): The minimum and maximum values for the y-coordinate. Defaults to (0, 100).
         zone_map (list of lists, optional): A 2D matrix representing zones. Each row represents a horizontal
                                           strip of the pitch from top to bottom. Each column represents
-                                          vertical strips from left to right.
+                                          vertical strips from left to right. A ZoneMap of polygon
+                                          and rectangle zones is accepted as well.
 
     Returns:
         int: The zone number corresponding to the given (x, y) coordinate.
@@ -30,6 +33,9 @@ def assign_zones(x, y, x_min_max=(0, 100), y_min_max=(0, 100),
     Raises:
         ValueError: If the zone_map is not a valid 2D matrix (inconsistent row lengths).
     """
+    if isinstance(zone_map, ZoneMap):
+        return zone_map.assign([x], [y]).tolist()[0]
+
     # Validate zone_map structure
     if not zone_map or not all(len(row) == len(zone_map[0]) for row in zone_map):
         raise ValueError("zone_map must be a valid 2D matrix with consistent row lengths.")
@@ -51,6 +57,55 @@ def assign_zones(x, y, x_min_max=(0, 100), y_min_max=(0, 100),
     return zone_map[row_index][col_index]
 
 
+def assign_zones_array(x, y, x_min_max=(0, 100), y_min_max=(0, 100),
+                       zone_map=[[2, 4, 6],
+                                 [1, 3, 5],
+                                 [2, 4, 6]]):
+    """
+    Vectorised version of assign_zones for whole coordinate arrays.
+
+    Uses the same grid and orientation as assign_zones, so for coordinates inside
+    the pitch both functions return the same zones. Coordinates outside the pitch
+    are clamped to the nearest edge zone.
+
+    Args:
+        x (array-like): x-coordinates of the events.
+        y (array-like): y-coordinates of the events.
+        x_min_max (tuple, optional): The minimum and maximum values for the x-coordinate. Defaults to (0, 100).
+        y_min_max (tuple, optional): The minimum and maximum values for the y-coordinate. Defaults to (0, 100).
+        zone_map (list of lists or ZoneMap, optional): A 2D matrix representing zones, as in
+            assign_zones, or a ZoneMap of polygon and rectangle zones.
+
+    Returns:
+        np.ndarray: The zone number for every coordinate pair.
+
+    Raises:
+        ValueError: If the zone_map is not a valid 2D matrix or coordinates contain NaN.
+    """
+    if isinstance(zone_map, ZoneMap):
+        return zone_map.assign(x, y)
+
+    if not zone_map or not all(len(row) == len(zone_map[0]) for row in zone_map):
+        raise ValueError("zone_map must be a valid 2D matrix with consistent row lengths.")
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if np.isnan(x).any() or np.isnan(y).any():
+        raise ValueError("Coordinates cannot contain NaN values.")
+
+    grid = np.asarray(zone_map)
+    rows, cols = grid.shape
+
+    x_step = (x_min_max[1] - x_min_max[0]) / cols
+    y_step = (y_min_max[1] - y_min_max[0]) / rows
+
+    col_index = np.clip(np.trunc((x - x_min_max[0]) / x_step), 0, cols - 1).astype(np.intp)
+    row_index = np.clip(np.trunc((y - y_min_max[0]) / y_step), 0, rows - 1).astype(np.intp)
+    row_index = rows - 1 - row_index  # Invert: high y -> low row index
+
+    return grid[row_index, col_index]
+
+
 def pass_length(start_x, start_y, end_x, end_y,
                 pitch_length_coord=100, pitch_width_coord=100,
                 pitch_length_meters=105, pitch_width_meters=68):
@@ -95,6 +150,42 @@ def pass_length(start_x, start_y, end_x, end_y,
     return progression, end_dist, start_half, end_half
 
 
+def pass_length_array(start_x, start_y, end_x, end_y,
+                      pitch_length_coord=100, pitch_width_coord=100,
+                      pitch_length_meters=105, pitch_width_meters=68):
+    """
+    Vectorised version of pass_length for whole coordinate arrays.
+
+    Args:
+        start_x (array-like): The starting x-coordinates of the passes.
+        start_y (array-like): The starting y-coordinates of the passes.
+        end_x (array-like): The ending x-coordinates of the passes.
+        end_y (array-like): The ending y-coordinates of the passes.
+        pitch_length_coord (int, optional): The length of the pitch in the coordinate system. Defaults to 100.
+        pitch_width_coord (int, optional): The width of the pitch in the coordinate system. Defaults to 100.
+        pitch_length_meters (int, optional): The actual length of the pitch in meters. Defaults to 105.
+        pitch_width_meters (int, optional): The actual width of the pitch in meters. Defaults to 68.
+
+    Returns:
+        tuple: (progression, end_dist, start_half, end_half) arrays, as in pass_length.
+    """
+    scale_x = pitch_length_meters / pitch_length_coord
+    scale_y = pitch_width_meters / pitch_width_coord
+    start_x_m = np.asarray(start_x, dtype=float) * scale_x
+    start_y_m = np.asarray(start_y, dtype=float) * scale_y
+    end_x_m = np.asarray(end_x, dtype=float) * scale_x
+    end_y_m = np.asarray(end_y, dtype=float) * scale_y
+    goal_x = pitch_length_meters
+    goal_y = pitch_width_meters / 2
+    start_dist = np.sqrt((goal_x - start_x_m)**2 + (goal_y - start_y_m)**2)
+    end_dist = np.sqrt((goal_x - end_x_m)**2 + (goal_y - end_y_m)**2)
+    progression = start_dist - end_dist
+    half_boundary = pitch_length_meters / 2
+    start_half = np.where(start_x_m < half_boundary, "defensive half", "attacking half").astype(object)
+    end_half = np.where(end_x_m < half_boundary, "defensive half", "attacking half").astype(object)
+    return progression, end_dist, start_half, end_half
+
+
 def weighted_avg(df, weight_column):
     """
     Computes the weighted average of all numeric columns in a DataFrame, intended for use with pandas groupby().apply().
@@ -136,4 +227,22 @@ def calculate_shannon_entropy(counts):
     
     # Calculate Shannon entropy using natural log, then convert to bits
     # H = -sum(p * ln(p)) / ln(2)
-    return float(-np.sum(probabilities * np.log(probabilities)) / np.log(2))
\ No newline at end of file
+    return float(-np.sum(probabilities * np.log(probabilities)) / np.log(2))
+
+
+def to_python(value):
+    """Convert numpy scalars and NaN to JSON-serialisable Python values."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def key_str(key):
+    """String form of an ID or key tuple, with integral floats written as integers."""
+    if isinstance(key, tuple):
+        return tuple(key_str(part) for part in key)
+    if isinstance(key, (float, np.floating)) and float(key).is_integer():
+        return str(int(key))
+    return str(key)
@@ -0,0 +1,218 @@
+"""
+ID interning
+
+Maps external game, team and player IDs to dense int32 codes. IDs arrive as
+strings from F24 XML and as ints or floats from processed CSVs; all of them are
+normalised to one canonical string form ("123", never "123.0" or 123) before
+they get a code, so the same player always joins to the same code whatever the
+source. Joins and groupbys then run on small integers, and the original IDs are
+restored on output with decode / decode_frame.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Default column -> ID kind mapping used by encode_frame / decode_frame
+ID_COLUMNS = {
+    'game_id': 'game',
+    'team_id': 'team',
+    'player_id': 'player',
+    'home_team_id': 'team',
+    'away_team_id': 'team',
+}
+
+CODE_DTYPE = np.int32
+
+# DataFrame.attrs key listing the columns of a frame that hold interner codes
+INTERNED_ATTR = 'interned_columns'
+
+
+def interned_columns(df):
+    """Columns of df marked as holding interner codes (see mark_interned)."""
+    return list(df.attrs.get(INTERNED_ATTR, ()))
+
+
+def mark_interned(df, columns):
+    """
+    Mark columns of df as holding interner codes, in place.
+
+    encode_frame marks the columns it encodes, and the parser marks the frames it
+    interns; use this for frames built from codes in other ways (e.g. a groupby of
+    an interned frame) so that encode_frame does not encode them again.
+
+    Args:
+        df (pd.DataFrame): Frame whose ID columns hold codes.
+        columns (list): Column names to mark.
+
+    Returns:
+        pd.DataFrame: df, for chaining.
+    """
+    df.attrs = {**df.attrs, INTERNED_ATTR: sorted(set(interned_columns(df)) | set(columns))}
+    return df
+
+
+def normalize_ids(values):
+    """
+    Convert IDs to their canonical string form.
+
+    Integral floats lose their decimal part (123.0 -> "123"), strings are stripped
+    and missing values stay missing.
+
+    Args:
+        values (array-like): IDs as strings, ints or floats.
+
+    Returns:
+        pd.Series: Canonical string IDs (object dtype), NaN where missing.
+    """
+    values = pd.Series(values, copy=False)
+    missing = values.isna().to_numpy()
+    if pd.api.types.is_float_dtype(values):
+        filled = values.fillna(0).to_numpy()
+        if np.all(filled == np.trunc(filled)):
+            values = pd.Series(filled.astype(np.int64), index=values.index)
+    ids = values.astype(str).str.strip().str.replace(r'^(-?\d+)\.0+$', r'\1', regex=True)
+    ids = ids.astype(object)
+    ids[missing] = np.nan
+    return ids
+
+
+class IDInterner:
+    """
+    Registry of dense int32 codes for external IDs, one code space per kind.
+
+    Codes are assigned in order of first appearance and never change, so frames
+    encoded at different times with the same interner join correctly. Missing IDs
+    get the code -1.
+
+    Example:
+        >>> interner = IDInterner()
+        >>> interner.encode(["10", "11", "10"], "player")
+        array([0, 1, 0], dtype=int32)
+        >>> interner.encode([11.0], "player")
+        array([1], dtype=int32)
+        >>> interner.decode([1, 0], "player")
+        array(['11', '10'], dtype=object)
+    """
+
+    def __init__(self):
+        self._ids = {}       # kind -> list of canonical IDs, position = code
+        self._index = {}     # kind -> pd.Index over _ids[kind], rebuilt when it grows
+
+    def __len__(self):
+        return sum(len(ids) for ids in self._ids.values())
+
+    def __repr__(self):
+        sizes = ', '.join(f"{kind}={len(ids)}" for kind, ids in self._ids.items())
+        return f"IDInterner({sizes})"
+
+    def size(self, kind):
+        """Number of IDs interned for a kind."""
+        return len(self._ids.get(kind, ()))
+
+    def _lookup(self, kind):
+        if kind not in self._index:
+            self._index[kind] = pd.Index(self._ids.get(kind, []), dtype=object)
+        return self._index[kind]
+
+    def encode(self, values, kind):
+        """
+        Intern IDs and return their codes.
+
+        Args:
+            values (array-like): External IDs (strings, ints or floats).
+            kind (str): Code space, e.g. 'game', 'team' or 'player'.
+
+        Returns:
+            np.ndarray: int32 codes, -1 for missing IDs.
+        """
+        ids = normalize_ids(values)
+        index = self._lookup(kind)
+        codes = index.get_indexer(ids)
+
+        new = (codes < 0) & ids.notna().to_numpy()
+        if new.any():
+            known = self._ids.setdefault(kind, [])
+            known.extend(pd.unique(ids[new]))
+            if len(known) > np.iinfo(CODE_DTYPE).max:
+                raise ValueError(f"Too many {kind} IDs for {np.dtype(CODE_DTYPE).name} codes")
+            self._index.pop(kind, None)
+            codes = self._lookup(kind).get_indexer(ids)
+        return codes.astype(CODE_DTYPE)
+
+    def decode(self, codes, kind):
+        """
+        Restore the canonical external IDs of codes.
+
+        Args:
+            codes (array-like): Codes from encode().
+            kind (str): Code space the codes belong to.
+
+        Returns:
+            np.ndarray: Canonical string IDs (object dtype), None for code -1.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        ids = np.array(self._ids.get(kind, []) + [None], dtype=object)
+        if codes.size and codes.max() >= len(ids) - 1:
+            raise ValueError(f"Unknown {kind} code {codes.max()}")
+        return ids[codes]   # -1 picks the trailing None
+
+    def encode_frame(self, df, columns=None, encoded=None):
+        """
+        Return a copy of df with ID columns replaced by their codes.
+
+        Whether a column already holds codes is never guessed from its dtype (raw
+        IDs may well be int32): by default only the columns marked in df.attrs
+        (by encode_frame itself, the parser or mark_interned) are left as they are.
+
+        Args:
+            df (pd.DataFrame): Frame with external ID columns.
+            columns (dict, optional): Column -> kind mapping. Defaults to ID_COLUMNS;
+                columns missing from df are skipped.
+            encoded (bool, optional): True if all mapped columns already hold codes,
+                False to encode all of them. Defaults to None (use the marks in df.attrs).
+
+        Returns:
+            pd.DataFrame: Copy of df with int32 code columns, all of them marked as interned.
+        """
+        columns = ID_COLUMNS if columns is None else columns
+        present = [col for col in columns if col in df.columns]
+        if encoded is None:
+            skip = set(interned_columns(df))
+        else:
+            skip = set(present) if encoded else set()
+        codes = {col: self.encode(df[col], columns[col]) for col in present if col not in skip}
+        return mark_interned(df.assign(**codes), present)
+
+    def decode_frame(self, df, columns=None):
+        """
+        Return a copy of df with code columns replaced by the external IDs.
+
+        Args:
+            df (pd.DataFrame): Frame with int32 code columns.
+            columns (dict, optional): Column -> kind mapping. Defaults to ID_COLUMNS;
+                columns missing from df are skipped. If df carries interned marks
+                (see encode_frame), only the marked columns are decoded.
+
+        Returns:
+            pd.DataFrame: Copy of df with canonical string ID columns.
+        """
+        columns = ID_COLUMNS if columns is None else columns
+        marked = interned_columns(df)
+        decode = [col for col in columns if col in df.columns and (not marked or col in marked)]
+        result = df.assign(**{col: self.decode(df[col].to_numpy(), columns[col]) for col in decode})
+        remaining = [col for col in marked if col not in decode]
+        result.attrs = {key: value for key, value in df.attrs.items() if key != INTERNED_ATTR}
+        if remaining:
+            mark_interned(result, remaining)
+        return result
+
+
+_default_interner = IDInterner()
+
+
+def get_default_interner():
+    """Process-wide IDInterner shared by callers that don't pass their own."""
+    return _default_interner
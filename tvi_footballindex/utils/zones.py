@@ -0,0 +1,166 @@
+"""
+Polygon and rectangle pitch zones
+
+Tactical zones such as the penalty box, the half-spaces or zone 14 don't fit a
+uniform grid. A ZoneMap takes zone definitions as rectangles or polygons in
+pitch coordinates and compiles them once into a fine raster lookup table, so
+assigning zones to any number of events is a single integer index operation.
+A ZoneMap can be passed wherever a grid `zone_map` is accepted.
+
+Part of the tvi_footballindex library.
+"""
+
+import numpy as np
+
+
+def _is_point(value):
+    return isinstance(value, (list, tuple, np.ndarray)) and len(value) == 2 and \
+        all(isinstance(v, (int, float, np.integer, np.floating)) for v in value)
+
+
+def _is_rectangle(value):
+    return isinstance(value, (list, tuple, np.ndarray)) and len(value) == 4 and \
+        all(isinstance(v, (int, float, np.integer, np.floating)) for v in value)
+
+
+def _shapes(label, shape):
+    """Split a zone definition into a list of polygons (vertex arrays)."""
+    if _is_rectangle(shape):
+        x0, y0, x1, y1 = map(float, shape)
+        if x0 >= x1 or y0 >= y1:
+            raise ValueError(f"Zone '{label}': rectangle must be (x_min, y_min, x_max, y_max), got {shape}")
+        return [np.array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])]
+    if isinstance(shape, (list, tuple, np.ndarray)) and len(shape) and all(_is_point(p) for p in shape):
+        if len(shape) < 3:
+            raise ValueError(f"Zone '{label}': a polygon needs at least 3 vertices, got {len(shape)}")
+        return [np.asarray(shape, dtype=float)]
+    if isinstance(shape, (list, tuple)) and len(shape):
+        return [polygon for part in shape for polygon in _shapes(label, part)]
+    raise ValueError(f"Zone '{label}': expected a rectangle, a polygon or a list of them, got {shape!r}")
+
+
+def points_in_polygon(x, y, polygon):
+    """
+    Even-odd test of which points lie inside a polygon.
+
+    Vectorised over the points; the loop runs over the polygon edges only.
+
+    Args:
+        x (np.ndarray): x-coordinates of the points.
+        y (np.ndarray): y-coordinates of the points.
+        polygon (np.ndarray): Vertices, shape (n, 2).
+
+    Returns:
+        np.ndarray: Boolean mask.
+    """
+    inside = np.zeros(np.shape(x), dtype=bool)
+    xs, ys = polygon[:, 0], polygon[:, 1]
+    for (xa, ya), (xb, yb) in zip(zip(xs, ys), zip(np.roll(xs, -1), np.roll(ys, -1))):
+        if ya == yb:
+            continue
+        crosses = (ya > y) != (yb > y)
+        x_cross = xa + (y - ya) * (xb - xa) / (yb - ya)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+class ZoneMap:
+    """
+    Zones defined as rectangles and polygons, compiled to a raster lookup table.
+
+    Zones are given in order; where they overlap the first one wins, and points
+    covered by no zone get `default`. The raster has one cell per `resolution`
+    coordinate units, each labelled by the zone containing its centre, so zone
+    boundaries are exact up to half a cell.
+
+    Args:
+        zones (dict or list): Zone label -> shape, or a list of (label, shape) pairs.
+            A shape is a rectangle (x_min, y_min, x_max, y_max), a polygon
+            [(x, y), (x, y), ...] or a list of rectangles and polygons (e.g. both
+            half-spaces as one zone).
+        resolution (float, optional): Raster cell size in coordinate units. Defaults to 0.5.
+        default (optional): Label for points outside every zone. Defaults to 0.
+        x_min_max (tuple, optional): Range of the x-coordinate. Defaults to (0, 100).
+        y_min_max (tuple, optional): Range of the y-coordinate. Defaults to (0, 100).
+
+    Raises:
+        ValueError: If zones is empty, a shape is invalid or resolution is not positive.
+
+    Example:
+        >>> zones = ZoneMap({
+        ...     'box': (83, 21.1, 100, 78.9),
+        ...     'zone_14': (66, 37, 83, 63),
+        ...     'half_spaces': [(66, 21.1, 83, 37), (66, 63, 83, 78.9)],
+        ... }, default='other')
+        >>> zones.assign([90, 70, 10], [50, 50, 50])
+        array(['box', 'zone_14', 'other'], dtype=object)
+    """
+
+    def __init__(self, zones, resolution=0.5, default=0, x_min_max=(0, 100), y_min_max=(0, 100)):
+        items = list(zones.items()) if isinstance(zones, dict) else [tuple(item) for item in zones]
+        if not items:
+            raise ValueError("zones cannot be empty")
+        if resolution <= 0:
+            raise ValueError(f"resolution must be positive, got {resolution}")
+
+        self.zones = items
+        self.resolution = resolution
+        self.default = default
+        self.x_min_max = tuple(x_min_max)
+        self.y_min_max = tuple(y_min_max)
+
+        labels = [label for label, _ in items] + [default]
+        self.labels = np.array(labels)
+        if self.labels.dtype.kind not in 'iuf':
+            self.labels = np.array(labels, dtype=object)
+
+        # Raster of zone positions; cells are tested at their centres, last zone first
+        # so that earlier zones overwrite later ones
+        self.nx = int(np.ceil((self.x_min_max[1] - self.x_min_max[0]) / resolution))
+        self.ny = int(np.ceil((self.y_min_max[1] - self.y_min_max[0]) / resolution))
+        centres_x = self.x_min_max[0] + (np.arange(self.nx) + 0.5) * resolution
+        centres_y = self.y_min_max[0] + (np.arange(self.ny) + 0.5) * resolution
+        grid_x, grid_y = np.meshgrid(centres_x, centres_y)
+        dtype = np.int16 if len(labels) < np.iinfo(np.int16).max else np.int32
+        self.raster = np.full((self.ny, self.nx), len(items), dtype=dtype)
+        for position in range(len(items) - 1, -1, -1):
+            label, shape = items[position]
+            covered = np.zeros(grid_x.shape, dtype=bool)
+            for polygon in _shapes(label, shape):
+                covered |= points_in_polygon(grid_x, grid_y, polygon)
+            self.raster[covered] = position
+
+    def __len__(self):
+        return len(self.zones)
+
+    def __repr__(self):
+        zones = ", ".join(f"{label!r}: {shape!r}" for label, shape in self.zones)
+        return (f"ZoneMap({{{zones}}}, resolution={self.resolution!r}, default={self.default!r}, "
+                f"x_min_max={self.x_min_max!r}, y_min_max={self.y_min_max!r})")
+
+    def cells(self, x, y):
+        """Raster row and column of every coordinate pair; coordinates are clamped to the pitch."""
+        cols = np.clip(((x - self.x_min_max[0]) / self.resolution).astype(np.intp), 0, self.nx - 1)
+        rows = np.clip(((y - self.y_min_max[0]) / self.resolution).astype(np.intp), 0, self.ny - 1)
+        return rows, cols
+
+    def assign(self, x, y):
+        """
+        Zone label of every coordinate pair.
+
+        Args:
+            x (array-like): x-coordinates of the events.
+            y (array-like): y-coordinates of the events.
+
+        Returns:
+            np.ndarray: Zone labels.
+
+        Raises:
+            ValueError: If coordinates contain NaN.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if np.isnan(x).any() or np.isnan(y).any():
+            raise ValueError("Coordinates cannot contain NaN values.")
+        rows, cols = self.cells(x, y)
+        return self.labels[self.raster[rows, cols]]